@@ -35,7 +35,8 @@ export async function GET() {
     // Get prediction logs count
     const { count: logsCount, error: logsError } = await supabase
       .from('prediction_logs')
-      .select('*', { count: 'exact', head: true });
+      .select('*', { count: 'exact', head: true })
+      .eq('is_shadow', false);
 
     if (logsError) {
       console.error('Error fetching logs count:', logsError);
@@ -45,6 +46,7 @@ export async function GET() {
     const { count: completedCount, error: completedError } = await supabase
       .from('prediction_logs')
       .select('*', { count: 'exact', head: true })
+      .eq('is_shadow', false)
       .not('actual_sell_through', 'is', null);
 
     if (completedError) {
@@ -55,6 +57,7 @@ export async function GET() {
     const { data: accuracyData, error: accuracyError } = await supabase
       .from('prediction_logs')
       .select('prediction_error')
+      .eq('is_shadow', false)
       .not('actual_sell_through', 'is', null);
 
     let avgAccuracy = 0;
@@ -110,6 +110,7 @@ export async function GET(request: NextRequest) {
         )
       `)
       .eq('store_id', store.id)
+      .eq('is_shadow', false)
       .gte('predicted_at', startDate.toISOString())
       .order('predicted_at', { ascending: false })
       .limit(50);
@@ -8,8 +8,27 @@ Modules:
 - config: Configuration, feature definitions, hyperparameters
 - preprocess: Data fetching and preprocessing
 - train_model: Model training and comparison
-- evaluate: Model evaluation and reporting
-- predict: Prediction interface
+- evaluate: Model evaluation and reporting (--drift: live drift monitoring)
+- drift: Incremental rolling error / feature drift over prediction_logs
+- predict: Prediction interface (SellThroughPredictor, PredictorPool)
+- registry: Versioned model artifacts and the active/candidate version pointers
+- explain: Per-prediction feature contributions (API impact factors)
+- optimize: What-if price/quantity search over a candidate grid
+- feature_selection: Permutation-importance feature selection before training
+- intervals: Quantile LightGBM models for prediction intervals
+- distill: Small student model distilled from the selected model
+- shadow: Background shadow scoring of the candidate model
+- prediction_log: prediction_logs rows, bulk inserts and async writer
+- batch_score: Bulk scoring of open products into prediction_logs
+- ensemble: Fold ensemble built from time-series CV models
+- profiling: Training pipeline stage timing and profiling
+- metrics: Prometheus metrics for the prediction API
+- cache: Prediction response cache for the API
+- store_stats: In-memory ml_store_stats snapshot for the API
+- regions: Store address to region resolution (matches SQL extract_region)
+- holiday_calendar: Bundled Korean public holiday calendar (is_holiday lookup)
+- synthetic: Synthetic data and models for benchmarks
+- benchmarking, benchmark_predict, benchmark_training: Offline benchmarks
 
 Usage:
     # Train a model
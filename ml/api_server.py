@@ -3,84 +3,94 @@ Flask API Server for ML Predictions
 ====================================
 
 Provides REST API endpoints for real-time sell-through rate predictions.
-Model is loaded once at startup and cached in memory for fast inference.
+Models are loaded once at startup and kept in memory for fast inference;
+several registered versions can be loaded side by side and selected per
+request. Store statistics come from an in-memory snapshot and full
+responses are cached in a bounded LRU cache.
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-from predict import SellThroughPredictor
+from predict import PredictorPool
+from registry import list_versions
+from shadow import ShadowScorer
+from prediction_log import PredictionLogWriter, build_log_row
+from cache import TTLCache, feature_cache_key
+from explain import top_factors
+from holiday_calendar import is_holiday
+from optimize import optimize_listing
+from store_stats import StoreStatsSnapshot
+from config import API_CACHE_CONFIG, PREDICTION_LOG_CONFIG
+from metrics import (
+    registry as metrics_registry,
+    PREDICT_REQUESTS,
+    PREDICT_ERRORS,
+    PREDICT_LATENCY,
+    PREDICT_STAGE_LATENCY,
+    OPTIMIZE_REQUESTS,
+    OPTIMIZE_LATENCY,
+)
 import psycopg2
 from datetime import datetime
 import os
-import re
+import time
+import uuid
 from typing import Optional, Dict, Tuple
 
 app = Flask(__name__)
 CORS(app)
 
-# Global model instance (loaded once at startup)
-predictor: Optional[SellThroughPredictor] = None
+# Loaded model versions (active + recent ones, loaded once at startup)
+predictors = PredictorPool()
+
+# Served predictions are written to prediction_logs in background batches
+log_writer = PredictionLogWriter(database_url=os.getenv('DATABASE_URL'))
+
+# Candidate model scored in the background, its predictions logged as shadow rows
+shadow_scorer = ShadowScorer(predictors, log_writer)
+
+# Response cache (invalidated whenever a model is loaded)
+prediction_cache = TTLCache(
+    'prediction',
+    maxsize=API_CACHE_CONFIG['prediction_cache_size'],
+    ttl=API_CACHE_CONFIG['prediction_cache_ttl'],
+)
+
+# In-memory copy of ml_store_stats (loaded at startup, refreshed incrementally)
+store_stats = StoreStatsSnapshot(database_url=os.getenv('DATABASE_URL'))
 
 def initialize_model():
     """Initialize ML model at server startup."""
-    global predictor
     try:
         print("🔄 Loading ML model...")
-        predictor = SellThroughPredictor()
-        print("✅ Model loaded successfully")
-        return True
+        predictors.load_registry()
+        prediction_cache.clear()
+        print(f"✅ Model loaded successfully (active: {predictors.active_version}, "
+              f"loaded: {', '.join(predictors.versions())})")
     except Exception as e:
         print(f"❌ Failed to load model: {e}")
         return False
+    
+    try:
+        print(f"✅ Store stats snapshot loaded ({store_stats.load()} stores)")
+    except Exception as e:
+        # Not fatal: stores are then fetched on demand
+        print(f"⚠️  Failed to load store stats snapshot: {e}")
+    return True
 
 
 def get_store_features(store_id: str) -> Optional[Dict]:
     """
-    Fetch store statistics from database.
+    Look up store statistics in the ml_store_stats snapshot.
     
     Args:
         store_id: Store UUID
-        
+    
     Returns:
         Dictionary with store features or None if not found
     """
     try:
-        conn = psycopg2.connect(os.getenv('DATABASE_URL'))
-        cursor = conn.cursor()
-        
-        # Get store stats
-        cursor.execute("""
-            SELECT 
-                COALESCE(AVG(r.rating), 0) as avg_rating,
-                COUNT(DISTINCT r.id) as total_reviews,
-                COUNT(DISTINCT o.id) as total_sales,
-                s.address
-            FROM stores s
-            LEFT JOIN reviews r ON r.store_id = s.id
-            LEFT JOIN products p ON p.store_id = s.id
-            LEFT JOIN orders o ON o.product_id = p.id AND o.status = 'COMPLETED'
-            WHERE s.id = %s
-            GROUP BY s.id, s.address
-        """, (store_id,))
-        
-        result = cursor.fetchone()
-        conn.close()
-        
-        if not result:
-            return None
-        
-        # Extract region from address
-        address = result[3] or ''
-        region_match = re.search(r'([가-힣]+(?:구|시))', address)
-        store_region = region_match.group(1) if region_match else 'unknown'
-        
-        return {
-            'store_avg_rating': float(result[0]),
-            'store_total_reviews': int(result[1]),
-            'store_total_sales': int(result[2]),
-            'store_region': store_region
-        }
-    
+        return store_stats.get(store_id)
     except Exception as e:
         print(f"Error fetching store features: {e}")
         return None
@@ -93,7 +103,7 @@ def calculate_confidence(prediction: float, category: str) -> Tuple[str, float]:
     Args:
         prediction: Predicted sell-through rate
         category: Product category
-        
+    
     Returns:
         Tuple of (confidence_level, confidence_score)
     """
@@ -124,17 +134,25 @@ def calculate_confidence(prediction: float, category: str) -> Tuple[str, float]:
         return 'medium', 0.75
 
 
-def get_impact_factors(features: Dict, prediction: float) -> list:
+def get_impact_factors(features: Dict, prediction: float, contributions: Optional[Dict] = None) -> list:
     """
     Analyze key factors affecting the prediction.
     
+    With per-feature contributions from the model (explain.py) the factors
+    are the largest contributions; otherwise (Random Forest, Ridge) they
+    come from fixed rules on the input features.
+    
     Args:
-        features: Input features
+        features: Input features (including derived features when explained)
         prediction: Predicted sell-through rate
-        
+        contributions: Feature name -> contribution to the prediction
+    
     Returns:
         List of impact factors
     """
+    if contributions is not None:
+        return top_factors(features, contributions)
+    
     factors = []
     
     # Discount rate impact
@@ -204,7 +222,7 @@ def generate_suggestion(features: Dict, prediction: float) -> str:
     Args:
         features: Input features
         prediction: Predicted sell-through rate
-        
+    
     Returns:
         Suggestion message
     """
@@ -231,6 +249,116 @@ def generate_suggestion(features: Dict, prediction: float) -> str:
             return f"수량을 {new_qty}개로 크게 줄이는 것을 권장합니다."
 
 
+# build_features() values the /predict response reads besides the model
+# input (rule-based factors, suggestion, sold quantity, confidence)
+RESPONSE_FEATURES = ['discount_rate', 'time_slot', 'register_day_of_week', 'product_quantity', 'product_category']
+
+# Listing fields required by /predict and /optimize
+REQUIRED_FIELDS = ['store_id', 'product_category', 'original_price',
+                   'discount_price', 'product_quantity', 'deadline_hours']
+
+
+def parse_listing(data: Dict) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Validate and convert the listing fields of a request body.
+    
+    Args:
+        data: Request JSON
+    
+    Returns:
+        (listing, None) or (None, error message)
+    
+    Raises:
+        TypeError, ValueError: Non-numeric price/quantity/deadline values
+    """
+    for field in REQUIRED_FIELDS:
+        if field not in data:
+            return None, f'Missing field: {field}'
+    
+    listing = {
+        'store_id': data['store_id'],
+        'product_category': data['product_category'],
+        'original_price': float(data['original_price']),
+        'discount_price': float(data['discount_price']),
+        'product_quantity': int(data['product_quantity']),
+        'deadline_hours': float(data['deadline_hours']),
+    }
+    
+    if listing['original_price'] <= 0 or listing['discount_price'] <= 0:
+        return None, 'Invalid price values'
+    if listing['discount_price'] >= listing['original_price']:
+        return None, 'Discount price must be less than original price'
+    if listing['product_quantity'] <= 0:
+        return None, 'Invalid quantity'
+    if listing['deadline_hours'] <= 0:
+        return None, 'Invalid deadline hours'
+    
+    return listing, None
+
+
+def build_features(listing: Dict, store_features: Dict, now: Optional[datetime] = None) -> Dict:
+    """
+    Model features for a listing registered now.
+    
+    Args:
+        listing: Output of parse_listing()
+        store_features: Store statistics (get_store_features())
+        now: Registration time (default: current time)
+    
+    Returns:
+        Feature dictionary for SellThroughPredictor
+    """
+    original_price = listing['original_price']
+    discount_price = listing['discount_price']
+    
+    # Time features
+    now = now or datetime.now()
+    
+    # Day of week mapping
+    dow_map = ['월', '화', '수', '목', '금', '토', '일']
+    day_of_week = dow_map[now.weekday()]
+    
+    # Time slot classification
+    hour = now.hour
+    if 6 <= hour < 11:
+        time_slot = '아침'
+    elif 11 <= hour < 14:
+        time_slot = '점심'
+    elif 14 <= hour < 17:
+        time_slot = '오후'
+    elif 17 <= hour < 21:
+        time_slot = '저녁'
+    else:
+        time_slot = '심야'
+    
+    # Weekend/holiday detection
+    is_weekend = now.weekday() >= 5
+    holiday = is_holiday(now)
+    
+    # Combine all features
+    return {
+        'product_register_hour': now.hour,
+        'product_register_minute': now.minute,
+        'original_price': original_price,
+        'discount_price': discount_price,
+        'discount_rate': ((original_price - discount_price) / original_price) * 100,
+        'product_quantity': listing['product_quantity'],
+        'deadline_hours_remaining': listing['deadline_hours'],
+        'product_category': listing['product_category'],
+        'register_day_of_week': day_of_week,
+        'time_slot': time_slot,
+        'is_holiday': holiday,
+        'is_weekend': is_weekend,
+        **store_features
+    }
+
+
+def _error(message: str, status: int, error_type: str):
+    """Build an error response and count it."""
+    PREDICT_ERRORS.labels(error_type).inc()
+    return jsonify({'error': message}), status
+
+
 @app.route('/predict', methods=['POST'])
 def predict():
     """
@@ -254,113 +382,236 @@ def predict():
         "confidence": "high",
         "confidence_score": 0.91,
         "factors": [...],
-        "suggestion": "..."
+        "suggestion": "...",
+        "prediction_interval": {"lower": 0.70, "upper": 0.93, "level": 0.8}  # with an interval model
     }
     """
+    start = time.perf_counter()
+    response, status = _handle_predict()
+    PREDICT_LATENCY.observe(time.perf_counter() - start)
+    PREDICT_REQUESTS.labels(status).inc()
+    return response, status
+
+
+def _log_prediction(data: Dict, store_id: str, features: Dict, prediction: float, model_version: str,
+                    confidence: str, confidence_score: float):
+    """Queue the served prediction for prediction_logs and for shadow scoring (non-blocking)."""
+    if not PREDICTION_LOG_CONFIG['enabled']:
+        return
+    
+    # Optional: links the log rows to an existing product (actual result)
     try:
-        if not predictor:
-            return jsonify({'error': 'Model not loaded'}), 503
-        
-        data = request.json
-        
-        # Validate required fields
-        required_fields = ['store_id', 'product_category', 'original_price', 
-                          'discount_price', 'product_quantity', 'deadline_hours']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing field: {field}'}), 400
-        
-        # Extract input data
-        store_id = data['store_id']
-        product_category = data['product_category']
-        original_price = float(data['original_price'])
-        discount_price = float(data['discount_price'])
-        product_quantity = int(data['product_quantity'])
-        deadline_hours = float(data['deadline_hours'])
-        
-        # Validate values
-        if original_price <= 0 or discount_price <= 0:
-            return jsonify({'error': 'Invalid price values'}), 400
-        if discount_price >= original_price:
-            return jsonify({'error': 'Discount price must be less than original price'}), 400
-        if product_quantity <= 0:
-            return jsonify({'error': 'Invalid quantity'}), 400
-        if deadline_hours <= 0:
-            return jsonify({'error': 'Invalid deadline hours'}), 400
-        
-        # Get current time features
-        now = datetime.now()
-        
-        # Day of week mapping
-        dow_map = ['월', '화', '수', '목', '금', '토', '일']
-        day_of_week = dow_map[now.weekday()]
-        
-        # Time slot classification
-        hour = now.hour
-        if 6 <= hour < 11:
-            time_slot = '아침'
-        elif 11 <= hour < 14:
-            time_slot = '점심'
-        elif 14 <= hour < 17:
-            time_slot = '오후'
-        elif 17 <= hour < 21:
-            time_slot = '저녁'
-        else:
-            time_slot = '심야'
-        
-        # Weekend/holiday detection
-        is_weekend = now.weekday() >= 5
-        is_holiday = False  # TODO: Integrate holiday API
+        product_id = str(uuid.UUID(str(data['product_id']))) if data.get('product_id') else None
+    except ValueError:
+        product_id = None
+    
+    request_id = str(uuid.uuid4())
+    log_writer.submit(build_log_row(
+        request_id, store_id, features, prediction, model_version, is_shadow=False,
+        product_id=product_id, confidence=confidence, confidence_score=confidence_score,
+    ))
+    
+    candidate_version = predictors.shadow_version()
+    if candidate_version is not None and candidate_version != model_version:
+        shadow_scorer.submit(candidate_version, {
+            'request_id': request_id,
+            'store_id': store_id,
+            'product_id': product_id,
+            'features': features,
+        })
+
+
+def _handle_predict():
+    """Run the /predict pipeline, timing each stage. Returns (response, status)."""
+    try:
+        if not len(predictors):
+            return _error('Model not loaded', 503, 'model_not_loaded')
+        
+        with PREDICT_STAGE_LATENCY.labels('validation').time():
+            data = request.get_json(silent=True) or {}
+            
+            # Optional explicit model version (default: active version)
+            try:
+                predictor = predictors.get(data.get('model_version'))
+            except KeyError:
+                return _error(f"Unknown model version: {data.get('model_version')}", 404, 'model_version_not_found')
+            if predictor is None:
+                return _error(f"Model version {data.get('model_version')} is loading, retry shortly",
+                              503, 'model_version_loading')
+            
+            listing, message = parse_listing(data)
+            if message:
+                return _error(message, 400, 'validation')
+            store_id = listing['store_id']
+            product_category = listing['product_category']
+            product_quantity = listing['product_quantity']
         
         # Get store statistics
-        store_features = get_store_features(store_id)
+        with PREDICT_STAGE_LATENCY.labels('store_features').time():
+            store_features = get_store_features(store_id)
         if not store_features:
-            return jsonify({'error': 'Store not found'}), 404
-        
-        # Combine all features
-        features = {
-            'product_register_hour': now.hour,
-            'product_register_minute': now.minute,
-            'original_price': original_price,
-            'discount_price': discount_price,
-            'discount_rate': ((original_price - discount_price) / original_price) * 100,
-            'product_quantity': product_quantity,
-            'deadline_hours_remaining': deadline_hours,
-            'product_category': product_category,
-            'register_day_of_week': day_of_week,
-            'time_slot': time_slot,
-            'is_holiday': is_holiday,
-            'is_weekend': is_weekend,
-            **store_features
-        }
-        
-        # Make prediction
-        prediction = predictor.predict(features)
+            return _error('Store not found', 404, 'store_not_found')
+        
+        with PREDICT_STAGE_LATENCY.labels('feature_building').time():
+            features = build_features(listing, store_features)
+        
+        # Identical model input (and response fields) for the same model
+        # version reuse the full response
+        with PREDICT_STAGE_LATENCY.labels('prediction_cache').time():
+            cache_key = feature_cache_key(
+                features, predictor.model_version, predictor.input_features + RESPONSE_FEATURES
+            )
+            cached = prediction_cache.get(cache_key)
+        if cached is not None:
+            response, prediction = cached
+            _log_prediction(data, store_id, features, prediction, predictor.model_version,
+                            response['confidence'], response['confidence_score'])
+            return jsonify(response), 200
+        
+        with PREDICT_STAGE_LATENCY.labels('feature_preparation').time():
+            X = predictor.prepare_features(features)
+        
+        # Make prediction (contributions and interval from the same model input)
+        with PREDICT_STAGE_LATENCY.labels('model_inference').time():
+            details = predictor.predict_frame_details(X)
+            prediction = float(details.predictions[0])
+            contributions = details.contributions
         
         # Calculate confidence
-        confidence, confidence_score = calculate_confidence(prediction, product_category)
-        
-        # Get impact factors
-        factors = get_impact_factors(features, prediction)
-        
-        # Generate suggestion
-        suggestion = generate_suggestion(features, prediction)
+        with PREDICT_STAGE_LATENCY.labels('confidence_query').time():
+            confidence, confidence_score = calculate_confidence(prediction, product_category)
+        
+        with PREDICT_STAGE_LATENCY.labels('response_building').time():
+            # Get impact factors
+            if contributions is not None:
+                factors = get_impact_factors(
+                    X.iloc[0], prediction, dict(zip(predictor.feature_names, contributions[0]))
+                )
+            else:
+                factors = get_impact_factors(features, prediction)
+            
+            # Generate suggestion
+            suggestion = generate_suggestion(features, prediction)
+            
+            # Build response
+            response = {
+                'predicted_sell_through': round(prediction, 2),
+                'predicted_sell_through_percent': f'{int(prediction * 100)}%',
+                'predicted_sold_quantity': int(prediction * product_quantity),
+                'confidence': confidence,
+                'confidence_score': round(confidence_score, 2),
+                'factors': factors,
+                'suggestion': suggestion,
+                'model_version': predictor.model_version
+            }
+            if details.lower is not None:
+                response['prediction_interval'] = {
+                    'lower': round(float(details.lower[0]), 2),
+                    'upper': round(float(details.upper[0]), 2),
+                    'level': round(predictor.interval_model.level, 2),
+                }
+            prediction_cache.set(cache_key, (response, prediction))
+        
+        _log_prediction(data, store_id, features, prediction, predictor.model_version,
+                        confidence, confidence_score)
+        
+        return jsonify(response), 200
+    
+    except (TypeError, ValueError) as e:
+        # Non-numeric price/quantity/deadline values
+        PREDICT_ERRORS.labels('validation').inc()
+        return jsonify({'error': 'Invalid field value', 'details': str(e)}), 400
+    
+    except Exception as e:
+        print(f"Prediction error: {e}")
+        import traceback
+        traceback.print_exc()
+        PREDICT_ERRORS.labels('internal').inc()
+        return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
+
+
+@app.route('/optimize', methods=['POST'])
+def optimize():
+    """
+    What-if price/quantity optimizer for a listing.
+    
+    Request body: the /predict fields, plus optionally
+    {
+        "objective": "revenue",          # or "units"
+        "discount_rates": [20, 30, 40],  # candidate discount rates in %
+        "quantities": [10, 15, 20]       # candidate quantities
+    }
+    
+    Response:
+    {
+        "objective": "revenue",
+        "candidates_evaluated": 275,
+        "current": {"discount_price": 10000, "discount_rate": 33.3, "product_quantity": 20,
+                    "predicted_sell_through": 0.62, "expected_units": 12.4, "expected_revenue": 124000},
+        "best": {...},
+        "top": [...],
+        "model_version": "...",
+        "student_served": false
+    }
+    
+    Model types not in OPTIMIZE_CONFIG['model_types'] are optimized with
+    the version's distilled student (501 without one).
+    """
+    start = time.perf_counter()
+    response, status = _handle_optimize()
+    OPTIMIZE_LATENCY.observe(time.perf_counter() - start)
+    OPTIMIZE_REQUESTS.labels(status).inc()
+    return response, status
+
+
+def _handle_optimize():
+    """Score the candidate grid of a listing in one model call. Returns (response, status)."""
+    try:
+        if not len(predictors):
+            return jsonify({'error': 'Model not loaded'}), 503
         
-        # Build response
-        response = {
-            'predicted_sell_through': round(prediction, 2),
-            'predicted_sell_through_percent': f'{int(prediction * 100)}%',
-            'predicted_sold_quantity': int(prediction * product_quantity),
-            'confidence': confidence,
-            'confidence_score': round(confidence_score, 2),
-            'factors': factors,
-            'suggestion': suggestion
-        }
+        data = request.get_json(silent=True) or {}
+        try:
+            predictor = predictors.get(data.get('model_version'))
+        except KeyError:
+            return jsonify({'error': f"Unknown model version: {data.get('model_version')}"}), 404
+        if predictor is None:
+            return jsonify({'error': f"Model version {data.get('model_version')} is loading, retry shortly"}), 503
+        
+        # Model types over the latency budget without a distilled student
+        optimizer = predictor.optimizer
+        if optimizer is None:
+            return jsonify({
+                'error': f"/optimize is not available for {predictor.model_type} models "
+                         f"without a distilled student (over the latency budget)"
+            }), 501
+        
+        listing, message = parse_listing(data)
+        if message:
+            return jsonify({'error': message}), 400
+        
+        store_features = get_store_features(listing['store_id'])
+        if not store_features:
+            return jsonify({'error': 'Store not found'}), 404
         
-        return jsonify(response)
+        features = build_features(listing, store_features)
+        result = optimize_listing(
+            optimizer,
+            features,
+            objective=data.get('objective', 'revenue'),
+            discount_rates=data.get('discount_rates'),
+            quantities=data.get('quantities'),
+        )
+        result['model_version'] = predictor.model_version
+        result['student_served'] = optimizer.serves_student
+        return jsonify(result), 200
+    
+    except (TypeError, ValueError) as e:
+        # Non-numeric fields, unknown objective or too many candidates
+        return jsonify({'error': 'Invalid field value', 'details': str(e)}), 400
     
     except Exception as e:
-        print(f"Prediction error: {e}")
+        print(f"Optimization error: {e}")
         import traceback
         traceback.print_exc()
         return jsonify({'error': 'Internal server error', 'details': str(e)}), 500
@@ -371,11 +622,45 @@ def health():
     """Health check endpoint."""
     return jsonify({
         'status': 'ok',
-        'model_loaded': predictor is not None,
+        'model_loaded': len(predictors) > 0,
+        'active_model_version': predictors.active_version,
+        'shadow_model_version': predictors.shadow_version(),
+        'loaded_model_versions': predictors.versions(),
+        'prediction_log_pending': log_writer.pending(),
+        'prediction_log_dropped': log_writer.dropped,
         'timestamp': datetime.now().isoformat()
     })
 
 
+@app.route('/models', methods=['GET'])
+def models():
+    """List registered model versions (active / loaded flags and metrics)."""
+    loaded = set(predictors.versions())
+    return jsonify({
+        'active_model_version': predictors.active_version,
+        'models': [
+            {
+                'model_version': metadata['model_version'],
+                'model_type': metadata['model_type'],
+                'training_date': metadata['training_date'],
+                'data_size': metadata['data_size'],
+                'metrics': metadata['metrics'],
+                'student_served': bool(metadata.get('distillation', {}).get('served')),
+                'active': metadata['model_version'] == predictors.active_version,
+                'shadow': metadata['model_version'] == predictors.shadow_version(),
+                'loaded': metadata['model_version'] in loaded,
+            }
+            for metadata in list_versions()
+        ]
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus metrics (request/error counters, latency histograms, cache hits)."""
+    return Response(metrics_registry.render(), content_type=metrics_registry.CONTENT_TYPE)
+
+
 @app.route('/stats', methods=['GET'])
 def stats():
     """Get training data statistics."""
@@ -419,7 +704,10 @@ if __name__ == '__main__':
         print("\n✅ Server ready to accept requests")
         print("Endpoints:")
         print("  POST /predict - Make prediction")
+        print("  POST /optimize - Best discount price / quantity for a listing")
         print("  GET  /health  - Health check")
+        print("  GET  /models  - Registered model versions")
+        print("  GET  /metrics - Prometheus metrics")
         print("  GET  /stats   - Training data statistics")
         print("="*60 + "\n")
         
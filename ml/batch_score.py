@@ -0,0 +1,310 @@
+"""
+Batch Scoring
+=============
+
+Score every open product (or a filtered subset) in one pass and upsert
+the predictions into prediction_logs.
+
+- Store aggregates (rating, reviews, completed sales, address) are
+  read once from the ml_store_stats table
+- Products are streamed from a server-side cursor in chunks
+- Each chunk is predicted with one vectorized model call and written
+  with a bulk upsert (execute_values)
+- The full (teacher) model is used even when the API serves a distilled
+  student (--student to score with the student)
+
+Usage:
+    python batch_score.py
+    python batch_score.py --store-id <UUID> --category 빵
+    python batch_score.py --dry-run --limit 1000
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import psycopg2
+from psycopg2.extras import execute_values
+
+from config import (
+    DATABASE_URL,
+    BATCH_SCORING_CONFIG,
+)
+from holiday_calendar import holiday_flags
+from predict import SellThroughPredictor
+from prediction_log import json_default
+from regions import resolve_regions
+from store_stats import STORE_STATS_QUERY
+
+# Per-store aggregates for all stores with open products (ml_store_stats)
+STORE_AGGREGATES_QUERY = STORE_STATS_QUERY + """
+WHERE s.id IN (SELECT p.store_id FROM products p WHERE {product_filter})
+"""
+
+# Product-level features (same definitions as predict_from_db)
+PRODUCTS_QUERY = """
+SELECT
+    p.id::TEXT AS product_id,
+    p.store_id::TEXT AS store_id,
+    EXTRACT(HOUR FROM p.created_at)::INT AS product_register_hour,
+    EXTRACT(MINUTE FROM p.created_at)::INT AS product_register_minute,
+    p.original_price,
+    p.discount_price,
+    (((p.original_price - p.discount_price)::DECIMAL / NULLIF(p.original_price, 0)) * 100)::FLOAT8 AS discount_rate,
+    p.quantity AS product_quantity,
+    (EXTRACT(EPOCH FROM (p.pickup_deadline - p.created_at)) / 3600.0)::FLOAT8 AS deadline_hours_remaining,
+    p.category::TEXT AS product_category,
+    (ARRAY['일', '월', '화', '수', '목', '금', '토'])[EXTRACT(DOW FROM p.created_at)::INT + 1] AS register_day_of_week,
+    get_time_slot(EXTRACT(HOUR FROM p.created_at)::INT) AS time_slot,
+    EXTRACT(DOW FROM p.created_at)::INT IN (0, 6) AS is_weekend,
+    p.created_at::DATE AS register_date
+FROM products p
+WHERE {product_filter}
+ORDER BY p.store_id, p.id
+"""
+
+UPSERT_QUERY = """
+INSERT INTO prediction_logs (product_id, store_id, predicted_sell_through, features, model_version, predicted_at)
+VALUES %s
+ON CONFLICT (product_id, model_version) DO UPDATE SET
+    store_id = EXCLUDED.store_id,
+    predicted_sell_through = EXCLUDED.predicted_sell_through,
+    features = EXCLUDED.features,
+    is_shadow = false,
+    predicted_at = EXCLUDED.predicted_at
+"""
+
+UPSERT_TEMPLATE = "(%s, %s, %s, %s::JSONB, %s, now())"
+
+
+def build_product_filter(
+    store_id: Optional[str] = None,
+    category: Optional[str] = None,
+    include_closed: bool = False,
+) -> tuple:
+    """
+    Build the WHERE clause (and parameters) selecting products to score.
+    
+    Args:
+        store_id: Only products of this store
+        category: Only products of this category
+        include_closed: Also score sold/expired products
+        
+    Returns:
+        (sql, params)
+    """
+    clauses = []
+    params = []
+    
+    if not include_closed:
+        clauses.append("p.status = 'AVAILABLE' AND p.pickup_deadline > now()")
+    if store_id:
+        clauses.append("p.store_id = %s")
+        params.append(store_id)
+    if category:
+        clauses.append("p.category::TEXT = %s")
+        params.append(category)
+    
+    return (' AND '.join(clauses) or 'TRUE'), params
+
+
+def fetch_store_aggregates(conn, product_filter: str, params: list) -> pd.DataFrame:
+    """
+    Fetch per-store aggregates for the stores owning the selected products.
+    
+    Returns:
+        DataFrame indexed by store_id with store_* feature columns
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(STORE_AGGREGATES_QUERY.format(product_filter=product_filter), params)
+        rows = cursor.fetchall()
+    
+    stores = pd.DataFrame(
+        rows,
+        columns=['store_id', 'store_avg_rating', 'store_total_reviews', 'store_total_sales', 'store_address',
+                 'updated_at'],
+    ).drop(columns='updated_at').set_index('store_id')
+    stores['store_region'] = resolve_regions(stores.pop('store_address'))
+    return stores
+
+
+def score_chunk(predictor: SellThroughPredictor, chunk: pd.DataFrame, stores: pd.DataFrame) -> pd.DataFrame:
+    """
+    Attach store features to a chunk of products and predict.
+    
+    Args:
+        predictor: Loaded predictor
+        chunk: Product rows from PRODUCTS_QUERY
+        stores: Store aggregates from fetch_store_aggregates()
+        
+    Returns:
+        Feature frame with a 'prediction' column
+    """
+    features = chunk.join(stores, on='store_id')
+    features['is_holiday'] = holiday_flags(features['register_date'])
+    
+    X = predictor.prepare_frame(features)
+    features['prediction'] = predictor.predict_frame(X)
+    return features
+
+
+def upsert_predictions(conn, scored: pd.DataFrame, feature_names: List[str], model_version: str) -> int:
+    """
+    Bulk upsert predictions into prediction_logs.
+    
+    Returns:
+        Number of rows written
+    """
+    feature_cols = [c for c in feature_names if c in scored.columns]
+    feature_json = [
+        json.dumps(record, ensure_ascii=False, default=json_default)
+        for record in scored[feature_cols].to_dict('records')
+    ]
+    
+    rows = list(zip(
+        scored['product_id'],
+        scored['store_id'],
+        np.round(scored['prediction'].to_numpy(dtype=float), 4).tolist(),
+        feature_json,
+        [model_version] * len(scored),
+    ))
+    
+    with conn.cursor() as cursor:
+        execute_values(
+            cursor, UPSERT_QUERY, rows,
+            template=UPSERT_TEMPLATE,
+            page_size=BATCH_SCORING_CONFIG['page_size'],
+        )
+    conn.commit()
+    return len(rows)
+
+
+def score_products(
+    predictor: SellThroughPredictor,
+    store_id: Optional[str] = None,
+    category: Optional[str] = None,
+    include_closed: bool = False,
+    limit: Optional[int] = None,
+    chunk_size: int = BATCH_SCORING_CONFIG['chunk_size'],
+    dry_run: bool = False,
+) -> Dict:
+    """
+    Score the selected products and write them to prediction_logs.
+    
+    Args:
+        predictor: Loaded predictor
+        store_id: Only products of this store
+        category: Only products of this category
+        include_closed: Also score sold/expired products
+        limit: Maximum number of products
+        chunk_size: Products fetched and scored per chunk
+        dry_run: Predict without writing to the database
+        
+    Returns:
+        Summary dictionary (counts, timings, prediction statistics)
+    """
+    product_filter, params = build_product_filter(store_id, category, include_closed)
+    query = PRODUCTS_QUERY.format(product_filter=product_filter)
+    if limit:
+        query += f"\nLIMIT {int(limit)}"
+    
+    start = time.perf_counter()
+    read_conn = psycopg2.connect(DATABASE_URL)
+    write_conn = psycopg2.connect(DATABASE_URL) if not dry_run else None
+    
+    scored_count = 0
+    written_count = 0
+    prediction_sum = 0.0
+    
+    try:
+        stores = fetch_store_aggregates(read_conn, product_filter, params)
+        print(f"✓ Loaded aggregates for {len(stores)} stores")
+        
+        # Named cursor: rows are streamed from the server chunk by chunk
+        with read_conn.cursor(name='batch_score_products') as cursor:
+            cursor.itersize = chunk_size
+            cursor.execute(query, params)
+            
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                
+                columns = [desc[0] for desc in cursor.description]
+                scored = score_chunk(predictor, pd.DataFrame(rows, columns=columns), stores)
+                
+                scored_count += len(scored)
+                prediction_sum += float(scored['prediction'].sum())
+                
+                if write_conn is not None:
+                    written_count += upsert_predictions(
+                        write_conn, scored, predictor.feature_names, predictor.model_version
+                    )
+                
+                print(f"  ✓ Scored {scored_count} products")
+    finally:
+        read_conn.close()
+        if write_conn is not None:
+            write_conn.close()
+    
+    elapsed = time.perf_counter() - start
+    
+    return {
+        'scored': scored_count,
+        'written': written_count,
+        'mean_prediction': prediction_sum / scored_count if scored_count else None,
+        'elapsed_s': round(elapsed, 2),
+        'products_per_s': round(scored_count / elapsed, 1) if elapsed > 0 else None,
+        'model_version': predictor.model_version,
+    }
+
+
+def main():
+    """CLI interface for batch scoring."""
+    parser = argparse.ArgumentParser(description='Score open products and write prediction_logs')
+    parser.add_argument('--store-id', type=str, help='Only score products of this store')
+    parser.add_argument('--category', type=str, help='Only score products of this category')
+    parser.add_argument('--include-closed', action='store_true', help='Also score sold/expired products')
+    parser.add_argument('--limit', type=int, help='Maximum number of products')
+    parser.add_argument('--chunk-size', type=int, default=BATCH_SCORING_CONFIG['chunk_size'],
+                        help='Products per chunk')
+    parser.add_argument('--dry-run', action='store_true', help='Predict without writing to the database')
+    parser.add_argument('--student', action='store_true',
+                        help='Score with the distilled student model instead of the teacher')
+    
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("BATCH SCORING")
+    print("=" * 60)
+    
+    # Batch latency does not matter: the more accurate teacher by default
+    predictor = SellThroughPredictor(use_student=args.student)
+    
+    summary = score_products(
+        predictor,
+        store_id=args.store_id,
+        category=args.category,
+        include_closed=args.include_closed,
+        limit=args.limit,
+        chunk_size=args.chunk_size,
+        dry_run=args.dry_run,
+    )
+    
+    print("\n" + "=" * 60)
+    print(f"✓ Scored {summary['scored']} products in {summary['elapsed_s']}s "
+          f"({summary['products_per_s']} products/s)")
+    if args.dry_run:
+        print("  (dry run - nothing written)")
+    else:
+        print(f"✓ Upserted {summary['written']} rows into prediction_logs")
+    if summary['mean_prediction'] is not None:
+        print(f"  Mean predicted sell-through: {summary['mean_prediction']:.1%}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""
+Prediction Benchmark
+====================
+
+Reproducible latency/allocation benchmark of the prediction path:
+SellThroughPredictor.predict, predict_batch, the bare model call (with
+and without per-feature contributions / prediction intervals, and of the
+distilled student), the Flask /predict
+handler (with and without the response cache, plus the cache hit rate
+of a listing re-submitted every minute) and the /optimize candidate grid,
+for each model type. Models are trained on synthetic data and
+the database lookups of the API are replaced with fixed values, so the
+benchmark runs offline and results are comparable across commits.
+
+Usage:
+    python benchmark_predict.py
+    python benchmark_predict.py --model-types lightgbm ridge --iterations 500
+    python benchmark_predict.py --compare reports/benchmarks/predict_benchmark_old.json
+"""
+
+import argparse
+import contextlib
+import io
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest import mock
+
+# Must be imported before config (sets an offline DATABASE_URL)
+from benchmarking import (
+    BENCHMARKS_DIR,
+    environment_info,
+    measure_latency,
+    measure_allocations,
+    write_results,
+    compare_results,
+)
+from synthetic import (
+    MODEL_FILENAME,
+    PREPROCESSOR_FILENAME,
+    METADATA_FILENAME,
+    build_synthetic_model,
+    make_feature_dicts,
+)
+
+MODEL_TYPES = ['lightgbm', 'catboost', 'xgboost', 'random_forest', 'ridge']
+
+# Fixed store statistics returned instead of the database lookup
+BENCHMARK_STORE_FEATURES = {
+    'store_avg_rating': 4.2,
+    'store_total_reviews': 120,
+    'store_total_sales': 850,
+    'store_region': '지역0001구',
+}
+
+# The same listing re-submitted once a minute from here (Wednesday, 14:00-14:59)
+CACHE_REPLAY_START = datetime(2026, 3, 4, 14, 0)
+CACHE_REPLAY_MINUTES = 60
+
+BENCHMARK_REQUEST = {
+    'store_id': '00000000-0000-0000-0000-000000000000',
+    'product_category': '빵',
+    'original_price': 15000,
+    'discount_price': 10000,
+    'product_quantity': 20,
+    'deadline_hours': 6,
+}
+
+
+def load_predictor(model_dir: Path, use_student: bool = False):
+    """
+    Load a SellThroughPredictor from a synthetic model directory.
+    
+    Args:
+        model_dir: Directory with the synthetic model artifacts
+        use_student: Serve the distilled student (if one was saved) instead
+            of the model itself
+    """
+    from predict import SellThroughPredictor
+    
+    preprocessor_path = model_dir / PREPROCESSOR_FILENAME
+    with contextlib.redirect_stdout(io.StringIO()):
+        return SellThroughPredictor(
+            model_path=model_dir / MODEL_FILENAME,
+            metadata_path=model_dir / METADATA_FILENAME,
+            preprocessor_path=preprocessor_path if preprocessor_path.exists() else None,
+            use_student=use_student,
+        )
+
+
+def benchmark_model(model_type: str, model_dir: Path, iterations: int, batch_size: int) -> dict:
+    """
+    Benchmark single, batch and HTTP (uncached/cached) prediction for one model.
+    
+    Args:
+        model_type: Model type being measured
+        model_dir: Directory with the synthetic model artifacts
+        iterations: Timed calls per case
+        batch_size: Rows per predict_batch call
+        
+    Returns:
+        Dictionary of case name -> latency/allocation statistics
+    """
+    import api_server
+    from predict import PredictorPool
+    
+    predictor = load_predictor(model_dir)
+    single = make_feature_dicts(1, seed=1)[0]
+    batch = make_feature_dicts(batch_size, seed=2)
+    cases = {}
+    
+    # 1. In-process single prediction
+    fn = lambda: predictor.predict(single)
+    cases[f'{model_type}/predict'] = {
+        **measure_latency(fn, iterations),
+        **measure_allocations(fn),
+    }
+    
+    # 2. In-process batch prediction
+    fn = lambda: predictor.predict_batch(batch)
+    cases[f'{model_type}/predict_batch_{batch_size}'] = {
+        **measure_latency(fn, max(iterations // 10, 10), warmup=2, items_per_call=batch_size),
+        **measure_allocations(fn, calls=5),
+    }
+    
+    # 3. Model call alone, and with per-feature contributions (explain.py)
+    X = predictor.prepare_features(single)
+    fn = lambda: predictor.predict_frame(X)
+    cases[f'{model_type}/model_inference'] = {
+        **measure_latency(fn, iterations),
+        **measure_allocations(fn),
+    }
+    if predictor.explains:
+        fn = lambda: predictor.predict_frame_details(X, interval=False)
+        cases[f'{model_type}/model_inference_explained'] = {
+            **measure_latency(fn, iterations),
+            **measure_allocations(fn),
+        }
+    if predictor.interval_model is not None:
+        fn = lambda: predictor.predict_frame_details(X, contributions=False)
+        cases[f'{model_type}/model_inference_interval'] = {
+            **measure_latency(fn, iterations),
+            **measure_allocations(fn),
+        }
+    
+    # Same call on the distilled student (distill.py), if it passed its check
+    student = load_predictor(model_dir, use_student=True)
+    if student.serves_student:
+        X_student = student.prepare_features(single)
+        fn = lambda: student.predict_frame(X_student)
+        cases[f'{model_type}/model_inference_student'] = {
+            **measure_latency(fn, iterations),
+            **measure_allocations(fn),
+        }
+    
+    # 4. Flask /predict handler (request parsing + feature building + response)
+    client = api_server.app.test_client()
+    
+    def post_uncached():
+        api_server.prediction_cache.clear()
+        return client.post('/predict', json=BENCHMARK_REQUEST)
+    
+    def post_cached():
+        return client.post('/predict', json=BENCHMARK_REQUEST)
+    
+    pool = PredictorPool()
+    pool.add(predictor, activate=True)
+    
+    # Log rows are still queued (part of the request path) but never written
+    with mock.patch.object(api_server, 'predictors', pool), \
+         mock.patch.object(api_server.log_writer, '_write'), \
+         mock.patch.object(api_server, 'get_store_features', return_value=BENCHMARK_STORE_FEATURES), \
+         mock.patch.object(api_server, 'calculate_confidence', return_value=('medium', 0.75)):
+        response = post_uncached()
+        if response.status_code != 200:
+            raise RuntimeError(f"/predict returned {response.status_code}: {response.get_data(as_text=True)}")
+        
+        cases[f'{model_type}/http_predict'] = {
+            **measure_latency(post_uncached, iterations),
+            **measure_allocations(post_uncached),
+        }
+        
+        # 5. Repeated request answered from the response cache
+        cases[f'{model_type}/http_predict_cached'] = {
+            **measure_latency(post_cached, iterations),
+            **measure_allocations(post_cached),
+        }
+        
+        # Hit rate when only the registration time changes: every miss
+        # adds one cache entry
+        api_server.prediction_cache.clear()
+        build_features = api_server.build_features
+        for minute in range(CACHE_REPLAY_MINUTES):
+            now = CACHE_REPLAY_START + timedelta(minutes=minute)
+            with mock.patch.object(api_server, 'build_features',
+                                   lambda listing, store, now=now: build_features(listing, store, now=now)):
+                post_cached()
+        misses = len(api_server.prediction_cache)
+        cases[f'{model_type}/http_predict_cached']['replay_hit_rate'] = 1 - misses / CACHE_REPLAY_MINUTES
+        
+        # 6. /optimize: default candidate grid scored in one model call
+        post_optimize = lambda: client.post('/optimize', json=BENCHMARK_REQUEST)
+        response = post_optimize()
+        if response.status_code == 501:
+            # Over the latency budget and no student to optimize with
+            print(f"  ⚠ /optimize not served: {response.get_json()['error']}")
+        elif response.status_code != 200:
+            raise RuntimeError(f"/optimize returned {response.status_code}: {response.get_data(as_text=True)}")
+        else:
+            result = response.get_json()
+            scorer = 'student_' if result['student_served'] else ''
+            cases[f"{model_type}/http_optimize_{scorer}{result['candidates_evaluated']}"] = {
+                **measure_latency(post_optimize, max(iterations // 10, 10), warmup=2,
+                                  items_per_call=result['candidates_evaluated']),
+                **measure_allocations(post_optimize, calls=5),
+            }
+        api_server.log_writer.flush()
+    
+    return cases
+
+
+def print_results(cases: dict):
+    """Print a latency table."""
+    print(f"\n{'Case':45s} {'p50(ms)':>9s} {'p95(ms)':>9s} {'p99(ms)':>9s} {'rows/s':>11s} {'KB/call':>9s}")
+    print("-" * 97)
+    for name, c in cases.items():
+        print(f"{name:45s} {c['p50_ms']:9.3f} {c['p95_ms']:9.3f} {c['p99_ms']:9.3f} "
+              f"{c['items_per_s']:11.0f} {c['alloc_peak_kb_per_call']:9.1f}")
+
+
+def print_overhead(cases: dict, variant: str, budget: float, title: str) -> dict:
+    """
+    Print the extra latency of `<model>/model_inference_<variant>` over
+    `<model>/model_inference` against a budget.
+    
+    Args:
+        cases: Benchmark cases
+        variant: Case suffix ('explained', 'interval')
+        budget: Allowed extra p95 latency (ms)
+        title: Heading of the printed block
+        
+    Returns:
+        Dictionary of model type -> extra p50/p95 latency (ms)
+    """
+    overhead = {}
+    for name, extended in cases.items():
+        if not name.endswith(f'/model_inference_{variant}'):
+            continue
+        model_type = name.split('/')[0]
+        plain = cases[f'{model_type}/model_inference']
+        overhead[model_type] = {
+            'extra_p50_ms': extended['p50_ms'] - plain['p50_ms'],
+            'extra_p95_ms': extended['p95_ms'] - plain['p95_ms'],
+        }
+    
+    if overhead:
+        print(f"\n{title} (budget {budget:.1f} ms at p95):")
+        for model_type, o in overhead.items():
+            mark = '✓' if o['extra_p95_ms'] <= budget else '✗'
+            print(f"  {mark} {model_type:15s} {o['extra_p50_ms']:+.3f} ms p50, {o['extra_p95_ms']:+.3f} ms p95")
+    
+    return overhead
+
+
+def print_student_speedup(cases: dict) -> dict:
+    """
+    Print the model_inference speedup of the distilled students.
+    
+    Returns:
+        Dictionary of model type -> teacher/student p50 (ms) and speedup
+    """
+    speedup = {}
+    for name, student in cases.items():
+        if not name.endswith('/model_inference_student'):
+            continue
+        model_type = name.split('/')[0]
+        teacher = cases[f'{model_type}/model_inference']
+        speedup[model_type] = {
+            'teacher_p50_ms': teacher['p50_ms'],
+            'student_p50_ms': student['p50_ms'],
+            'speedup': teacher['p50_ms'] / student['p50_ms'],
+        }
+    
+    if speedup:
+        print("\nDistilled student model_inference (p50):")
+        for model_type, s in speedup.items():
+            print(f"  {model_type:15s} {s['teacher_p50_ms']:.3f} ms → {s['student_p50_ms']:.3f} ms "
+                  f"({s['speedup']:.1f}×)")
+    
+    return speedup
+
+
+def print_cache_hit_rate(cases: dict) -> dict:
+    """
+    Print the response cache hit rate of the per-minute replay against
+    API_CACHE_CONFIG['min_hit_rate'].
+    
+    Returns:
+        Dictionary of model type -> hit rate
+    """
+    from config import API_CACHE_CONFIG
+    
+    target = API_CACHE_CONFIG['min_hit_rate']
+    hit_rate = {
+        name.split('/')[0]: c['replay_hit_rate'] for name, c in cases.items() if 'replay_hit_rate' in c
+    }
+    if hit_rate:
+        print(f"\nPrediction cache hit rate, listing re-submitted every minute for "
+              f"{CACHE_REPLAY_MINUTES} min (target {target:.0%}):")
+        for model_type, rate in hit_rate.items():
+            mark = '✓' if rate >= target else '✗'
+            print(f"  {mark} {model_type:15s} {rate:.1%}")
+    
+    return hit_rate
+
+
+def print_optimize_latency(cases: dict):
+    """Print /optimize p95 latency against OPTIMIZE_CONFIG['latency_budget_ms']."""
+    from config import OPTIMIZE_CONFIG
+    
+    budget = OPTIMIZE_CONFIG['latency_budget_ms']
+    optimize_cases = {name: c for name, c in cases.items() if '/http_optimize_' in name}
+    if optimize_cases:
+        print(f"\n/optimize latency (budget {budget:.0f} ms at p95):")
+        for name, c in optimize_cases.items():
+            mark = '✓' if c['p95_ms'] <= budget else '✗'
+            print(f"  {mark} {name:40s} {c['p95_ms']:.1f} ms p95")
+
+
+def main():
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser(description='Benchmark the prediction path')
+    parser.add_argument('--model-types', nargs='+', choices=MODEL_TYPES, default=MODEL_TYPES,
+                        help='Model types to benchmark')
+    parser.add_argument('--iterations', type=int, default=300, help='Timed calls per case')
+    parser.add_argument('--batch-size', type=int, default=200, help='Rows per predict_batch call')
+    parser.add_argument('--train-rows', type=int, default=3000, help='Synthetic training rows per model')
+    parser.add_argument('--output', type=str, default=str(BENCHMARKS_DIR / 'predict_benchmark.json'),
+                        help='Output JSON path')
+    parser.add_argument('--compare', type=str, help='Previous result JSON to compare against')
+    
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("Prediction Benchmark")
+    print("=" * 60)
+    
+    cases = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for model_type in args.model_types:
+            print(f"\nBuilding synthetic {model_type} model ({args.train_rows} rows)...")
+            # Intervals for the model itself (the student is a LightGBM model)
+            model_dir = build_synthetic_model(model_type, Path(tmp) / model_type, n_rows=args.train_rows,
+                                              serve_student=False)
+            
+            print(f"Benchmarking {model_type}...")
+            cases.update(benchmark_model(model_type, model_dir, args.iterations, args.batch_size))
+    
+    print_results(cases)
+    from config import EXPLAIN_CONFIG, INTERVAL_CONFIG
+    explain_overhead = print_overhead(
+        cases, 'explained', EXPLAIN_CONFIG['latency_budget_ms'], 'Explanation overhead'
+    )
+    interval_overhead = print_overhead(
+        cases, 'interval', INTERVAL_CONFIG['latency_budget_ms'], 'Prediction interval overhead'
+    )
+    student_speedup = print_student_speedup(cases)
+    cache_hit_rate = print_cache_hit_rate(cases)
+    print_optimize_latency(cases)
+        
+    results = {
+        'benchmark': 'predict',
+        'environment': environment_info(),
+        'parameters': {
+            'iterations': args.iterations,
+            'batch_size': args.batch_size,
+            'train_rows': args.train_rows,
+        },
+        'cases': cases,
+        'explain_overhead': explain_overhead,
+        'interval_overhead': interval_overhead,
+        'student_speedup': student_speedup,
+        'cache_hit_rate': cache_hit_rate,
+    }
+    write_results(results, Path(args.output))
+    
+    if args.compare:
+        compare_results(results, Path(args.compare))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+"""
+Training Benchmark
+==================
+
+Reproducible timing/memory benchmark of the offline pipeline on synthetic
+`prediction_training_data` frames (10k / 100k / 1M rows by default):
+apply_dtype_schema, handle_missing_values, create_derived_features,
+split_data, and prepare_data_for_model + train_* per model type.
+
+Each data size runs in a fresh process, so the recorded peak RSS belongs
+to that size alone. No database is needed.
+
+With --region-counts it instead measures the store_region encodings
+(REGION_ENCODING_CONFIG) as the number of regions grows: for Ridge (sparse
+one-hot) and XGBoost/RF (ordinal and target encoding), the preprocessed
+matrix size, prepare_data_for_model time and the time of one fit on the
+last cross-validation fold. Each case runs in a fresh process.
+
+Usage:
+    python benchmark_training.py
+    python benchmark_training.py --sizes 10000 100000 --model-types lightgbm ridge
+    python benchmark_training.py --compare reports/benchmarks/training_benchmark_old.json
+    python benchmark_training.py --region-counts 50 500 5000
+"""
+
+import argparse
+import contextlib
+import io
+import multiprocessing
+from pathlib import Path
+
+# Must be imported before config (sets an offline DATABASE_URL)
+from benchmarking import (
+    BENCHMARKS_DIR,
+    environment_info,
+    write_results,
+    compare_results,
+)
+from config import RANDOM_STATE
+
+MODEL_TYPES = ['lightgbm', 'catboost', 'xgboost', 'random_forest', 'ridge']
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+# store_region encodings per model type (--region-counts)
+REGION_ENCODINGS = {
+    'ridge': ['onehot'],
+    'xgboost': ['ordinal', 'target'],
+    'random_forest': ['ordinal', 'target'],
+}
+DEFAULT_REGION_COUNTS = [50, 500, 5000]
+DEFAULT_REGION_ROWS = 100_000
+
+
+def run_size(n_rows: int, model_types: list, seed: int) -> dict:
+    """
+    Run the preprocessing and training stages for one data size.
+    
+    Executed in a child process (see main) so peak RSS is per size.
+    
+    Args:
+        n_rows: Synthetic rows
+        model_types: Model types to train
+        seed: Random seed for the synthetic frame
+        
+    Returns:
+        StageProfiler report plus frame memory usage
+    """
+    import train_model
+    from preprocess import (
+        apply_dtype_schema, handle_missing_values, create_derived_features, split_data, prepare_data_for_model
+    )
+    from profiling import profiler
+    from synthetic import make_training_frame
+    
+    trainers = {
+        'lightgbm': train_model.train_lightgbm,
+        'catboost': train_model.train_catboost,
+        'xgboost': train_model.train_xgboost,
+        'random_forest': train_model.train_random_forest,
+        'ridge': train_model.train_ridge,
+    }
+    
+    profiler.reset()
+    
+    # Pipeline output is not part of what is being measured
+    with contextlib.redirect_stdout(io.StringIO()):
+        with profiler.stage('make_training_frame'):
+            df = make_training_frame(n_rows, seed=seed)
+        raw_frame_mb = df.memory_usage(deep=True).sum() / 1024 / 1024
+        
+        with profiler.stage('apply_dtype_schema'):
+            df = apply_dtype_schema(df)
+        frame_mb = df.memory_usage(deep=True).sum() / 1024 / 1024
+        
+        with profiler.stage('handle_missing_values'):
+            df = handle_missing_values(df)
+        
+        with profiler.stage('create_derived_features'):
+            df = create_derived_features(df)
+        
+        with profiler.stage('split_data'):
+            X_train, X_test, y_train, y_test = split_data(df, include_derived_features=True)
+        del df
+        
+        for model_type in model_types:
+            with profiler.stage(model_type):
+                X_train_p, X_test_p, _, cat_features, cat_indices = prepare_data_for_model(
+                    X_train, X_test, model_type, y_train
+                )
+                
+                with profiler.stage('train'):
+                    if model_type == 'lightgbm':
+                        trainers[model_type](X_train_p, y_train, X_test_p, y_test, cat_indices)
+                    elif model_type == 'catboost':
+                        trainers[model_type](X_train_p, y_train, X_test_p, y_test, cat_features)
+                    else:
+                        trainers[model_type](X_train_p, y_train, X_test_p, y_test)
+                
+                del X_train_p, X_test_p
+    
+    return {
+        'rows': n_rows,
+        'raw_frame_memory_mb': round(raw_frame_mb, 1),
+        'frame_memory_mb': round(frame_mb, 1),
+        **profiler.to_dict(),
+    }
+
+
+def matrix_memory_mb(matrix) -> float:
+    """Memory of a dense array or sparse matrix (MB)."""
+    from scipy import sparse
+    
+    if sparse.issparse(matrix):
+        nbytes = matrix.data.nbytes + matrix.indices.nbytes + matrix.indptr.nbytes
+    else:
+        nbytes = matrix.nbytes
+    return nbytes / 1024 / 1024
+
+
+def run_region_case(n_regions: int, n_rows: int, model_type: str, encoding: str, seed: int) -> dict:
+    """
+    Prepare and fit one model type with one store_region encoding.
+    
+    Executed in a child process (see main) so peak RSS is per case.
+    
+    Args:
+        n_regions: Distinct store regions in the synthetic frame
+        n_rows: Synthetic rows
+        model_type: 'ridge', 'xgboost' or 'random_forest'
+        encoding: Entry of REGION_ENCODINGS[model_type]
+        seed: Random seed for the synthetic frame
+        
+    Returns:
+        Matrix size, R² on the test split and StageProfiler report
+    """
+    from scipy import sparse
+    from sklearn.metrics import r2_score
+    
+    import train_model
+    from config import REGION_ENCODING_CONFIG, XGBOOST_DEFAULT_PARAMS, RANDOM_FOREST_PARAMS, RIDGE_PARAMS, CV_FOLDS
+    from preprocess import (
+        apply_dtype_schema, handle_missing_values, create_derived_features, split_data, prepare_data_for_model
+    )
+    from profiling import profiler
+    from synthetic import make_training_frame
+    
+    fit_fns = {
+        'xgboost': train_model.xgboost_fit_fn(XGBOOST_DEFAULT_PARAMS),
+        'random_forest': train_model.random_forest_fit_fn(RANDOM_FOREST_PARAMS),
+        'ridge': train_model.ridge_fit_fn(RIDGE_PARAMS),
+    }
+    if encoding != 'onehot':
+        # Only this child process sees the override
+        REGION_ENCODING_CONFIG['tree_encoding'] = encoding
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = apply_dtype_schema(make_training_frame(n_rows, seed=seed, n_regions=n_regions))
+        df = create_derived_features(handle_missing_values(df))
+        X_train, X_test, y_train, y_test = split_data(df, include_derived_features=True)
+        del df
+        
+        profiler.reset()
+        X_train_p, X_test_p, _, _, _ = prepare_data_for_model(X_train, X_test, model_type, y_train)
+        
+        train_idx, _ = train_model.time_series_splits(len(y_train), CV_FOLDS)[-1]
+        with profiler.stage('fit'):
+            model = fit_fns[model_type](X_train_p[train_idx], y_train.iloc[train_idx])
+        y_pred = train_model.clip_predictions(model.predict(X_test_p))
+    
+    stages = {s['name']: s for s in profiler.to_dict()['stages']}
+    return {
+        'regions': n_regions,
+        'rows': n_rows,
+        'model_type': model_type,
+        'encoding': encoding,
+        'columns': X_train_p.shape[1],
+        'sparse': sparse.issparse(X_train_p),
+        'matrix_memory_mb': round(matrix_memory_mb(X_train_p), 2),
+        'dense_memory_mb': round(X_train_p.shape[0] * X_train_p.shape[1] * 8 / 1024 / 1024, 2),
+        'prepare_wall_time_s': stages['prepare_data']['wall_time_s'],
+        'fit_wall_time_s': stages['fit']['wall_time_s'],
+        'wall_time_s': round(stages['prepare_data']['wall_time_s'] + stages['fit']['wall_time_s'], 4),
+        'peak_rss_mb': profiler.to_dict()['peak_rss_mb'],
+        'R2': round(float(r2_score(y_test, y_pred)), 4),
+    }
+
+
+def print_region_results(cases: list):
+    """Print the store_region encoding cases."""
+    print(f"\n  {'Regions':>7s} {'Model':14s} {'Encoding':9s} {'Columns':>8s} {'Matrix(MB)':>11s} "
+          f"{'Dense(MB)':>10s} {'Prep(s)':>8s} {'Fit(s)':>8s} {'PeakRSS(MB)':>12s} {'R²':>7s}")
+    for c in cases:
+        peak = f"{c['peak_rss_mb']:.1f}" if c['peak_rss_mb'] is not None else 'n/a'
+        print(f"  {c['regions']:7d} {c['model_type']:14s} {c['encoding']:9s} {c['columns']:8d} "
+              f"{c['matrix_memory_mb']:11.1f} {c['dense_memory_mb']:10.1f} {c['prepare_wall_time_s']:8.2f} "
+              f"{c['fit_wall_time_s']:8.2f} {peak:>12s} {c['R2']:7.4f}")
+
+
+def print_results(reports: list):
+    """Print per-size stage timings."""
+    for report in reports:
+        print(f"\n{report['rows']:,} rows "
+              f"(frame {report['raw_frame_memory_mb']:.1f} MB raw, {report['frame_memory_mb']:.1f} MB compact)")
+        print(f"  {'Stage':50s} {'Wall(s)':>9s} {'CPU(s)':>9s} {'PeakRSS(MB)':>12s} {'Growth(MB)':>11s}")
+        for s in report['stages']:
+            label = '  ' * s['depth'] + s['name'].split('/')[-1]
+            peak = f"{s['peak_rss_mb']:.1f}" if s['peak_rss_mb'] is not None else 'n/a'
+            growth = f"{s['peak_growth_mb']:+.1f}" if s['peak_growth_mb'] is not None else 'n/a'
+            print(f"  {label:50s} {s['wall_time_s']:9.2f} {s['cpu_time_s']:9.2f} {peak:>12s} {growth:>11s}")
+
+
+def run_region_benchmark(args):
+    """Benchmark the store_region encodings (--region-counts)."""
+    model_types = [m for m in args.model_types if m in REGION_ENCODINGS]
+    context = multiprocessing.get_context('spawn')
+    
+    cases = []
+    for n_regions in args.region_counts:
+        for model_type in model_types:
+            for encoding in REGION_ENCODINGS[model_type]:
+                print(f"\nRunning {n_regions:,} regions, {args.region_rows:,} rows ({model_type}, {encoding})...")
+                with context.Pool(1) as pool:
+                    cases.append(pool.apply(
+                        run_region_case, (n_regions, args.region_rows, model_type, encoding, args.seed)
+                    ))
+    
+    print_region_results(cases)
+    
+    results = {
+        'benchmark': 'region_encoding',
+        'environment': environment_info(),
+        'parameters': {
+            'region_counts': args.region_counts,
+            'rows': args.region_rows,
+            'model_types': model_types,
+            'seed': args.seed,
+        },
+        'cases': {f"{c['regions']}/{c['model_type']}/{c['encoding']}": c for c in cases},
+    }
+    write_results(results, Path(args.output or BENCHMARKS_DIR / 'region_encoding_benchmark.json'))
+    
+    if args.compare:
+        compare_results(results, Path(args.compare), metric='wall_time_s')
+
+
+def main():
+    """Main benchmark function."""
+    parser = argparse.ArgumentParser(description='Benchmark preprocessing and training')
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES,
+                        help='Synthetic data sizes (rows)')
+    parser.add_argument('--model-types', nargs='+', choices=MODEL_TYPES, default=MODEL_TYPES,
+                        help='Model types to train')
+    parser.add_argument('--seed', type=int, default=RANDOM_STATE, help='Synthetic data seed')
+    parser.add_argument('--region-counts', nargs='+', type=int,
+                        help=f'Benchmark the store_region encodings at these region counts '
+                             f'(e.g. {" ".join(map(str, DEFAULT_REGION_COUNTS))}) instead of --sizes')
+    parser.add_argument('--region-rows', type=int, default=DEFAULT_REGION_ROWS,
+                        help='Synthetic rows for --region-counts')
+    parser.add_argument('--output', type=str,
+                        help='Output JSON path (default: training_benchmark.json or '
+                             'region_encoding_benchmark.json in reports/benchmarks)')
+    parser.add_argument('--compare', type=str, help='Previous result JSON to compare against')
+    
+    args = parser.parse_args()
+    
+    print("=" * 60)
+    print("Training Benchmark")
+    print("=" * 60)
+    
+    if args.region_counts:
+        run_region_benchmark(args)
+        return
+    
+    reports = []
+    context = multiprocessing.get_context('spawn')
+    for n_rows in args.sizes:
+        print(f"\nRunning {n_rows:,} rows ({', '.join(args.model_types)})...")
+        with context.Pool(1) as pool:
+            reports.append(pool.apply(run_size, (n_rows, args.model_types, args.seed)))
+    
+    print_results(reports)
+    
+    # Flat case map (size/stage -> record) for compare_results
+    cases = {
+        f"{report['rows']}/{stage['name']}": stage
+        for report in reports
+        for stage in report['stages']
+    }
+    
+    results = {
+        'benchmark': 'training',
+        'environment': environment_info(),
+        'parameters': {
+            'sizes': args.sizes,
+            'model_types': args.model_types,
+            'seed': args.seed,
+        },
+        'sizes': reports,
+        'cases': cases,
+    }
+    write_results(results, Path(args.output or BENCHMARKS_DIR / 'training_benchmark.json'))
+    
+    if args.compare:
+        compare_results(results, Path(args.compare), metric='wall_time_s')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Benchmark Utilities
+===================
+
+Shared timing, allocation and result-file helpers for the benchmark
+harnesses (benchmark_predict.py, benchmark_training.py).
+"""
+
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+
+# Benchmarks never touch the database, but config.py requires the variable
+os.environ.setdefault('DATABASE_URL', 'postgresql://benchmark@localhost/offline')
+
+from config import ML_DIR, REPORTS_DIR
+
+BENCHMARKS_DIR = REPORTS_DIR / 'benchmarks'
+
+
+def environment_info() -> Dict:
+    """Git commit, interpreter and library versions for a benchmark run."""
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=ML_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    
+    versions = {}
+    for module in ['numpy', 'pandas', 'sklearn', 'lightgbm', 'catboost', 'xgboost', 'flask']:
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    
+    return {
+        'git_commit': commit,
+        'timestamp': datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'libraries': versions,
+    }
+
+
+def latency_stats(samples_s: List[float], items_per_call: int = 1) -> Dict:
+    """
+    Summarize per-call latencies.
+    
+    Args:
+        samples_s: Per-call wall times in seconds
+        items_per_call: Rows processed per call (for row throughput)
+        
+    Returns:
+        Dictionary with mean/p50/p95/p99 (ms) and throughput
+    """
+    samples = np.asarray(samples_s, dtype=float)
+    total = samples.sum()
+    
+    return {
+        'calls': int(len(samples)),
+        'items_per_call': items_per_call,
+        'mean_ms': float(samples.mean() * 1000),
+        'p50_ms': float(np.percentile(samples, 50) * 1000),
+        'p95_ms': float(np.percentile(samples, 95) * 1000),
+        'p99_ms': float(np.percentile(samples, 99) * 1000),
+        'calls_per_s': float(len(samples) / total) if total > 0 else None,
+        'items_per_s': float(len(samples) * items_per_call / total) if total > 0 else None,
+    }
+
+
+def measure_latency(fn: Callable, iterations: int, warmup: int = 10, items_per_call: int = 1) -> Dict:
+    """
+    Time repeated calls of fn().
+    
+    Args:
+        fn: Zero-argument callable to benchmark
+        iterations: Timed calls
+        warmup: Untimed calls before measuring
+        items_per_call: Rows processed per call
+        
+    Returns:
+        Latency statistics (see latency_stats)
+    """
+    for _ in range(warmup):
+        fn()
+    
+    samples = []
+    gc.collect()
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    
+    return latency_stats(samples, items_per_call)
+
+
+def measure_allocations(fn: Callable, calls: int = 20) -> Dict:
+    """
+    Measure Python heap allocations of fn() with tracemalloc.
+    
+    Run separately from the latency measurement since tracing slows
+    allocation-heavy code down considerably.
+    
+    Args:
+        fn: Zero-argument callable
+        calls: Number of traced calls
+        
+    Returns:
+        Dictionary with peak traced KB per call and net retained blocks per call
+    """
+    fn()  # warm caches/lazy imports outside of the trace
+    gc.collect()
+    
+    tracemalloc.start()
+    peaks = []
+    blocks_before = sys.getallocatedblocks()
+    try:
+        for _ in range(calls):
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - base)
+    finally:
+        tracemalloc.stop()
+    blocks_after = sys.getallocatedblocks()
+    
+    return {
+        'alloc_peak_kb_per_call': float(np.median(peaks) / 1024),
+        'retained_blocks_per_call': float((blocks_after - blocks_before) / calls),
+    }
+
+
+def write_results(results: Dict, output_path: Path) -> Path:
+    """Write benchmark results as JSON."""
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    
+    print(f"\n✓ Saved benchmark results to {output_path}")
+    return output_path
+
+
+def compare_results(current: Dict, baseline_path: Path, metric: str = 'p50_ms'):
+    """
+    Print relative changes of one latency metric against a previous run.
+    
+    Both result files share the layout {'cases': {name: {metric: value}}}.
+    
+    Args:
+        current: Results of this run
+        baseline_path: JSON file from a previous run (e.g. another commit)
+        metric: Metric key to compare
+    """
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    
+    print(f"\nComparison with {baseline_path} "
+          f"(commit {baseline.get('environment', {}).get('git_commit')}) - {metric}:")
+    
+    for name, case in current['cases'].items():
+        before = baseline.get('cases', {}).get(name, {}).get(metric)
+        after = case.get(metric)
+        if before is None or after is None:
+            print(f"  {name:45s} {'n/a':>10s}")
+            continue
+        
+        change = (after - before) / before * 100 if before else 0.0
+        print(f"  {name:45s} {before:10.3f} → {after:10.3f}  ({change:+.1f}%)")
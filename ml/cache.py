@@ -0,0 +1,109 @@
+"""
+API Caches
+==========
+
+Bounded in-process cache for the prediction API: full /predict
+responses, keyed by a canonical hash of the features the response
+depends on and the model version. (Store statistics come from store_stats.StoreStatsSnapshot.)
+
+Caches are per process (one per Gunicorn worker). Lookups are counted in
+the ml_cache_requests_total metric.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional
+
+from metrics import record_cache_lookup
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache with a maximum size and optional entry TTL.
+    
+    The least recently used entry is evicted when the cache is full;
+    entries older than `ttl` seconds are treated as missing.
+    """
+    
+    def __init__(self, name: str, maxsize: int, ttl: Optional[float] = None):
+        """
+        Initialize cache.
+        
+        Args:
+            name: Cache name (metric label)
+            maxsize: Maximum number of entries (0 disables the cache)
+            ttl: Entry lifetime in seconds (None = no expiry)
+        """
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key (or default), counting hit/miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at is not None and time.monotonic() >= expires_at:
+                    del self._entries[key]
+                    entry = None
+                else:
+                    self._entries.move_to_end(key)
+        
+        record_cache_lookup(self.name, entry is not None)
+        return value if entry is not None else default
+    
+    def set(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry if full."""
+        if self.maxsize <= 0:
+            return
+        
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def feature_cache_key(features: Dict, model_version: str, names: Iterable[str]) -> str:
+    """
+    Canonical hash of the features a response depends on and the model version.
+    
+    Only `names` are part of the key: features nothing reads (e.g. the
+    registration minute of a model without it) would otherwise make
+    every request unique. A hit returns the prediction for exactly the
+    same model input.
+    
+    Args:
+        features: Final feature dictionary passed to the model
+        model_version: Version of the model producing the prediction
+        names: Features the response depends on (missing ones key as None)
+        
+    Returns:
+        Hex digest identifying the prediction input
+    """
+    canonical = json.dumps(
+        {
+            'model_version': model_version,
+            'features': {name: features.get(name) for name in names},
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+        separators=(',', ':'),
+        default=str,
+    )
+    return hashlib.sha1(canonical.encode('utf-8')).hexdigest()
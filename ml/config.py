@@ -94,6 +94,64 @@ DERIVED_FEATURES = [
     "price_ratio",                # discount_price / original_price
 ]
 
+# ============================================================
+# Column Schema (compact dtypes)
+# ============================================================
+
+# Fixed category lists (product_category ENUM and CHECK constraints)
+PRODUCT_CATEGORIES = ["빵", "도시락", "음료", "디저트", "과일", "채소", "정육", "수산물", "반찬", "기타"]
+DAYS_OF_WEEK = ["월", "화", "수", "목", "금", "토", "일"]
+TIME_SLOTS = ["아침", "점심", "오후", "저녁", "심야"]
+
+# Fill value for missing or unseen categorical values
+UNKNOWN_CATEGORY = "unknown"
+
+# Categorical columns -> fixed category list (UNKNOWN_CATEGORY is appended).
+# store_region is open-ended (extract_region() / regions.resolve_region()
+# output), so its categories are taken from the loaded data instead.
+CATEGORY_VALUES = {
+    "product_category": PRODUCT_CATEGORIES,
+    "register_day_of_week": DAYS_OF_WEEK,
+    "time_slot": TIME_SLOTS,
+    "store_region": None,
+}
+
+# Numeric/boolean column dtypes (ranges from prediction_training_data).
+# Integer columns containing NULLs are loaded as float32 until imputed.
+COLUMN_DTYPES = {
+    "product_register_hour": "int8",       # 0-23
+    "product_register_minute": "int8",     # 0-59
+    "original_price": "int32",
+    "discount_price": "int32",
+    "discount_rate": "float32",
+    "product_quantity": "int32",
+    "deadline_hours_remaining": "float32",
+    "store_avg_rating": "float32",
+    "store_total_reviews": "int32",
+    "store_total_sales": "int32",
+    "weather_temperature": "float32",
+    "distance_from_station": "float32",
+    "is_holiday": "bool",
+    "is_weekend": "bool",
+    TARGET: "float32",
+    **{feature: "float32" for feature in DERIVED_FEATURES},
+}
+
+# ============================================================
+# Region Encoding
+# ============================================================
+
+# store_region gets one category per 구/시 and grows with every new city.
+# Ridge always reads it as sparse one-hot columns (the preprocessor output
+# is a CSR matrix); XGBoost/RF read it as an ordinal code, or with 'target'
+# as the smoothed mean sell-through of the region (one float column whatever
+# the region count, ordered by effect instead of by name; training rows are
+# encoded from earlier rows only, see preprocess.OrderedTargetEncoder)
+REGION_ENCODING_CONFIG = {
+    "tree_encoding": "ordinal",  # 'ordinal' or 'target'
+    "target_smooth": 10,         # Pseudo-rows shrinking rare regions towards the global mean
+}
+
 # ============================================================
 # Performance Thresholds
 # ============================================================
@@ -128,6 +186,38 @@ TRAIN_TEST_CONFIG = {
 # Cross-validation
 CV_FOLDS = 5
 
+# Booster early stopping: monitored on the newest rows of each fit's own
+# training rows, never on the CV validation block (which is only scored)
+EARLY_STOPPING_CONFIG = {
+    "validation_fraction": 0.1,
+    "stopping_rounds": 50,
+}
+
+# ============================================================
+# Feature Selection (see feature_selection.py)
+# ============================================================
+
+FEATURE_SELECTION_CONFIG = {
+    "enabled": True,
+    "min_rows": 1000,               # Smaller datasets keep every feature
+    "validation_fraction": 0.2,     # Newest training rows used to score features
+    "n_repeats": 3,                 # Permutations per feature
+    "min_importance": 0.002,        # Features whose permutation R² drop is below this are dropped...
+    "max_r2_drop": 0.002,           # ...unless the refitted probe loses more validation R² than this
+    "min_features": 5,              # Never select fewer features
+    "random_state": 42,
+    # Probe model the importances are measured on
+    "params": {
+        "n_estimators": 200,
+        "max_depth": 6,
+        "learning_rate": 0.05,
+        "num_leaves": 31,
+        "min_child_samples": 20,
+        "random_state": 42,
+        "verbose": -1,
+    },
+}
+
 # ============================================================
 # Model Hyperparameter Grids
 # ============================================================
@@ -156,6 +246,60 @@ LIGHTGBM_DEFAULT_PARAMS = {
     "verbose": -1,
 }
 
+# Prediction interval models (quantile LightGBM, see intervals.py)
+INTERVAL_CONFIG = {
+    "enabled": True,
+    "lower_alpha": 0.1,             # 80% interval
+    "upper_alpha": 0.9,
+    "calibration_fraction": 0.2,    # Newest training rows used for the conformal margin
+    "latency_budget_ms": 3.0,       # Allowed extra p95 model_inference time (benchmark_predict.py)
+    # Served model types with intervals: their quantile boosters read the model's
+    # own input. CatBoost would need a second input matrix per request (over budget)
+    "model_types": ["lightgbm", "xgboost", "random_forest", "ridge"],
+    "params": {
+        "n_estimators": 200,
+        "max_depth": 6,
+        "learning_rate": 0.05,
+        "num_leaves": 31,
+        "min_child_samples": 20,
+        "random_state": 42,
+        "verbose": -1,
+    },
+}
+
+# Distilled student model served instead of the selected (teacher) model
+# (shallow LightGBM fitted to the teacher's predictions, see distill.py)
+DISTILL_CONFIG = {
+    "enabled": True,
+    "serve_student": True,          # False: the API serves the teacher
+    "perturbed_copies": 2,          # Perturbed copies of the training rows labelled by the teacher
+    "noise_scale": 0.1,             # Gaussian noise, × column std
+    # Perturbed columns; prices are re-derived from the perturbed discount_rate
+    "noise_features": [
+        "discount_rate",
+        "product_quantity",
+        "deadline_hours_remaining",
+        "store_avg_rating",
+        "store_total_reviews",
+        "store_total_sales",
+    ],
+    "swap_probability": 0.1,        # Chance a categorical value is replaced by another row's
+    "swap_features": ["product_category", "store_region"],
+    "max_r2_drop": 0.01,            # Student is only served within this test R² of the teacher
+    "min_speedup": 1.5,             # ... and at least this much faster per single-row prediction
+    "latency_rows": 100,            # Single-row predictions timed for the report
+    "random_state": 42,
+    "params": {
+        "n_estimators": 300,
+        "max_depth": 6,
+        "learning_rate": 0.1,
+        "num_leaves": 31,
+        "min_child_samples": 20,
+        "random_state": 42,
+        "verbose": -1,
+    },
+}
+
 # CatBoost Hyperparameters (for Optuna tuning)
 CATBOOST_PARAM_GRID = {
     "iterations": (100, 1000),
@@ -229,6 +373,146 @@ OPTUNA_CONFIG = {
 MODEL_PATH = MODELS_DIR / "sell_through_model.pkl"
 PREPROCESSOR_PATH = MODELS_DIR / "preprocessor.pkl"
 METADATA_PATH = MODELS_DIR / "model_metadata.json"
+INTERVAL_MODEL_PATH = MODELS_DIR / "interval_model.pkl"  # Quantile models for prediction intervals
+STUDENT_MODEL_PATH = MODELS_DIR / "student_model.pkl"  # Distilled model served instead of the teacher
+TEST_SPLIT_PATH = MODELS_DIR / "test_split.arrow"  # Test rows the model was scored on (Arrow IPC)
+
+# Versioned models (see registry.py); the files above are only used when
+# no version has been activated yet
+REGISTRY_DIR = MODELS_DIR / "registry"
+ACTIVE_VERSION_PATH = REGISTRY_DIR / "ACTIVE"
+CANDIDATE_VERSION_PATH = REGISTRY_DIR / "CANDIDATE"  # shadow-scored version
+
+MODEL_REGISTRY_CONFIG = {
+    # Most recent non-active versions kept loaded in the API (instant rollback)
+    "preload_recent": 2,
+    # Seconds between checks of the ACTIVE pointer by running API servers
+    "active_check_interval": 10,
+    # Versions kept loaded per API worker; the least recently used ones
+    # (never the active or shadow candidate version) are unloaded beyond it
+    "max_loaded_versions": 5,
+}
+
+# ============================================================
+# API Cache Configuration
+# ============================================================
+
+API_CACHE_CONFIG = {
+    # /predict responses keyed by the features they depend on + model version
+    "prediction_cache_size": 10000,
+    "prediction_cache_ttl": 3600,        # seconds
+    # Share of hits when a listing is re-submitted every minute for an
+    # hour (benchmark_predict.py)
+    "min_hit_rate": 0.9,
+}
+
+# In-memory snapshot of ml_store_stats (see store_stats.py)
+STORE_STATS_CONFIG = {
+    "refresh_interval": 60,              # seconds between incremental refreshes
+    "refresh_overlap": 30,               # seconds re-read before the last updated_at
+}
+
+# Shadow scoring of the candidate model (see shadow.py)
+SHADOW_CONFIG = {
+    "queue_size": 1000,     # Pending requests; further requests skip shadow scoring
+    "batch_size": 100,      # Requests predicted per batch
+    "flush_interval": 5.0,  # Seconds before a partial batch is scored
+}
+
+# Asynchronous prediction_logs writes from the API (see prediction_log.py)
+PREDICTION_LOG_CONFIG = {
+    "enabled": True,
+    "queue_size": 10000,    # Pending rows; further rows are dropped (and counted)
+    "batch_size": 500,      # Rows per multi-row INSERT
+    "flush_interval": 2.0,  # Seconds before a partial batch is written
+}
+
+# Per-prediction explanations in /predict `factors` (see explain.py)
+EXPLAIN_CONFIG = {
+    "enabled": True,
+    "top_n": 3,                    # Factors returned per prediction
+    "neutral_threshold": 0.01,     # |contribution| below this is 'neutral'
+    # XGBoost/LightGBM approximate (path) contributions: exact TreeSHAP
+    # costs ~1 ms per fold model for a single row
+    "approximate": True,
+    "latency_budget_ms": 5.0,      # Allowed extra p95 model_inference time (benchmark_predict.py)
+}
+
+# Feature -> (factor name, value template). Templates are format strings
+# over `value`, or {True: ..., False: ...} for boolean features.
+FEATURE_DISPLAY = {
+    "product_register_hour": ("등록 시각", "{value:.0f}시 등록"),
+    "product_register_minute": ("등록 시각", "{value:.0f}분 등록"),
+    "original_price": ("정가", "정가 {value:,.0f}원"),
+    "discount_price": ("할인가", "할인가 {value:,.0f}원"),
+    "discount_rate": ("할인율", "{value:.0f}% 할인"),
+    "product_quantity": ("수량", "{value:.0f}개 등록"),
+    "deadline_hours_remaining": ("마감 시간", "마감까지 {value:.1f}시간"),
+    "store_avg_rating": ("가게 평점", "평점 {value:.1f}"),
+    "store_total_reviews": ("리뷰 수", "리뷰 {value:,.0f}개"),
+    "store_total_sales": ("누적 판매", "누적 판매 {value:,.0f}건"),
+    "product_category": ("카테고리", "{value}"),
+    "register_day_of_week": ("요일", "{value}요일"),
+    "store_region": ("지역", "{value}"),
+    "time_slot": ("시간대", "{value} 시간대"),
+    "is_holiday": ("공휴일", {True: "공휴일", False: "공휴일 아님"}),
+    "is_weekend": ("주말", {True: "주말", False: "평일"}),
+    "store_avg_sell_through": ("가게 평균 소진율", "가게 평균 {value:.0%}"),
+    "category_avg_sell_through": ("카테고리 평균 소진율", "카테고리 평균 {value:.0%}"),
+    "dow_avg_sell_through": ("요일 평균 소진율", "요일 평균 {value:.0%}"),
+    "price_ratio": ("가격 비율", "정가 대비 {value:.0%}"),
+}
+
+# What-if price/quantity search behind /optimize (see optimize.py)
+OPTIMIZE_CONFIG = {
+    "discount_rate_min": 10,       # % (candidate discount rates)
+    "discount_rate_max": 70,
+    "discount_rate_step": 2.5,
+    "quantity_factors": [0.5, 0.6, 0.7, 0.8, 0.9, 1.0, 1.1, 1.2, 1.3, 1.4, 1.5],  # × current quantity
+    "price_unit": 100,             # Candidate prices are rounded to this (원)
+    "max_candidates": 1000,        # Larger grids are rejected (400)
+    "top_n": 5,                    # Candidates returned besides the best one
+    "latency_budget_ms": 50.0,     # p95 target for a default grid (benchmark_predict.py)
+    # Model types that score a default grid within the budget themselves;
+    # others (Random Forest) are optimized with their distilled student, or
+    # /optimize answers 501 when they have none
+    "model_types": ["lightgbm", "catboost", "xgboost", "ridge"],
+}
+
+# ============================================================
+# Batch Scoring Configuration
+# ============================================================
+
+BATCH_SCORING_CONFIG = {
+    "chunk_size": 5000,   # Products streamed and scored per chunk
+    "page_size": 1000,    # Rows per INSERT statement (execute_values)
+}
+
+# ============================================================
+# Learning Curve Configuration (evaluate.py --learning-curve)
+# ============================================================
+
+LEARNING_CURVE_CONFIG = {
+    "train_sizes": [0.1, 0.25, 0.5, 1.0],  # Fractions of each fold's training window
+    "cv_folds": 3,                          # Expanding-window folds
+    "max_train_rows": 50000,                # Larger subsets are evenly thinned
+    "staged_checkpoints": 10,               # Boosting iterations scored per fit
+    "core_budget": None,                    # Max CPU cores (None: all)
+}
+
+# ============================================================
+# Drift Monitoring Configuration (evaluate.py --drift)
+# ============================================================
+
+DRIFT_CONFIG = {
+    "window_days": 7,                  # Rolling window for errors and PSI
+    "settle_seconds": 60,              # Rows younger than this wait for the next run
+    "fetch_size": 5000,                # prediction_logs rows read per chunk
+    "psi_bins": 10,                    # Quantile bins per continuous feature
+    "psi_floor": 1e-4,                 # Minimum bin proportion (empty bins)
+    "psi_thresholds": (0.1, 0.25),     # moderate / significant drift
+    "min_samples": 30,                 # Segments with fewer results are flagged
+}
 
 # ============================================================
 # Report Paths
@@ -239,6 +523,11 @@ FEATURE_IMPORTANCE_PATH = REPORTS_DIR / "feature_importance.png"
 ACTUAL_VS_PREDICTED_PATH = REPORTS_DIR / "actual_vs_predicted.png"
 RESIDUAL_DISTRIBUTION_PATH = REPORTS_DIR / "residual_distribution.png"
 LEARNING_CURVE_PATH = REPORTS_DIR / "learning_curve.png"
+LEARNING_CURVE_CACHE_PATH = REPORTS_DIR / "learning_curve.json"  # unversioned models (registry versions: in their directory)
+TRAINING_PROFILE_PATH = REPORTS_DIR / "training_profile.json"
+PROFILES_DIR = REPORTS_DIR / "profiles"  # cProfile dumps (train_model.py --profile)
+DRIFT_STATE_PATH = REPORTS_DIR / "drift_state.json"    # watermarks + running aggregates
+DRIFT_REPORT_PATH = REPORTS_DIR / "drift_report.json"
 
 # ============================================================
 # Plotting Configuration
@@ -248,6 +537,10 @@ PLOT_CONFIG = {
     "figsize": (10, 6),
     "dpi": 100,
     "style": "seaborn-v0_8-darkgrid",
+    "workers": None,                 # Plot worker processes (None: CPU count, 1: inline)
+    "scatter_max_points": 20000,     # Larger inputs are drawn as a hexbin density
+    "density_max_points": 1000000,   # Points sampled for actual-vs-predicted / residual plots
+    "hexbin_gridsize": 60,
 }
 
 # ============================================================
@@ -0,0 +1,235 @@
+"""
+Model Distillation
+==================
+
+A shallow LightGBM "student" fitted to the predictions of the selected
+model (the teacher: a fold ensemble of up to 5 × 1000 deep trees) so the
+API can serve a much cheaper model.
+
+The student is trained on the teacher's predictions, not on the observed
+targets: over the training rows plus perturbed copies of them (noise on
+continuous features, swapped categorical values), which shows it how the
+teacher behaves between the observed rows. It is saved with the version
+(student_model.pkl) only if its test R² is within
+DISTILL_CONFIG['max_r2_drop'] of the teacher's and it is at least
+DISTILL_CONFIG['min_speedup'] times faster; otherwise the teacher keeps
+serving (a small teacher, e.g. a LightGBM ensemble with early-stopped
+trees, gains little: single-row latency is mostly input conversion). The
+teacher stays in the version either way (batch scoring, fallback with
+DISTILL_CONFIG['serve_student'] = False).
+"""
+
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.metrics import r2_score, mean_squared_error
+
+from config import DISTILL_CONFIG, CATEGORICAL_FEATURES
+from ensemble import ensemble_members, lightgbm_predict
+from preprocess import lightgbm_categories, lightgbm_matrix
+
+
+def perturb_rows(X: pd.DataFrame, copies: int = DISTILL_CONFIG['perturbed_copies'],
+                 seed: int = DISTILL_CONFIG['random_state']) -> pd.DataFrame:
+    """
+    Perturbed copies of feature rows (the teacher labels them).
+    
+    Continuous DISTILL_CONFIG['noise_features'] get Gaussian noise scaled
+    by the column std (clipped to the observed range); discount_price and
+    price_ratio are re-derived from the perturbed discount_rate so the
+    price features stay consistent. Values of DISTILL_CONFIG['swap_features']
+    are replaced by another row's value with DISTILL_CONFIG['swap_probability'].
+    
+    Args:
+        X: Feature rows (training frame)
+        copies: Number of perturbed copies
+        seed: Random seed
+    
+    Returns:
+        DataFrame with copies × len(X) rows and the columns/dtypes of X
+    """
+    rng = np.random.default_rng(seed)
+    n = len(X)
+    perturbed = []
+    
+    for _ in range(copies):
+        X_copy = X.copy()
+        
+        for col in DISTILL_CONFIG['noise_features']:
+            if col not in X_copy.columns:
+                continue
+            values = X_copy[col].to_numpy(dtype=float, na_value=np.nan)
+            noisy = values + rng.normal(0, DISTILL_CONFIG['noise_scale'] * np.nanstd(values), n)
+            noisy = np.clip(noisy, np.nanmin(values), np.nanmax(values))
+            if pd.api.types.is_integer_dtype(X_copy[col].dtype):
+                noisy = np.round(noisy)
+            X_copy[col] = noisy.astype(X_copy[col].dtype)
+        
+        if {'original_price', 'discount_price', 'discount_rate'} <= set(X_copy.columns):
+            original_price = X_copy['original_price'].to_numpy(dtype=float)
+            discount_price = np.round(original_price * (1 - X_copy['discount_rate'].to_numpy(dtype=float) / 100))
+            X_copy['discount_price'] = discount_price.astype(X_copy['discount_price'].dtype)
+            if 'price_ratio' in X_copy.columns:
+                ratio = discount_price / np.where(original_price == 0, 1, original_price)
+                X_copy['price_ratio'] = ratio.astype(X_copy['price_ratio'].dtype)
+        
+        for col in DISTILL_CONFIG['swap_features']:
+            if col not in X_copy.columns:
+                continue
+            values = X_copy[col].to_numpy(dtype=object)
+            swap = rng.random(n) < DISTILL_CONFIG['swap_probability']
+            values[swap] = values[rng.integers(0, n, swap.sum())]
+            X_copy[col] = pd.Series(values, index=X_copy.index).astype(X_copy[col].dtype)
+        
+        perturbed.append(X_copy)
+    
+    return pd.concat(perturbed, ignore_index=True)
+
+
+def serving_predict_fn(model, model_type: str, preprocessor=None) -> Callable[[pd.DataFrame], np.ndarray]:
+    """
+    Raw predictions for training-format feature rows, computed the way
+    SellThroughPredictor serves the model (input conversion included).
+    
+    Args:
+        model: Fitted model or FoldEnsemble
+        model_type: Model type
+        preprocessor: Fitted preprocessor (XGBoost, RF, Ridge)
+    
+    Returns:
+        Function of a feature DataFrame
+    """
+    if preprocessor is not None:
+        return lambda X: model.predict(preprocessor.transform(X))
+    if model_type == 'lightgbm':
+        categories = lightgbm_categories(ensemble_members(model)[0][0])
+        return lambda X: lightgbm_predict(model, lightgbm_matrix(X, categories))
+    return model.predict
+
+
+def count_trees(model) -> int:
+    """Number of trees in a model or FoldEnsemble (0 for linear models)."""
+    total = 0
+    for member in ensemble_members(model)[0]:
+        if hasattr(member, 'booster_'):
+            total += member.booster_.num_trees()
+        elif hasattr(member, 'get_booster'):
+            # XGBoost predicts with the trees up to the best iteration
+            best_iteration = getattr(member, 'best_iteration', None)
+            rounds = member.get_booster().num_boosted_rounds()
+            total += best_iteration + 1 if best_iteration is not None else rounds
+        elif hasattr(member, 'tree_count_'):
+            total += member.tree_count_
+        elif hasattr(member, 'estimators_'):
+            total += len(member.estimators_)
+    return total
+
+
+def single_row_latency_ms(predict_fn: Callable, X: pd.DataFrame,
+                          n_rows: int = DISTILL_CONFIG['latency_rows']) -> float:
+    """Median latency (ms) of predict_fn over single-row frames from X."""
+    rows = [X.iloc[[i]] for i in range(min(n_rows, len(X)))]
+    predict_fn(rows[0])  # warm-up
+    
+    timings = []
+    for row in rows:
+        start = time.perf_counter()
+        predict_fn(row)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings) * 1000)
+
+
+def _scores(y_true, y_pred: np.ndarray) -> Dict:
+    y_pred = np.clip(y_pred, 0, 1)
+    return {
+        'R2': float(r2_score(y_true, y_pred)),
+        'RMSE': float(np.sqrt(mean_squared_error(y_true, y_pred))),
+    }
+
+
+def fit_student(X: pd.DataFrame, y: np.ndarray) -> lgb.LGBMRegressor:
+    """
+    Fit the student on teacher predictions.
+    
+    Args:
+        X: Feature rows (training and perturbed rows)
+        y: Teacher predictions for X
+    
+    Returns:
+        Fitted LGBMRegressor
+    """
+    to_convert = {
+        col: 'category' for col in CATEGORICAL_FEATURES
+        if col in X.columns and not isinstance(X[col].dtype, pd.CategoricalDtype)
+    }
+    X = X.astype(to_convert) if to_convert else X
+    
+    student = lgb.LGBMRegressor(**DISTILL_CONFIG['params'])
+    student.fit(X, y)
+    return student
+
+
+def distill_model(model, model_type: str, preprocessor, X_train: pd.DataFrame, X_test: pd.DataFrame,
+                  y_test: pd.Series) -> Tuple[Optional[lgb.LGBMRegressor], Dict]:
+    """
+    Train a student for the teacher model and decide whether to serve it.
+    
+    Args:
+        model: Teacher (selected model)
+        model_type: Teacher model type
+        preprocessor: Teacher preprocessor (or None)
+        X_train: Training features (as returned by load_and_preprocess_data)
+        X_test: Test features
+        y_test: Test target
+    
+    Returns:
+        (student, or None when it did not pass the accuracy/latency check,
+        report with teacher/student accuracy, size and latency)
+    """
+    print("\nDistilling student model...")
+    teacher_fn = serving_predict_fn(model, model_type, preprocessor)
+    
+    X_student = pd.concat([X_train, perturb_rows(X_train)], ignore_index=True)
+    student = fit_student(X_student, np.clip(teacher_fn(X_student), 0, 1))
+    student_fn = serving_predict_fn(student, 'lightgbm')
+    
+    teacher_test = np.clip(teacher_fn(X_test), 0, 1)
+    student_test = np.clip(student_fn(X_test), 0, 1)
+    
+    report = {
+        'training_rows': len(X_student),
+        'fidelity_R2': float(r2_score(teacher_test, student_test)),
+        'teacher': {
+            'model_type': model_type,
+            **_scores(y_test, teacher_test),
+            'trees': count_trees(model),
+            'latency_ms': single_row_latency_ms(teacher_fn, X_test),
+        },
+        'student': {
+            'model_type': 'lightgbm',
+            **_scores(y_test, student_test),
+            'trees': count_trees(student),
+            'latency_ms': single_row_latency_ms(student_fn, X_test),
+        },
+    }
+    teacher, distilled = report['teacher'], report['student']
+    r2_drop = teacher['R2'] - distilled['R2']
+    speedup = teacher['latency_ms'] / distilled['latency_ms']
+    report['speedup'] = float(speedup)
+    report['served'] = bool(
+        r2_drop <= DISTILL_CONFIG['max_r2_drop'] and speedup >= DISTILL_CONFIG['min_speedup']
+    )
+    
+    print(f"  Teacher: R² {teacher['R2']:.4f}, {teacher['trees']} trees, {teacher['latency_ms']:.2f} ms/row")
+    print(f"  Student: R² {distilled['R2']:.4f}, {distilled['trees']} trees, {distilled['latency_ms']:.2f} ms/row "
+          f"(fidelity R² {report['fidelity_R2']:.4f}, {speedup:.1f}× faster)")
+    if report['served']:
+        print(f"  ✓ Student will be served (R² drop {r2_drop:+.4f} <= {DISTILL_CONFIG['max_r2_drop']})")
+        return student, report
+    
+    print(f"  ⚠️  Student not served (R² drop {r2_drop:+.4f}, max {DISTILL_CONFIG['max_r2_drop']}; "
+          f"{speedup:.1f}× faster, min {DISTILL_CONFIG['min_speedup']}×) - the teacher is served")
+    return None, report
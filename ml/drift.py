@@ -0,0 +1,416 @@
+"""
+Drift Monitoring
+================
+
+Rolling prediction error and feature drift from prediction_logs, updated
+incrementally so the check can run every few minutes:
+
+- Only rows added since the previous run are read (watermark on
+  (timestamp, id), persisted in DRIFT_STATE_PATH)
+- New rows are folded into per-day running aggregates (count, sum of
+  absolute / squared errors; feature histogram counts); days outside the
+  rolling window are dropped
+- MAE/RMSE per product category, region and time slot, and the PSI of
+  each feature against the training profile of the model version that
+  served the prediction, are computed from the aggregates alone
+
+Errors use rows whose actual result has been recorded by the
+update_prediction_actual_result trigger; feature drift uses every served
+(non-shadow) prediction.
+
+Usage:
+    python evaluate.py --drift
+    python evaluate.py --drift --reset
+"""
+
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+import psycopg2
+
+from config import (
+    DATABASE_URL,
+    DRIFT_CONFIG,
+    DRIFT_STATE_PATH,
+    DRIFT_REPORT_PATH,
+    CONTINUOUS_FEATURES,
+    CATEGORICAL_FEATURES,
+    BOOLEAN_FEATURES,
+    UNKNOWN_CATEGORY,
+)
+from registry import is_registered, version_paths
+
+# Error breakdowns ('overall' has the single value 'all')
+ERROR_DIMENSIONS = ['overall', 'model_version', 'product_category', 'store_region', 'time_slot']
+
+# (timestamp, id) before any row
+INITIAL_WATERMARK = ['-infinity', '00000000-0000-0000-0000-000000000000']
+
+# Rows with a recorded actual result, after the watermark
+ERRORS_QUERY = """
+SELECT
+    id::TEXT AS id,
+    actual_recorded_at AS ts,
+    model_version,
+    COALESCE(features->>'product_category', %(unknown)s) AS product_category,
+    COALESCE(features->>'store_region', %(unknown)s) AS store_region,
+    COALESCE(features->>'time_slot', %(unknown)s) AS time_slot,
+    predicted_sell_through::FLOAT8 AS predicted,
+    actual_sell_through::FLOAT8 AS actual
+FROM prediction_logs
+WHERE NOT is_shadow
+  AND actual_recorded_at IS NOT NULL
+  AND (actual_recorded_at, id) > (%(ts)s::TIMESTAMPTZ, %(id)s::UUID)
+  AND actual_recorded_at >= now() - make_interval(days => %(window_days)s)
+  AND actual_recorded_at < now() - make_interval(secs => %(settle_seconds)s)
+ORDER BY actual_recorded_at, id
+"""
+
+# Served predictions (feature values), after the watermark
+FEATURES_QUERY = """
+SELECT
+    id::TEXT AS id,
+    predicted_at AS ts,
+    model_version,
+    features
+FROM prediction_logs
+WHERE NOT is_shadow
+  AND features IS NOT NULL
+  AND (predicted_at, id) > (%(ts)s::TIMESTAMPTZ, %(id)s::UUID)
+  AND predicted_at >= now() - make_interval(days => %(window_days)s)
+  AND predicted_at < now() - make_interval(secs => %(settle_seconds)s)
+ORDER BY predicted_at, id
+"""
+
+
+def build_feature_profile(X: pd.DataFrame, bins: int = DRIFT_CONFIG['psi_bins']) -> Dict:
+    """
+    Feature distribution of the training data (reference for PSI).
+    
+    Args:
+        X: Training features (before encoding)
+        bins: Quantile bins per continuous feature
+    
+    Returns:
+        {'numeric': {feature: {'edges', 'proportions'}},
+         'categorical': {feature: {value: proportion}}}
+    """
+    profile = {'numeric': {}, 'categorical': {}}
+    
+    for feature in CONTINUOUS_FEATURES:
+        if feature not in X.columns:
+            continue
+        values = X[feature].dropna().to_numpy(dtype=np.float64)
+        if len(values) == 0:
+            continue
+        # Interior quantile edges; value v falls into bin searchsorted(edges, v, 'right')
+        edges = np.unique(np.quantile(values, np.linspace(0, 1, bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, values, side='right'), minlength=len(edges) + 1)
+        profile['numeric'][feature] = {
+            'edges': edges.tolist(),
+            'proportions': (counts / counts.sum()).tolist(),
+        }
+    
+    for feature in CATEGORICAL_FEATURES + BOOLEAN_FEATURES:
+        if feature not in X.columns:
+            continue
+        values = X[feature].astype(object).where(X[feature].notna(), UNKNOWN_CATEGORY).astype(str)
+        profile['categorical'][feature] = values.value_counts(normalize=True).to_dict()
+    
+    return profile
+
+
+def population_stability_index(expected: Dict[str, float], actual_counts: Dict[str, int]) -> float:
+    """
+    PSI between reference proportions and observed counts.
+    
+    Bins missing on either side get a small floor proportion instead of 0.
+    """
+    keys = set(expected) | set(actual_counts)
+    total = sum(actual_counts.values())
+    floor = DRIFT_CONFIG['psi_floor']
+    
+    e = np.array([max(expected.get(key, 0.0), floor) for key in keys])
+    a = np.array([max(actual_counts.get(key, 0) / total, floor) for key in keys])
+    return float(np.sum((a - e) * np.log(a / e)))
+
+
+def psi_status(psi: float) -> str:
+    """stable / moderate / significant (DRIFT_CONFIG['psi_thresholds'])."""
+    moderate, significant = DRIFT_CONFIG['psi_thresholds']
+    if psi >= significant:
+        return 'significant'
+    if psi >= moderate:
+        return 'moderate'
+    return 'stable'
+
+
+class DriftMonitor:
+    """
+    Incremental error / feature drift aggregates over prediction_logs.
+    """
+    
+    def __init__(
+        self,
+        database_url: str = DATABASE_URL,
+        state_path: Path = DRIFT_STATE_PATH,
+        window_days: int = DRIFT_CONFIG['window_days'],
+    ):
+        """
+        Initialize monitor and load the persisted state.
+        
+        Args:
+            database_url: PostgreSQL connection string
+            state_path: JSON file with watermarks and running aggregates
+            window_days: Rolling window (days, including today)
+        """
+        self.database_url = database_url
+        self.state_path = Path(state_path)
+        self.window_days = window_days
+        self._profiles: Dict[str, Optional[Dict]] = {}
+        self.state = self._load_state()
+    
+    def _load_state(self) -> Dict:
+        if self.state_path.exists():
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        return {
+            'errors_watermark': INITIAL_WATERMARK,
+            'features_watermark': INITIAL_WATERMARK,
+            'errors': {},
+            'features': {},
+        }
+    
+    def save_state(self):
+        """Write the state atomically (file replace)."""
+        tmp_path = self.state_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+    
+    def profile(self, version: str) -> Optional[Dict]:
+        """Training feature profile of a model version (None if unavailable)."""
+        if version not in self._profiles:
+            profile = None
+            if is_registered(version):
+                with open(version_paths(version)[1], 'r') as f:
+                    profile = json.load(f).get('feature_profile')
+            self._profiles[version] = profile
+        return self._profiles[version]
+    
+    def _read_new_rows(self, conn, query: str, watermark_key: str) -> Iterator[pd.DataFrame]:
+        params = {
+            'ts': self.state[watermark_key][0],
+            'id': self.state[watermark_key][1],
+            'window_days': self.window_days,
+            'settle_seconds': DRIFT_CONFIG['settle_seconds'],
+            'unknown': UNKNOWN_CATEGORY,
+        }
+        fetch_size = DRIFT_CONFIG['fetch_size']
+        
+        # Named cursor: rows are streamed from the server chunk by chunk
+        with conn.cursor(name=f'drift_{watermark_key}') as cursor:
+            cursor.itersize = fetch_size
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                chunk = pd.DataFrame(rows, columns=[desc[0] for desc in cursor.description])
+                chunk['day'] = pd.to_datetime(chunk['ts'], utc=True).dt.strftime('%Y-%m-%d')
+                yield chunk
+                
+                last = chunk.iloc[-1]
+                self.state[watermark_key] = [pd.Timestamp(last['ts']).isoformat(), last['id']]
+    
+    def add_errors(self, chunk: pd.DataFrame):
+        """Fold rows with actual results into the per-day error aggregates."""
+        chunk = chunk.assign(
+            overall='all',
+            abs_error=(chunk['actual'] - chunk['predicted']).abs(),
+            squared_error=(chunk['actual'] - chunk['predicted']) ** 2,
+        )
+        for dimension in ERROR_DIMENSIONS:
+            grouped = chunk.groupby(['day', dimension]).agg(
+                n=('abs_error', 'size'),
+                abs_sum=('abs_error', 'sum'),
+                squared_sum=('squared_error', 'sum'),
+            )
+            for (day, value), row in grouped.iterrows():
+                bucket = self.state['errors'].setdefault(day, {}).setdefault(dimension, {})
+                n, abs_sum, squared_sum = bucket.get(value, (0, 0.0, 0.0))
+                bucket[value] = [n + int(row['n']), abs_sum + float(row['abs_sum']),
+                                 squared_sum + float(row['squared_sum'])]
+    
+    def add_features(self, chunk: pd.DataFrame):
+        """Fold served feature values into per-day histograms (training profile bins)."""
+        for (day, version), group in chunk.groupby(['day', 'model_version']):
+            profile = self.profile(version)
+            if profile is None:
+                continue
+            
+            values = pd.DataFrame(group['features'].tolist())
+            counts = self.state['features'].setdefault(day, {}).setdefault(version, {})
+            
+            for feature, reference in profile['numeric'].items():
+                if feature not in values.columns:
+                    continue
+                column = pd.to_numeric(values[feature], errors='coerce').dropna().to_numpy(dtype=np.float64)
+                bins = np.bincount(np.searchsorted(reference['edges'], column, side='right'),
+                                   minlength=len(reference['proportions']))
+                histogram = counts.setdefault(feature, {})
+                for index in np.flatnonzero(bins):
+                    histogram[str(index)] = histogram.get(str(index), 0) + int(bins[index])
+            
+            for feature in profile['categorical']:
+                if feature not in values.columns:
+                    continue
+                column = values[feature].where(values[feature].notna(), UNKNOWN_CATEGORY).astype(str)
+                histogram = counts.setdefault(feature, {})
+                for value, count in column.value_counts().items():
+                    histogram[value] = histogram.get(value, 0) + int(count)
+    
+    def _prune(self):
+        first_day = (datetime.now(timezone.utc) - timedelta(days=self.window_days - 1)).strftime('%Y-%m-%d')
+        for key in ('errors', 'features'):
+            self.state[key] = {day: bucket for day, bucket in self.state[key].items() if day >= first_day}
+    
+    def update(self) -> Dict[str, int]:
+        """
+        Read rows added since the last run and update the aggregates.
+        
+        Returns:
+            Number of new error / feature rows processed
+        """
+        processed = {'errors': 0, 'features': 0}
+        conn = psycopg2.connect(self.database_url)
+        try:
+            for chunk in self._read_new_rows(conn, ERRORS_QUERY, 'errors_watermark'):
+                self.add_errors(chunk)
+                processed['errors'] += len(chunk)
+            for chunk in self._read_new_rows(conn, FEATURES_QUERY, 'features_watermark'):
+                self.add_features(chunk)
+                processed['features'] += len(chunk)
+        finally:
+            conn.close()
+        
+        self._prune()
+        self.save_state()
+        return processed
+    
+    def error_report(self) -> Dict:
+        """MAE / RMSE per dimension value over the rolling window."""
+        totals: Dict[str, Dict[str, np.ndarray]] = {}
+        for bucket in self.state['errors'].values():
+            for dimension, values in bucket.items():
+                for value, aggregate in values.items():
+                    dimension_totals = totals.setdefault(dimension, {})
+                    dimension_totals[value] = dimension_totals.get(value, 0) + np.array(aggregate)
+        
+        report = {}
+        for dimension in ERROR_DIMENSIONS:
+            report[dimension] = {
+                value: {
+                    'n': int(n),
+                    'MAE': float(abs_sum / n),
+                    'RMSE': float(np.sqrt(squared_sum / n)),
+                }
+                for value, (n, abs_sum, squared_sum) in sorted(totals.get(dimension, {}).items())
+            }
+        return report
+    
+    def drift_report(self) -> Dict:
+        """PSI per model version and feature over the rolling window."""
+        totals: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for bucket in self.state['features'].values():
+            for version, features in bucket.items():
+                for feature, histogram in features.items():
+                    merged = totals.setdefault(version, {}).setdefault(feature, {})
+                    for key, count in histogram.items():
+                        merged[key] = merged.get(key, 0) + count
+        
+        report = {}
+        for version, features in totals.items():
+            profile = self.profile(version)
+            if profile is None:
+                continue
+            report[version] = {}
+            for feature, counts in features.items():
+                if feature in profile['numeric']:
+                    proportions = profile['numeric'][feature]['proportions']
+                    expected = {str(index): p for index, p in enumerate(proportions)}
+                else:
+                    expected = profile['categorical'][feature]
+                psi = population_stability_index(expected, counts)
+                report[version][feature] = {
+                    'n': sum(counts.values()),
+                    'PSI': psi,
+                    'status': psi_status(psi),
+                }
+        return report
+    
+    def report(self) -> Dict:
+        """Full drift report (also written to DRIFT_REPORT_PATH)."""
+        report = {
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'window_days': self.window_days,
+            'errors': self.error_report(),
+            'feature_drift': self.drift_report(),
+        }
+        with open(DRIFT_REPORT_PATH, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        return report
+
+
+def print_drift_report(report: Dict):
+    """Print error breakdowns and drifted features."""
+    min_samples = DRIFT_CONFIG['min_samples']
+    
+    print("\n" + "="*60)
+    print(f"PREDICTION ERROR (last {report['window_days']} days)")
+    print("="*60)
+    for dimension, values in report['errors'].items():
+        if not values:
+            continue
+        print(f"\n{dimension}:")
+        for value, stats in values.items():
+            note = "" if stats['n'] >= min_samples else "  (few samples)"
+            print(f"  {value:20s} n={stats['n']:6d}  MAE={stats['MAE']:.4f}  RMSE={stats['RMSE']:.4f}{note}")
+    
+    print("\n" + "="*60)
+    print("FEATURE DRIFT (PSI vs training data)")
+    print("="*60)
+    for version, features in report['feature_drift'].items():
+        print(f"\n{version}:")
+        for feature, stats in sorted(features.items(), key=lambda item: -item[1]['PSI']):
+            marker = {'stable': '✓', 'moderate': '⚠️', 'significant': '✗'}[stats['status']]
+            print(f"  {marker} {feature:28s} PSI={stats['PSI']:.4f}  n={stats['n']}  {stats['status']}")
+    
+    print(f"\n✓ Saved drift report to {DRIFT_REPORT_PATH}")
+
+
+def run_drift_check(reset: bool = False) -> Dict:
+    """
+    Update the aggregates with new prediction_logs rows and print the report.
+    
+    Args:
+        reset: Discard the persisted state and start from the rolling window
+    
+    Returns:
+        Drift report dictionary
+    """
+    if reset:
+        DRIFT_STATE_PATH.unlink(missing_ok=True)
+    
+    monitor = DriftMonitor()
+    processed = monitor.update()
+    print(f"✓ Processed {processed['errors']} new results, {processed['features']} new predictions")
+    
+    report = monitor.report()
+    print_drift_report(report)
+    return report
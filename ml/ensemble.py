@@ -0,0 +1,96 @@
+"""
+Fold Ensemble
+=============
+
+Averages the models fitted on each expanding-window cross-validation fold
+so they can be served as a single estimator, without a separate full refit.
+"""
+
+import numpy as np
+from typing import List, Optional, Tuple
+
+
+class FoldEnsemble:
+    """
+    Weighted average of the per-fold models from time-series cross-validation.
+    
+    Each member was trained on an expanding window of the (time-ordered)
+    training set, so members are weighted by the number of rows they saw.
+    Exposes the subset of the scikit-learn regressor interface used by the
+    pipeline (`predict`, `feature_importances_`).
+    """
+    
+    def __init__(self, models: List, weights: Optional[List[float]] = None):
+        """
+        Initialize ensemble.
+        
+        Args:
+            models: Fitted fold models (all of the same type)
+            weights: Relative weight per model (defaults to uniform)
+        """
+        if not models:
+            raise ValueError("FoldEnsemble requires at least one model")
+        
+        if weights is None:
+            weights = [1.0] * len(models)
+        
+        weights = np.asarray(weights, dtype=float)
+        self.models = list(models)
+        self.weights = weights / weights.sum()
+    
+    def __len__(self) -> int:
+        return len(self.models)
+    
+    def predict(self, X) -> np.ndarray:
+        """
+        Predict with every fold model and return the weighted average.
+        
+        Args:
+            X: Features in the format the member models were trained on
+            
+        Returns:
+            Averaged predictions
+        """
+        y_pred = np.zeros(X.shape[0], dtype=float)
+        for model, weight in zip(self.models, self.weights):
+            y_pred += weight * np.asarray(model.predict(X), dtype=float)
+        return y_pred
+    
+    @property
+    def feature_importances_(self) -> np.ndarray:
+        """Weighted average of the members' feature importances."""
+        importances = []
+        for model in self.models:
+            if hasattr(model, 'feature_importances_'):
+                importances.append(np.asarray(model.feature_importances_, dtype=float))
+            elif hasattr(model, 'get_feature_importance'):
+                # CatBoost
+                importances.append(np.asarray(model.get_feature_importance(), dtype=float))
+            else:
+                raise AttributeError("Member models do not expose feature importances")
+        
+        return np.average(np.vstack(importances), axis=0, weights=self.weights)
+
+
+def ensemble_members(model) -> Tuple[List, List[float]]:
+    """
+    Fitted models behind a model and their weights.
+    
+    Returns:
+        (fold models, weights) of a FoldEnsemble, ([model], [1.0]) otherwise
+    """
+    if isinstance(model, FoldEnsemble):
+        return model.models, list(model.weights)
+    return [model], [1.0]
+
+
+def lightgbm_predict(model, matrix: np.ndarray) -> np.ndarray:
+    """
+    Predictions of a LightGBM model (or FoldEnsemble of them) for a
+    preprocess.lightgbm_matrix() input.
+    
+    Calls the boosters directly: the sklearn wrapper re-validates the input
+    on every call, which costs more than a single-row tree traversal.
+    """
+    models, weights = ensemble_members(model)
+    return sum(weight * member.booster_.predict(matrix) for member, weight in zip(models, weights))
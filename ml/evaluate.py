@@ -4,37 +4,54 @@ Model Evaluation and Reporting
 
 Generate comprehensive evaluation reports including metrics,
 visualizations, and comparisons.
+
+Usage:
+    python evaluate.py                     # Evaluate the active model on the test split
+    python evaluate.py --learning-curve    # Cached learning curve of the active model
+    python evaluate.py --drift             # Live error / feature drift from prediction_logs
 """
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
 import numpy as np
 import pandas as pd
 import matplotlib
 matplotlib.use('Agg')  # Non-interactive backend
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
 import seaborn as sns
+from sklearn.base import clone
 from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
-from sklearn.model_selection import learning_curve
+from sklearn.model_selection import TimeSeriesSplit
 import joblib
+from joblib import Parallel, delayed
 import json
+import argparse
 
 from config import (
-    MODEL_PATH,
-    METADATA_PATH,
     COMPARISON_CSV_PATH,
     FEATURE_IMPORTANCE_PATH,
     ACTUAL_VS_PREDICTED_PATH,
     RESIDUAL_DISTRIBUTION_PATH,
     LEARNING_CURVE_PATH,
+    LEARNING_CURVE_CACHE_PATH,
+    LEARNING_CURVE_CONFIG,
     PERFORMANCE_THRESHOLDS,
     MODEL_NAMES,
     PLOT_CONFIG,
 )
-from preprocess import load_and_preprocess_data
+from preprocess import load_and_preprocess_data, prepare_data_for_model, load_test_split
+from registry import resolve_paths, is_registered, version_dir, test_split_path
+from predict import SellThroughPredictor
+from ensemble import FoldEnsemble
+from drift import run_drift_check
 
 # Set plotting style
 sns.set_style('darkgrid')
-plt.rcParams['figure.figsize'] = PLOT_CONFIG['figsize']
-plt.rcParams['figure.dpi'] = PLOT_CONFIG['dpi']
+matplotlib.rcParams['figure.figsize'] = PLOT_CONFIG['figsize']
+matplotlib.rcParams['figure.dpi'] = PLOT_CONFIG['dpi']
 
 
 def calculate_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
@@ -63,18 +80,36 @@ def calculate_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
     }
 
 
-def plot_feature_importance(model, feature_names: list, model_type: str, top_n: int = 15):
+def new_figure(figsize: tuple) -> Figure:
+    """Figure created without pyplot's global state (safe in worker processes)."""
+    return Figure(figsize=figsize, dpi=PLOT_CONFIG['dpi'])
+
+
+def sample_points(y_true: np.ndarray, y_pred: np.ndarray, max_points: int = PLOT_CONFIG['density_max_points']):
     """
-    Plot feature importance for tree-based models.
+    Uniform random sample of (y_true, y_pred) pairs, so plotting cost stays flat.
+    
+    Returns:
+        (y_true, y_pred) with at most max_points rows
+    """
+    if len(y_true) <= max_points:
+        return np.asarray(y_true), np.asarray(y_pred)
+    index = np.random.default_rng(42).choice(len(y_true), size=max_points, replace=False)
+    return np.asarray(y_true)[index], np.asarray(y_pred)[index]
+
+
+def feature_importance_frame(model, feature_names: list, top_n: int = 15):
+    """
+    Top feature importances of a tree-based model.
     
     Args:
         model: Trained model
         feature_names: List of feature names
-        model_type: Type of model
-        top_n: Number of top features to display
+        top_n: Number of top features to keep
+        
+    Returns:
+        DataFrame with feature/importance columns, or None if unsupported
     """
-    print("\nGenerating feature importance plot...")
-    
     # Get feature importance
     if hasattr(model, 'feature_importances_'):
         importances = model.feature_importances_
@@ -83,7 +118,7 @@ def plot_feature_importance(model, feature_names: list, model_type: str, top_n:
         importances = model.get_feature_importance()
     else:
         print("  ✗ Model does not support feature importance")
-        return
+        return None
     
     # Create DataFrame
     if len(importances) != len(feature_names):
@@ -99,56 +134,74 @@ def plot_feature_importance(model, feature_names: list, model_type: str, top_n:
     # Sort and get top N
     feature_df = feature_df.sort_values('importance', ascending=False).head(top_n)
     
-    # Plot
-    plt.figure(figsize=(10, 8))
-    plt.barh(range(len(feature_df)), feature_df['importance'])
-    plt.yticks(range(len(feature_df)), feature_df['feature'])
-    plt.xlabel('Importance')
-    plt.ylabel('Feature')
-    plt.title(f'Top {top_n} Feature Importances - {MODEL_NAMES.get(model_type, model_type)}')
-    plt.tight_layout()
-    plt.savefig(FEATURE_IMPORTANCE_PATH)
-    plt.close()
-    
-    print(f"  ✓ Saved feature importance plot to {FEATURE_IMPORTANCE_PATH}")
-    
     # Print top features
     print(f"\nTop 10 Most Important Features:")
     for i, row in feature_df.head(10).iterrows():
         print(f"  {row['feature']:30s} - {row['importance']:.4f}")
+    
+    return feature_df
 
 
-def plot_actual_vs_predicted(y_true: np.ndarray, y_pred: np.ndarray, model_name: str):
+def plot_feature_importance(feature_df: pd.DataFrame, model_type: str):
     """
-    Plot actual vs predicted values scatter plot.
+    Plot feature importance for tree-based models.
     
     Args:
-        y_true: True values
-        y_pred: Predicted values
-        model_name: Name of the model
+        feature_df: Top features (from feature_importance_frame)
+        model_type: Type of model
     """
-    print("\nGenerating actual vs predicted plot...")
+    fig = new_figure((10, 8))
+    ax = fig.subplots()
+    ax.barh(range(len(feature_df)), feature_df['importance'])
+    ax.set_yticks(range(len(feature_df)), feature_df['feature'])
+    ax.set_xlabel('Importance')
+    ax.set_ylabel('Feature')
+    ax.set_title(f'Top {len(feature_df)} Feature Importances - {MODEL_NAMES.get(model_type, model_type)}')
+    fig.tight_layout()
+    fig.savefig(FEATURE_IMPORTANCE_PATH)
     
-    # Calculate R²
-    r2 = r2_score(y_true, y_pred)
+    print(f"  ✓ Saved feature importance plot to {FEATURE_IMPORTANCE_PATH}")
+
+
+def plot_actual_vs_predicted(y_true: np.ndarray, y_pred: np.ndarray, model_name: str,
+                             r2: float = None, n_total: int = None):
+    """
+    Plot actual vs predicted values.
     
-    # Plot
-    plt.figure(figsize=(10, 10))
-    plt.scatter(y_true, y_pred, alpha=0.5, s=20, edgecolors='k', linewidths=0.5)
+    Up to PLOT_CONFIG['scatter_max_points'] points are drawn as a scatter
+    plot; larger inputs as a hexbin density (log counts).
+    
+    Args:
+        y_true: True values (possibly a sample, see sample_points)
+        y_pred: Predicted values
+        model_name: Name of the model
+        r2: R² of the full data (default: computed from the given points)
+        n_total: Number of points before sampling (shown in the title)
+    """
+    if r2 is None:
+        r2 = r2_score(y_true, y_pred)
+    
+    fig = new_figure((10, 10))
+    ax = fig.subplots()
+    if len(y_true) > PLOT_CONFIG['scatter_max_points']:
+        hexbin = ax.hexbin(y_true, y_pred, gridsize=PLOT_CONFIG['hexbin_gridsize'], bins='log', mincnt=1)
+        fig.colorbar(hexbin, ax=ax, label='Count (log scale)')
+    else:
+        ax.scatter(y_true, y_pred, alpha=0.5, s=20, edgecolors='k', linewidths=0.5)
     
     # Diagonal line (perfect prediction)
     min_val = min(y_true.min(), y_pred.min())
     max_val = max(y_true.max(), y_pred.max())
-    plt.plot([min_val, max_val], [min_val, max_val], 'r--', lw=2, label='Perfect Prediction')
+    ax.plot([min_val, max_val], [min_val, max_val], 'r--', lw=2, label='Perfect Prediction')
     
-    plt.xlabel('Actual Sell-Through Rate', fontsize=12)
-    plt.ylabel('Predicted Sell-Through Rate', fontsize=12)
-    plt.title(f'Actual vs Predicted - {model_name}\nR² = {r2:.4f}', fontsize=14)
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(ACTUAL_VS_PREDICTED_PATH)
-    plt.close()
+    sampled = f" ({len(y_true):,} of {n_total:,} points)" if n_total and n_total > len(y_true) else ""
+    ax.set_xlabel('Actual Sell-Through Rate', fontsize=12)
+    ax.set_ylabel('Predicted Sell-Through Rate', fontsize=12)
+    ax.set_title(f'Actual vs Predicted - {model_name}\nR² = {r2:.4f}{sampled}', fontsize=14)
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(ACTUAL_VS_PREDICTED_PATH)
     
     print(f"  ✓ Saved actual vs predicted plot to {ACTUAL_VS_PREDICTED_PATH}")
 
@@ -162,75 +215,283 @@ def plot_residual_distribution(y_true: np.ndarray, y_pred: np.ndarray, model_nam
         y_pred: Predicted values
         model_name: Name of the model
     """
-    print("\nGenerating residual distribution plot...")
-    
     residuals = y_true - y_pred
     
-    # Plot
-    plt.figure(figsize=(10, 6))
-    plt.hist(residuals, bins=50, edgecolor='black', alpha=0.7)
-    plt.axvline(x=0, color='r', linestyle='--', linewidth=2, label='Zero Residual')
-    plt.xlabel('Residual (Actual - Predicted)', fontsize=12)
-    plt.ylabel('Frequency', fontsize=12)
-    plt.title(f'Residual Distribution - {model_name}\nMean = {residuals.mean():.4f}, Std = {residuals.std():.4f}', fontsize=14)
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig(RESIDUAL_DISTRIBUTION_PATH)
-    plt.close()
+    fig = new_figure((10, 6))
+    ax = fig.subplots()
+    ax.hist(residuals, bins=50, edgecolor='black', alpha=0.7)
+    ax.axvline(x=0, color='r', linestyle='--', linewidth=2, label='Zero Residual')
+    ax.set_xlabel('Residual (Actual - Predicted)', fontsize=12)
+    ax.set_ylabel('Frequency', fontsize=12)
+    ax.set_title(f'Residual Distribution - {model_name}\nMean = {residuals.mean():.4f}, Std = {residuals.std():.4f}', fontsize=14)
+    ax.legend()
+    ax.grid(True, alpha=0.3)
+    fig.tight_layout()
+    fig.savefig(RESIDUAL_DISTRIBUTION_PATH)
     
     print(f"  ✓ Saved residual distribution plot to {RESIDUAL_DISTRIBUTION_PATH}")
 
 
-def plot_learning_curve_analysis(model, X_train, y_train, model_name: str):
+def render_plots(tasks: list, workers: int = PLOT_CONFIG['workers']):
     """
-    Plot learning curve to show model performance vs training size.
+    Render independent plots in parallel worker processes.
     
     Args:
-        model: Trained model
-        X_train: Training features
-        y_train: Training target
-        model_name: Name of the model
+        tasks: List of (plot_function, args) tuples; args must be picklable
+        workers: Maximum worker processes (None: CPU count; 1: render inline)
     """
-    print("\nGenerating learning curve plot...")
-    
-    try:
-        # Calculate learning curve
-        train_sizes, train_scores, val_scores = learning_curve(
-            model, X_train, y_train,
-            train_sizes=np.linspace(0.1, 1.0, 10),
-            cv=5,
-            scoring='r2',
-            n_jobs=-1,
-            random_state=42
-        )
-        
-        # Calculate mean and std
-        train_mean = train_scores.mean(axis=1)
-        train_std = train_scores.std(axis=1)
-        val_mean = val_scores.mean(axis=1)
-        val_std = val_scores.std(axis=1)
+    workers = min(len(tasks), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        for function, args in tasks:
+            function(*args)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(function, *args): function.__name__ for function, args in tasks}
+        for future, name in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                print(f"  ✗ Error in {name}: {e}")
+
+
+# Number of boosting rounds / staged prediction per boosting library
+BOOSTING_MODEL_TYPES = ['lightgbm', 'xgboost', 'catboost']
+
+# Thread-count parameter per model type (capped by the core budget)
+THREAD_PARAMS = {
+    'lightgbm': 'n_jobs',
+    'xgboost': 'n_jobs',
+    'random_forest': 'n_jobs',
+    'catboost': 'thread_count',
+}
+
+
+def _take_rows(X, idx):
+    """Select rows by position from a DataFrame or an array."""
+    if hasattr(X, 'iloc'):
+        return X.iloc[idx]
+    return X[idx]
+
+
+def _boosting_rounds(model, model_type: str) -> int:
+    """Number of boosting iterations of a fitted model."""
+    if model_type == 'lightgbm':
+        return model.booster_.current_iteration()
+    if model_type == 'xgboost':
+        return model.get_booster().num_boosted_rounds()
+    return model.tree_count_
+
+
+def _staged_predict(model, model_type: str, X, iterations: int) -> np.ndarray:
+    """Predictions of a fitted boosting model using only its first `iterations` rounds."""
+    if model_type == 'lightgbm':
+        return model.predict(X, num_iteration=iterations)
+    if model_type == 'xgboost':
+        return model.predict(X, iteration_range=(0, iterations))
+    return model.predict(X, ntree_end=iterations)
+
+
+def _learning_curve_fold(estimator, model_type: str, fit_params: dict, X, y: np.ndarray,
+                         train_idx: np.ndarray, val_idx: np.ndarray) -> list:
+    """
+    Fit one fold at every training size (one fit per size).
+    
+    Training subsets are the most recent rows of the fold's (time-ordered)
+    training window, evenly thinned to at most max_train_rows. Boosting
+    models are additionally scored at staged iterations of the same fit.
+    
+    Returns:
+        List of per-size results (train_size, train_R2, val_R2, staged)
+    """
+    config = LEARNING_CURVE_CONFIG
+    X_val, y_val = _take_rows(X, val_idx), y[val_idx]
+    results = []
+    
+    for fraction in config['train_sizes']:
+        subset = train_idx[-max(int(len(train_idx) * fraction), 2):]
+        if len(subset) > config['max_train_rows']:
+            subset = subset[np.linspace(0, len(subset) - 1, config['max_train_rows']).astype(int)]
+        X_sub, y_sub = _take_rows(X, subset), y[subset]
         
-        # Plot
-        plt.figure(figsize=(10, 6))
-        plt.plot(train_sizes, train_mean, 'o-', label='Training Score', linewidth=2)
-        plt.fill_between(train_sizes, train_mean - train_std, train_mean + train_std, alpha=0.2)
-        plt.plot(train_sizes, val_mean, 'o-', label='Cross-Validation Score', linewidth=2)
-        plt.fill_between(train_sizes, val_mean - val_std, val_mean + val_std, alpha=0.2)
+        model = clone(estimator)
+        model.fit(X_sub, y_sub, **fit_params)
         
-        plt.xlabel('Training Size', fontsize=12)
-        plt.ylabel('R² Score', fontsize=12)
-        plt.title(f'Learning Curve - {model_name}', fontsize=14)
-        plt.legend(loc='best')
-        plt.grid(True, alpha=0.3)
-        plt.tight_layout()
-        plt.savefig(LEARNING_CURVE_PATH)
-        plt.close()
+        result = {
+            'fraction': fraction,
+            'train_size': len(subset),
+            'train_R2': float(r2_score(y_sub, np.clip(model.predict(X_sub), 0, 1))),
+            'val_R2': float(r2_score(y_val, np.clip(model.predict(X_val), 0, 1))),
+            'staged': [],
+        }
+        if model_type in BOOSTING_MODEL_TYPES:
+            rounds = _boosting_rounds(model, model_type)
+            checkpoints = np.unique(np.linspace(1, rounds, config['staged_checkpoints']).astype(int))
+            result['staged'] = [
+                [int(k), float(r2_score(y_val, np.clip(_staged_predict(model, model_type, X_val, int(k)), 0, 1)))]
+                for k in checkpoints
+            ]
+        results.append(result)
+    
+    return results
+
+
+def _curve_parameters() -> dict:
+    """Settings that change a learning curve (core_budget only changes its speed)."""
+    parameters = {k: v for k, v in LEARNING_CURVE_CONFIG.items() if k != 'core_budget'}
+    return json.loads(json.dumps(parameters))
+
+
+def learning_curve_cache_path(metadata: dict) -> Path:
+    """Cached learning curve of a model version (next to its registry artifacts)."""
+    version = metadata.get('model_version')
+    if version and is_registered(version):
+        return version_dir(version) / LEARNING_CURVE_CACHE_PATH.name
+    return LEARNING_CURVE_CACHE_PATH
+
+
+def load_learning_curve(metadata: dict) -> Optional[dict]:
+    """Cached learning curve for the model, or None if missing / computed with other settings."""
+    path = learning_curve_cache_path(metadata)
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        curve = json.load(f)
+    if curve.get('training_date') != metadata['training_date'] or \
+            curve.get('parameters') != _curve_parameters():
+        return None
+    return curve
+
+
+def compute_learning_curve(model, metadata: dict, X_train, y_train, fit_params: dict = None,
+                           core_budget: int = LEARNING_CURVE_CONFIG['core_budget']) -> dict:
+    """
+    Approximate learning curve of a trained model, cached per model version.
+    
+    Instead of refitting at 10 sizes x 5 folds, the curve uses fewer sizes
+    and expanding-window folds, row-capped subsets and (for boosting models)
+    staged iterations of each fit. Folds run in parallel processes; the
+    model's own threads are reduced so that processes x threads stays
+    within core_budget.
+    
+    Args:
+        model: Trained model (FoldEnsemble or estimator) used as the template
+        metadata: Model metadata (model_type, training_date, model_version)
+        X_train: Training features, prepared for the model type
+        y_train: Training target (time-ordered)
+        fit_params: Extra fit() arguments (categorical features)
+        core_budget: Maximum CPU cores (None: all)
         
-        print(f"  ✓ Saved learning curve plot to {LEARNING_CURVE_PATH}")
+    Returns:
+        Learning curve dictionary (also written to the cache)
+    """
+    config = LEARNING_CURVE_CONFIG
+    model_type = metadata['model_type']
+    template = model.models[-1] if isinstance(model, FoldEnsemble) else model
+    
+    estimator = clone(template)
+    if model_type == 'xgboost':
+        # No eval set in learning-curve fits; staged scores replace early stopping
+        estimator.set_params(early_stopping_rounds=None)
+    
+    splits = list(TimeSeriesSplit(n_splits=config['cv_folds']).split(np.zeros((len(y_train), 1))))
+    core_budget = core_budget or os.cpu_count() or 1
+    processes = min(len(splits), core_budget)
+    if model_type in THREAD_PARAMS:
+        estimator.set_params(**{THREAD_PARAMS[model_type]: max(core_budget // processes, 1)})
+    
+    print(f"\nComputing learning curve ({len(config['train_sizes'])} sizes x {len(splits)} folds, "
+          f"{processes} processes)...")
+    
+    y_values = np.asarray(y_train, dtype=float)
+    fold_results = Parallel(n_jobs=processes)(
+        delayed(_learning_curve_fold)(estimator, model_type, fit_params or {}, X_train, y_values, train_idx, val_idx)
+        for train_idx, val_idx in splits
+    )
+    
+    # Average over folds per training size
+    sizes = []
+    for position, fraction in enumerate(config['train_sizes']):
+        per_fold = [results[position] for results in fold_results]
+        train_r2 = np.array([r['train_R2'] for r in per_fold])
+        val_r2 = np.array([r['val_R2'] for r in per_fold])
+        staged = {}
+        for result in per_fold:
+            for iterations, score in result['staged']:
+                staged.setdefault(iterations, []).append(score)
+        sizes.append({
+            'fraction': fraction,
+            'train_size': float(np.mean([r['train_size'] for r in per_fold])),
+            'train_R2_mean': float(train_r2.mean()),
+            'train_R2_std': float(train_r2.std()),
+            'val_R2_mean': float(val_r2.mean()),
+            'val_R2_std': float(val_r2.std()),
+            'staged_val_R2': [[k, float(np.mean(v))] for k, v in sorted(staged.items())],
+        })
+    
+    curve = {
+        'model_version': metadata.get('model_version'),
+        'model_type': model_type,
+        'training_date': metadata['training_date'],
+        'parameters': _curve_parameters(),
+        'fits': len(splits) * len(config['train_sizes']),
+        'sizes': sizes,
+    }
+    
+    path = learning_curve_cache_path(metadata)
+    with open(path, 'w') as f:
+        json.dump(curve, f, indent=2)
+    print(f"  ✓ Cached learning curve to {path}")
     
-    except Exception as e:
-        print(f"  ✗ Error generating learning curve: {e}")
+    return curve
+
+
+def plot_learning_curve_analysis(curve: dict, model_name: str):
+    """
+    Plot a learning curve (R² vs training size, and vs boosting iterations).
+    
+    Args:
+        curve: Learning curve from compute_learning_curve / load_learning_curve
+        model_name: Name of the model
+    """
+    sizes = curve['sizes']
+    has_staged = any(size['staged_val_R2'] for size in sizes)
+    
+    fig = new_figure((16, 6) if has_staged else (10, 6))
+    axes = fig.subplots(1, 2 if has_staged else 1, squeeze=False)[0]
+    
+    train_sizes = np.array([size['train_size'] for size in sizes])
+    train_mean = np.array([size['train_R2_mean'] for size in sizes])
+    train_std = np.array([size['train_R2_std'] for size in sizes])
+    val_mean = np.array([size['val_R2_mean'] for size in sizes])
+    val_std = np.array([size['val_R2_std'] for size in sizes])
+    
+    ax = axes[0]
+    ax.plot(train_sizes, train_mean, 'o-', label='Training Score', linewidth=2)
+    ax.fill_between(train_sizes, train_mean - train_std, train_mean + train_std, alpha=0.2)
+    ax.plot(train_sizes, val_mean, 'o-', label='Cross-Validation Score', linewidth=2)
+    ax.fill_between(train_sizes, val_mean - val_std, val_mean + val_std, alpha=0.2)
+    ax.set_xlabel('Training Size', fontsize=12)
+    ax.set_ylabel('R² Score', fontsize=12)
+    ax.set_title(f'Learning Curve - {model_name}', fontsize=14)
+    ax.legend(loc='best')
+    ax.grid(True, alpha=0.3)
+    
+    if has_staged:
+        ax = axes[1]
+        for size in sizes:
+            iterations, scores = zip(*size['staged_val_R2'])
+            ax.plot(iterations, scores, label=f"{int(size['train_size'])} rows")
+        ax.set_xlabel('Boosting Iterations', fontsize=12)
+        ax.set_ylabel('Validation R² Score', fontsize=12)
+        ax.set_title('Validation Score by Iteration', fontsize=14)
+        ax.legend(loc='best')
+        ax.grid(True, alpha=0.3)
+    
+    fig.tight_layout()
+    fig.savefig(LEARNING_CURVE_PATH)
+    
+    print(f"  ✓ Saved learning curve plot to {LEARNING_CURVE_PATH}")
 
 
 def generate_comparison_report(results: dict, output_path: str = None):
@@ -294,63 +555,71 @@ def print_evaluation_summary(metrics: dict, model_name: str):
     print(f"  MAE   = {metrics['MAE']:.4f}  (threshold: <= {PERFORMANCE_THRESHOLDS['MAE']})  " +
           ("✓ PASS" if metrics['MAE'] <= PERFORMANCE_THRESHOLDS['MAE'] else "✗ FAIL"))
     print(f"  MAPE  = {metrics['MAPE']:.2f}%")
-    print(f"  CV_R² = {metrics['CV_R2']:.4f}  (threshold: >= {PERFORMANCE_THRESHOLDS['CV_R2']})  " +
-          ("✓ PASS" if metrics['CV_R2'] >= PERFORMANCE_THRESHOLDS['CV_R2'] else "✗ FAIL"))
+    # A distilled student is not cross-validated; it is left out of the overall status
+    cv_known = not np.isnan(metrics['CV_R2'])
+    if cv_known:
+        print(f"  CV_R² = {metrics['CV_R2']:.4f}  (threshold: >= {PERFORMANCE_THRESHOLDS['CV_R2']})  " +
+              ("✓ PASS" if metrics['CV_R2'] >= PERFORMANCE_THRESHOLDS['CV_R2'] else "✗ FAIL"))
+    else:
+        print("  CV_R² = n/a  (not cross-validated)")
     
     # Overall pass/fail
     all_pass = (
         metrics['R2'] >= PERFORMANCE_THRESHOLDS['R2'] and
         metrics['RMSE'] <= PERFORMANCE_THRESHOLDS['RMSE'] and
         metrics['MAE'] <= PERFORMANCE_THRESHOLDS['MAE'] and
-        metrics['CV_R2'] >= PERFORMANCE_THRESHOLDS['CV_R2']
+        (not cv_known or metrics['CV_R2'] >= PERFORMANCE_THRESHOLDS['CV_R2'])
     )
     
     print("\nOverall Status: " + ("✓ ALL THRESHOLDS PASSED" if all_pass else "✗ SOME THRESHOLDS FAILED"))
     print("="*60)
 
 
-def evaluate_model(X_test, y_test, model_path: str = None, metadata_path: str = None):
+def evaluate_model(X_test, y_test, model_path: str = None, metadata_path: str = None,
+                   preprocessor_path: str = None, version: str = None, use_student: bool = False):
     """
     Load and evaluate a saved model.
     
+    Predictions go through SellThroughPredictor (saved preprocessor and
+    category dtypes), exactly as in the API. The teacher model is evaluated
+    unless use_student is set, regardless of DISTILL_CONFIG['serve_student'].
+    
     Args:
-        X_test: Test features
+        X_test: Test features (raw, as returned by split_data)
         y_test: Test target
-        model_path: Path to saved model (optional)
+        model_path: Path to saved model (optional; default: registry)
         metadata_path: Path to metadata JSON (optional)
+        preprocessor_path: Path to saved preprocessor (optional)
+        version: Registry version (optional; default: the active one)
+        use_student: Evaluate the version's distilled student instead
+            (falls back to the teacher when there is none)
     """
-    if model_path is None:
-        model_path = MODEL_PATH
-    if metadata_path is None:
-        metadata_path = METADATA_PATH
-    
     print("\n" + "="*60)
     print("MODEL EVALUATION")
     print("="*60)
     
-    # Load model
-    print(f"\nLoading model from {model_path}...")
-    model = joblib.load(model_path)
-    
-    # Load metadata
-    print(f"Loading metadata from {metadata_path}...")
-    with open(metadata_path, 'r') as f:
-        metadata = json.load(f)
-    
-    model_name = metadata['model_name']
-    model_type = metadata['model_type']
+    predictor = SellThroughPredictor(model_path, metadata_path, preprocessor_path, version=version,
+                                     use_student=use_student)
+    model = predictor.model
+    metadata = predictor.metadata
     
-    print(f"  Model: {model_name}")
-    print(f"  Training Date: {metadata['training_date']}")
-    print(f"  Training Data Size: {metadata['data_size']}")
+    # Type and label of the model actually loaded (a student is LightGBM)
+    model_type = predictor.model_type
+    model_name = metadata['model_name'] + (" (distilled student)" if predictor.serves_student else "")
+    if use_student and not predictor.serves_student:
+        print("⚠️  No distilled student for this version, evaluating the teacher")
     
     # Make predictions
     print("\nMaking predictions on test set...")
-    y_pred = model.predict(X_test)
-    y_pred_clipped = np.clip(y_pred, 0, 1)
+    y_pred_clipped = predictor.predict_frame(predictor.prepare_frame(X_test))
     
-    # Calculate metrics
+    # Calculate metrics (cross-validation R² is only known from training,
+    # and only for the teacher)
     metrics = calculate_metrics(y_test, y_pred_clipped)
+    metrics['CV_R2'] = (
+        float('nan') if predictor.serves_student
+        else metadata.get('metrics', {}).get('CV_R2', float('nan'))
+    )
     
     # Print summary
     print_evaluation_summary(metrics, model_name)
@@ -360,13 +629,27 @@ def evaluate_model(X_test, y_test, model_path: str = None, metadata_path: str =
     print("GENERATING EVALUATION PLOTS")
     print("="*60)
     
-    plot_actual_vs_predicted(y_test, y_pred_clipped, model_name)
-    plot_residual_distribution(y_test, y_pred_clipped, model_name)
+    # Plot inputs are reduced here (sampled points, top features), so the
+    # worker processes receive small arrays instead of the model / test set
+    y_true_sample, y_pred_sample = sample_points(np.asarray(y_test), y_pred_clipped)
+    tasks = [
+        (plot_actual_vs_predicted, (y_true_sample, y_pred_sample, model_name, metrics['R2'], len(y_test))),
+        (plot_residual_distribution, (y_true_sample, y_pred_sample, model_name)),
+    ]
     
     # Feature importance (if supported)
     if model_type in ['lightgbm', 'catboost', 'xgboost', 'random_forest']:
-        plot_feature_importance(model, metadata['features'], model_type)
+        feature_df = feature_importance_frame(model, metadata['features'])
+        if feature_df is not None:
+            tasks.append((plot_feature_importance, (feature_df, model_type)))
+    
+    # Learning curve, if one was computed for this model (evaluate.py --learning-curve)
+    curve = load_learning_curve(metadata)
+    if curve is not None:
+        tasks.append((plot_learning_curve_analysis, (curve, model_name)))
     
+    render_plots(tasks)
+        
     print("\n" + "="*60)
     print("EVALUATION COMPLETE")
     print("="*60)
@@ -374,19 +657,98 @@ def evaluate_model(X_test, y_test, model_path: str = None, metadata_path: str =
     return metrics
 
 
+def run_learning_curve(version: str = None, refresh: bool = False) -> dict:
+    """
+    Plot the learning curve of a model version, computing it only if not cached.
+    
+    Args:
+        version: Registry version (default: the active one)
+        refresh: Recompute even if a cached curve exists
+        
+    Returns:
+        Learning curve dictionary
+    """
+    model_path, metadata_path, _ = resolve_paths(version)
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+    model_name = metadata['model_name']
+    
+    curve = None if refresh else load_learning_curve(metadata)
+    if curve is not None:
+        print(f"✓ Using cached learning curve ({curve['fits']} fits)")
+    else:
+        model = joblib.load(model_path)
+        model_type = metadata['model_type']
+        
+        data = load_and_preprocess_data(include_derived=True)
+        # Only the features the version was trained on (see feature_selection.py)
+        features = metadata['features']
+        X_train, _, _, cat_features, cat_indices = prepare_data_for_model(
+            data['X_train'][features], data['X_test'][features], model_type, data['y_train']
+        )
+        fit_params = {}
+        if model_type == 'lightgbm':
+            fit_params = {'categorical_feature': cat_indices}
+        elif model_type == 'catboost':
+            fit_params = {'cat_features': cat_features, 'verbose': False}
+        
+        curve = compute_learning_curve(model, metadata, X_train, data['y_train'], fit_params)
+    
+    plot_learning_curve_analysis(curve, model_name)
+    return curve
+
+
+def load_evaluation_data(version: str = None) -> tuple:
+    """
+    Test split of a model version: the one stored at training time, or
+    (for models trained before it was stored) a fresh split from the database.
+    
+    Returns:
+        X_test, y_test
+    """
+    _, metadata_path, _ = resolve_paths(version)
+    split_path = test_split_path(metadata_path)
+    
+    if split_path.exists():
+        X_test, y_test, _ = load_test_split(split_path)
+        print(f"✓ Loaded stored test split ({len(X_test)} rows) from {split_path}")
+        return X_test, y_test
+    
+    print(f"⚠️  No stored test split at {split_path}, rebuilding it from the database")
+    data = load_and_preprocess_data(include_derived=True)
+    return data['X_test'], data['y_test']
+
+
 def main():
     """Main evaluation pipeline."""
+    parser = argparse.ArgumentParser(description='Evaluate the sell-through model')
+    parser.add_argument('--drift', action='store_true',
+                        help='Update rolling error / feature drift from new prediction_logs rows')
+    parser.add_argument('--reset', action='store_true',
+                        help='With --drift: discard the saved aggregates and rebuild the window')
+    parser.add_argument('--learning-curve', action='store_true',
+                        help='Compute (or reuse the cached) learning curve of the model')
+    parser.add_argument('--model-version', type=str, help='Registry version to evaluate (default: active)')
+    parser.add_argument('--refresh', action='store_true',
+                        help='With --learning-curve: recompute even if cached')
+    parser.add_argument('--student', action='store_true',
+                        help="Evaluate the version's distilled student (the served model) instead of the teacher")
+    args = parser.parse_args()
+    
+    if args.drift:
+        return run_drift_check(reset=args.reset)
+    if args.learning_curve:
+        return run_learning_curve(args.model_version, refresh=args.refresh)
+    
     print("\n" + "="*60)
     print("SELL-THROUGH RATE MODEL EVALUATION")
     print("="*60)
     
     # Load data
-    data = load_and_preprocess_data(include_derived=True)
-    X_test = data['X_test']
-    y_test = data['y_test']
+    X_test, y_test = load_evaluation_data(args.model_version)
     
     # Evaluate model
-    metrics = evaluate_model(X_test, y_test)
+    metrics = evaluate_model(X_test, y_test, version=args.model_version, use_student=args.student)
     
     return metrics
 
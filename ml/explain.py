@@ -0,0 +1,293 @@
+"""
+Prediction Explanations
+=======================
+
+Per-prediction feature contributions (TreeSHAP) from the boosting
+libraries' native implementations:
+
+- LightGBM: Booster.predict(pred_contrib=True)
+- XGBoost: Booster.predict(pred_contribs=True)
+
+Contributions plus the bias column sum to the raw prediction, so the
+prediction itself is taken from the same call. With
+EXPLAIN_CONFIG['approximate'] both use approximate (Saabas-style)
+contributions instead of exact TreeSHAP: still additive, but linear
+instead of quadratic in tree depth. XGBoost has them natively; LightGBM
+does not, so LightGBMPathContributions walks the dumped trees itself.
+FoldEnsemble contributions are the weighted average of the members'
+contributions (SHAP values are additive), and columns created by a
+preprocessor (encoded categories) are summed back onto the feature they
+came from.
+
+CatBoost is not explained: its ShapValues call alone costs more than
+EXPLAIN_CONFIG['latency_budget_ms'] for a fold ensemble, even when
+approximate.
+"""
+
+from typing import Dict, List
+
+import numpy as np
+
+from config import EXPLAIN_CONFIG, FEATURE_DISPLAY
+from ensemble import FoldEnsemble
+
+# Model types with native per-prediction contributions
+CONTRIBUTION_MODEL_TYPES = ['lightgbm', 'xgboost']
+
+# LightGBM treats |value| <= this as zero (kZeroThreshold)
+_LIGHTGBM_ZERO_THRESHOLD = 1e-35
+
+
+def _native_input(model_type: str, X):
+    """Library input for the contribution call (built once, shared by ensemble members)."""
+    if model_type == 'xgboost':
+        import xgboost as xgb
+        return xgb.DMatrix(X)
+    
+    return X
+
+
+def _member_contributions(model, model_type: str, data) -> np.ndarray:
+    """Contributions of one fitted model: (rows, columns + 1), bias last."""
+    approximate = EXPLAIN_CONFIG['approximate']
+    
+    if model_type == 'lightgbm':
+        # Booster directly: the sklearn wrapper adds ~1 ms of checks per call
+        # (the booster keeps the best iteration, like LGBMRegressor.predict)
+        return np.asarray(model.booster_.predict(data, pred_contrib=True), dtype=float)
+    
+    if model_type == 'xgboost':
+        # Same trees as XGBRegressor.predict (best iteration after early stopping)
+        best_iteration = getattr(model, 'best_iteration', None)
+        iteration_range = (0, best_iteration + 1) if best_iteration is not None else (0, 0)
+        return model.get_booster().predict(
+            data, pred_contribs=True, approx_contribs=approximate, iteration_range=iteration_range
+        ).astype(float)
+    
+    raise ValueError(f"No native contributions for model type: {model_type}")
+
+
+def predict_contributions(model, model_type: str, X) -> np.ndarray:
+    """
+    Per-column contributions of a model (or FoldEnsemble).
+    
+    Args:
+        model: Fitted model or FoldEnsemble
+        model_type: Model type (one of CONTRIBUTION_MODEL_TYPES)
+        X: Model input (after the preprocessor, if any)
+    
+    Returns:
+        Array of shape (rows, columns + 1); the last column is the bias,
+        and each row sums to the raw prediction
+    """
+    if not isinstance(model, FoldEnsemble):
+        return _member_contributions(model, model_type, _native_input(model_type, X))
+    
+    data = _native_input(model_type, X)
+    contributions = None
+    for member, weight in zip(model.models, model.weights):
+        member_contributions = weight * _member_contributions(member, model_type, data)
+        contributions = member_contributions if contributions is None else contributions + member_contributions
+    return contributions
+
+
+class LightGBMPathContributions:
+    """
+    Approximate (Saabas) contributions of a LightGBM model or FoldEnsemble.
+    
+    Every split on a row's decision path credits its feature with the change
+    in node value, so a tree's contributions plus its root value sum to the
+    leaf the row reaches. The trees of all members (leaf and node values
+    scaled by the ensemble weights) are flattened into node arrays once,
+    and rows then walk all trees in lock-step, one level per step. Routing
+    follows LightGBM's own decision rules, including missing values and
+    categorical splits, on a preprocess.lightgbm_matrix() input.
+    """
+    
+    def __init__(self, model):
+        if isinstance(model, FoldEnsemble):
+            members = zip(model.models, model.weights)
+        else:
+            members = [(model, 1.0)]
+        
+        feature, threshold, value, left, right = [], [], [], [], []
+        default_left, missing_nan, missing_zero, category_node = [], [], [], []
+        category_sets, roots = [], []
+        
+        def add(node, weight) -> int:
+            index = len(feature)
+            feature.append(-1)
+            threshold.append(0.0)
+            value.append(weight * node.get('internal_value', node.get('leaf_value', 0.0)))
+            left.append(index)
+            right.append(index)
+            default_left.append(False)
+            missing_nan.append(False)
+            missing_zero.append(False)
+            category_node.append(-1)
+            if 'split_feature' not in node:
+                return index
+            
+            feature[index] = node['split_feature']
+            default_left[index] = node['default_left']
+            missing_nan[index] = node['missing_type'] == 'NaN'
+            missing_zero[index] = node['missing_type'] == 'Zero'
+            if node['decision_type'] == '==':
+                category_node[index] = len(category_sets)
+                category_sets.append([int(c) for c in str(node['threshold']).split('||')])
+            else:
+                threshold[index] = node['threshold']
+            left[index] = add(node['left_child'], weight)
+            right[index] = add(node['right_child'], weight)
+            return index
+        
+        for member, weight in members:
+            # Same trees as Booster.predict (best iteration after early stopping)
+            for tree in member.booster_.dump_model()['tree_info']:
+                roots.append(add(tree['tree_structure'], weight))
+        
+        self.feature = np.array(feature)
+        self.threshold = np.array(threshold, dtype=float)
+        self.value = np.array(value, dtype=float)
+        self.left = np.array(left)
+        self.right = np.array(right)
+        self.default_left = np.array(default_left)
+        self.missing_nan = np.array(missing_nan)
+        self.missing_zero = np.array(missing_zero)
+        self.category_node = np.array(category_node)
+        self.roots = np.array(roots)
+        self.n_features = member.booster_.num_feature()
+        
+        # Category code -> goes left, one row per categorical split
+        n_codes = max((max(codes) for codes in category_sets), default=-1) + 1
+        self.category_left = np.zeros((len(category_sets), max(n_codes, 1)), dtype=bool)
+        for row, codes in enumerate(category_sets):
+            self.category_left[row, codes] = True
+    
+    def __call__(self, X) -> np.ndarray:
+        """
+        Contributions for model input rows.
+        
+        Args:
+            X: preprocess.lightgbm_matrix() output
+        
+        Returns:
+            Array of shape (rows, columns + 1); the last column is the bias,
+            and each row sums to the raw prediction
+        """
+        X = np.asarray(X, dtype=float)
+        n_rows, width = len(X), self.n_features + 1
+        rows = np.repeat(np.arange(n_rows), len(self.roots)).reshape(n_rows, -1)
+        node = np.tile(self.roots, (n_rows, 1))
+        
+        contributions = np.zeros(n_rows * width)
+        contributions[width - 1::width] = self.value[self.roots].sum()
+        
+        while True:
+            feature = self.feature[node]
+            split = feature >= 0
+            if not split.any():
+                break
+            row, node_at, feature = rows[split], node[split], feature[split]
+            x = X[row, feature]
+            
+            # Numerical split: NaN is 0 unless it is the missing type
+            missing_nan = self.missing_nan[node_at]
+            x_num = np.where(np.isnan(x) & ~missing_nan, 0.0, x)
+            missing = ((self.missing_zero[node_at] & (np.abs(x_num) <= _LIGHTGBM_ZERO_THRESHOLD))
+                       | (missing_nan & np.isnan(x_num)))
+            goes_left = np.where(missing, self.default_left[node_at], x_num <= self.threshold[node_at])
+            
+            # Categorical split: listed codes go left; NaN, negative and
+            # codes beyond the largest listed one go right
+            category_node = self.category_node[node_at]
+            categorical = category_node >= 0
+            if categorical.any():
+                code = x[categorical]
+                known = (code >= 0) & (code < self.category_left.shape[1])
+                codes = np.where(known, code, 0).astype(int)
+                goes_left[categorical] = known & self.category_left[category_node[categorical], codes]
+            
+            child = np.where(goes_left, self.left[node_at], self.right[node_at])
+            contributions += np.bincount(
+                row * width + feature, weights=self.value[child] - self.value[node_at],
+                minlength=len(contributions)
+            )
+            node[split] = child
+        
+        return contributions.reshape(n_rows, width)
+
+
+def output_feature_matrix(preprocessor, feature_names: List[str]) -> np.ndarray:
+    """
+    Matrix summing preprocessor output columns onto the raw features.
+    
+    Output names look like 'cat__product_category' (ordinal) or
+    'cat__product_category_빵' (one-hot); each is assigned to the longest
+    raw feature name it starts with.
+    
+    Returns:
+        Array of shape (output columns, raw features)
+    """
+    output_names = [name.split('__', 1)[-1] for name in preprocessor.get_feature_names_out()]
+    by_length = sorted(feature_names, key=len, reverse=True)
+    
+    matrix = np.zeros((len(output_names), len(feature_names)))
+    for row, name in enumerate(output_names):
+        feature = next((f for f in by_length if name == f or name.startswith(f + '_')), None)
+        if feature is not None:
+            matrix[row, feature_names.index(feature)] = 1.0
+    return matrix
+
+
+def format_factor(feature: str, value, contribution: float) -> Dict:
+    """
+    One impact factor in the API `factors` format.
+    
+    Args:
+        feature: Feature name
+        value: Feature value of the prediction
+        contribution: Contribution to the sell-through rate (0-1 scale)
+    
+    Returns:
+        {'name', 'impact', 'detail'}
+    """
+    label, template = FEATURE_DISPLAY.get(feature, (feature, '{value}'))
+    try:
+        if isinstance(template, dict):
+            value_text = template[bool(value)]
+        else:
+            value_text = template.format(value=value)
+    except (KeyError, TypeError, ValueError):
+        value_text = label
+    
+    threshold = EXPLAIN_CONFIG['neutral_threshold']
+    if contribution >= threshold:
+        impact = 'positive'
+    elif contribution <= -threshold:
+        impact = 'negative'
+    else:
+        impact = 'neutral'
+    
+    return {
+        'name': label,
+        'impact': impact,
+        'detail': f'{value_text} → 소진율 {contribution * 100:+.0f}%',
+    }
+
+
+def top_factors(features: Dict, contributions: Dict[str, float],
+                top_n: int = EXPLAIN_CONFIG['top_n']) -> list:
+    """
+    The features with the largest absolute contributions, as impact factors.
+    
+    Args:
+        features: Feature values of the prediction
+        contributions: Feature name -> contribution
+        top_n: Number of factors
+    
+    Returns:
+        List of factors (largest absolute contribution first)
+    """
+    ranked = sorted(contributions.items(), key=lambda item: -abs(item[1]))[:top_n]
+    return [format_factor(feature, features.get(feature), contribution) for feature, contribution in ranked]
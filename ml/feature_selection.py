@@ -0,0 +1,136 @@
+"""
+Feature Selection
+=================
+
+Drops features that do not help before the models are trained, so every
+model (and the Ridge one-hot expansion of store_region in particular) is
+fitted and served on a smaller schema.
+
+A LightGBM probe is fitted on the older part of the training split and
+each feature's permutation importance (validation R² drop when the
+column is shuffled) is measured on the newest rows. Features below
+FEATURE_SELECTION_CONFIG['min_importance'] are removal candidates; they
+are dropped one at a time, least important first, and a drop is kept only
+if the refitted probe stays within FEATURE_SELECTION_CONFIG['max_r2_drop']
+of the full feature set's validation R² (two correlated features, e.g.
+price_ratio and discount_rate, each look unimportant while the other is
+present).
+"""
+
+from typing import Dict, List, Tuple
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.metrics import r2_score
+
+from config import FEATURE_SELECTION_CONFIG, CATEGORICAL_FEATURES
+from preprocess import lightgbm_categories, lightgbm_matrix
+
+
+def _fit_probe(X: pd.DataFrame, y: pd.Series) -> lgb.LGBMRegressor:
+    """Fit the probe model (categorical columns as LightGBM categories)."""
+    to_convert = {
+        col: 'category' for col in CATEGORICAL_FEATURES
+        if col in X.columns and not isinstance(X[col].dtype, pd.CategoricalDtype)
+    }
+    probe = lgb.LGBMRegressor(**FEATURE_SELECTION_CONFIG['params'])
+    probe.fit(X.astype(to_convert) if to_convert else X, y)
+    return probe
+
+
+def _validation_r2(probe: lgb.LGBMRegressor, matrix: np.ndarray, y: np.ndarray) -> float:
+    return float(r2_score(y, np.clip(probe.booster_.predict(matrix), 0, 1)))
+
+
+def permutation_importances(
+    probe: lgb.LGBMRegressor,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    n_repeats: int = FEATURE_SELECTION_CONFIG['n_repeats'],
+    seed: int = FEATURE_SELECTION_CONFIG['random_state'],
+) -> Tuple[float, Dict[str, float]]:
+    """
+    Validation R² drop when each feature is shuffled.
+    
+    The validation rows are converted to the probe's input matrix once;
+    each permutation shuffles one column of a copy of it.
+    
+    Args:
+        probe: Fitted probe model
+        X_val: Validation features
+        y_val: Validation target
+        n_repeats: Permutations per feature (averaged)
+        seed: Random seed
+    
+    Returns:
+        (baseline validation R², feature -> mean R² drop)
+    """
+    rng = np.random.default_rng(seed)
+    matrix = lightgbm_matrix(X_val, lightgbm_categories(probe))
+    y_val = np.asarray(y_val, dtype=float)
+    baseline = _validation_r2(probe, matrix, y_val)
+    
+    importances = {}
+    for i, feature in enumerate(X_val.columns):
+        drops = []
+        for _ in range(n_repeats):
+            shuffled = matrix.copy()
+            shuffled[:, i] = rng.permutation(shuffled[:, i])
+            drops.append(baseline - _validation_r2(probe, shuffled, y_val))
+        importances[feature] = float(np.mean(drops))
+    
+    return baseline, importances
+
+
+def select_features(X_train: pd.DataFrame, y_train: pd.Series) -> Tuple[List[str], Dict]:
+    """
+    Select the features to train and serve the models with.
+    
+    Args:
+        X_train: Time-ordered training features
+        y_train: Training target
+    
+    Returns:
+        (selected feature names in X_train column order, report with the
+        importances, dropped features and validation R²)
+    """
+    print("\nSelecting features...")
+    n_validation = int(len(X_train) * FEATURE_SELECTION_CONFIG['validation_fraction'])
+    X_fit, y_fit = X_train.iloc[:-n_validation], y_train.iloc[:-n_validation]
+    X_val, y_val = X_train.iloc[-n_validation:], y_train.iloc[-n_validation:]
+    
+    baseline, importances = permutation_importances(_fit_probe(X_fit, y_fit), X_val, y_val)
+    
+    # Removal candidates, least important first
+    candidates = sorted(
+        (f for f, importance in importances.items() if importance < FEATURE_SELECTION_CONFIG['min_importance']),
+        key=importances.get,
+    )
+    
+    selected = list(X_train.columns)
+    validation_r2 = baseline
+    for feature in candidates:
+        if len(selected) <= FEATURE_SELECTION_CONFIG['min_features']:
+            break
+        remaining = [f for f in selected if f != feature]
+        probe = _fit_probe(X_fit[remaining], y_fit)
+        r2 = _validation_r2(probe, lightgbm_matrix(X_val[remaining], lightgbm_categories(probe)), y_val)
+        if r2 >= baseline - FEATURE_SELECTION_CONFIG['max_r2_drop']:
+            selected, validation_r2 = remaining, r2
+            print(f"  - Dropped {feature} (importance {importances[feature]:+.4f}, validation R² {r2:.4f})")
+        else:
+            print(f"  - Kept {feature} (validation R² would fall to {r2:.4f})")
+    
+    dropped = [f for f in X_train.columns if f not in selected]
+    print(f"✓ Selected {len(selected)}/{X_train.shape[1]} features "
+          f"(validation R² {baseline:.4f} → {validation_r2:.4f})")
+    
+    return selected, {
+        'method': 'permutation',
+        'validation_rows': n_validation,
+        'importances': importances,
+        'dropped': dropped,
+        'validation_R2_all': baseline,
+        'validation_R2_selected': validation_r2,
+    }
@@ -0,0 +1,239 @@
+"""
+Korean Public Holiday Calendar
+==============================
+
+Offline calendar for the `is_holiday` feature (관공서의 공휴일에 관한 규정):
+fixed-date holidays, the lunar holidays (설날 and 추석 with the days before
+and after, 부처님오신날) from a bundled table, election days and temporary
+holidays, and substitute holidays (대체공휴일) derived from the rules in
+force in each year.
+
+The calendar is compiled once at import into a boolean array indexed by
+days since HOLIDAY_CALENDAR_START, so a lookup is one array index and a
+whole column is one vectorized take - no holiday API or network access at
+training or serving time. Dates outside the covered years are treated as
+regular days (with a warning); extend LUNAR_HOLIDAYS / SPECIAL_HOLIDAYS
+before then and regenerate the database copy (`--sql`, see main()).
+
+Usage:
+    python holiday_calendar.py --year 2026
+    python holiday_calendar.py --sql
+"""
+
+import argparse
+import warnings
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# (month, day, name)
+FIXED_HOLIDAYS = [
+    (1, 1, '신정'),
+    (3, 1, '삼일절'),
+    (5, 5, '어린이날'),
+    (6, 6, '현충일'),
+    (8, 15, '광복절'),
+    (10, 3, '개천절'),
+    (10, 9, '한글날'),
+    (12, 25, '성탄절'),
+]
+
+# Solar dates of the lunar holidays (설날 = 1/1, 추석 = 8/15, 부처님오신날 = 4/8)
+LUNAR_HOLIDAYS = {
+    2020: {'설날': '2020-01-25', '부처님오신날': '2020-04-30', '추석': '2020-10-01'},
+    2021: {'설날': '2021-02-12', '부처님오신날': '2021-05-19', '추석': '2021-09-21'},
+    2022: {'설날': '2022-02-01', '부처님오신날': '2022-05-08', '추석': '2022-09-10'},
+    2023: {'설날': '2023-01-22', '부처님오신날': '2023-05-27', '추석': '2023-09-29'},
+    2024: {'설날': '2024-02-10', '부처님오신날': '2024-05-15', '추석': '2024-09-17'},
+    2025: {'설날': '2025-01-29', '부처님오신날': '2025-05-05', '추석': '2025-10-06'},
+    2026: {'설날': '2026-02-17', '부처님오신날': '2026-05-24', '추석': '2026-09-25'},
+    2027: {'설날': '2027-02-07', '부처님오신날': '2027-05-13', '추석': '2027-09-15'},
+}
+
+# Election days and temporary holidays (designated one at a time)
+SPECIAL_HOLIDAYS = {
+    '2020-04-15': '국회의원 선거일',
+    '2020-08-17': '임시공휴일',
+    '2022-03-09': '대통령 선거일',
+    '2022-06-01': '지방선거일',
+    '2023-10-02': '임시공휴일',
+    '2024-04-10': '국회의원 선거일',
+    '2024-10-01': '임시공휴일',
+    '2025-01-27': '임시공휴일',
+    '2025-06-03': '대통령 선거일',
+    '2026-06-03': '지방선거일',
+}
+
+# Holidays with a substitute day when they fall on a weekend, and the
+# first date the rule applied (설날/추석/어린이날 are handled separately)
+WEEKEND_SUBSTITUTES = {
+    '삼일절': date(2021, 8, 4),
+    '광복절': date(2021, 8, 4),
+    '개천절': date(2021, 8, 4),
+    '한글날': date(2021, 8, 4),
+    '부처님오신날': date(2023, 5, 4),
+    '성탄절': date(2023, 5, 4),
+}
+
+HOLIDAY_CALENDAR_START = date(min(LUNAR_HOLIDAYS), 1, 1)
+HOLIDAY_CALENDAR_END = date(max(LUNAR_HOLIDAYS), 12, 31)
+
+
+def holidays_for_year(year: int) -> Dict[date, str]:
+    """
+    Public holidays of one year.
+    
+    Args:
+        year: Year covered by LUNAR_HOLIDAYS
+    
+    Returns:
+        Date -> holiday name (substitute days as '대체공휴일(<name>)'),
+        in date order
+    """
+    names: Dict[date, List[str]] = {}
+    
+    def add(day: date, name: str):
+        names.setdefault(day, []).append(name)
+    
+    for month, day, name in FIXED_HOLIDAYS:
+        add(date(year, month, day), name)
+    
+    blocks = []  # (days, name) of 설날/추석 (day before, day, day after)
+    for name, iso in LUNAR_HOLIDAYS[year].items():
+        center = date.fromisoformat(iso)
+        if name == '부처님오신날':
+            add(center, name)
+        else:
+            days = [center + timedelta(days=offset) for offset in (-1, 0, 1)]
+            for day in days:
+                add(day, name)
+            blocks.append((days, name))
+    
+    for iso, name in SPECIAL_HOLIDAYS.items():
+        if iso.startswith(str(year)):
+            add(date.fromisoformat(iso), name)
+    
+    # Substitute holidays: (last day of the holiday, name) that earn one
+    triggers = []
+    for days, name in blocks:
+        # 설날/추석: a day on a Sunday or on another holiday (not Saturday)
+        if any(day.weekday() == 6 or len(names[day]) > 1 for day in days):
+            triggers.append((days[-1], name))
+    for day, day_names in names.items():
+        for name in day_names:
+            if name == '어린이날' and (day.weekday() >= 5 or len(day_names) > 1):
+                triggers.append((day, name))
+            elif name in WEEKEND_SUBSTITUTES and day >= WEEKEND_SUBSTITUTES[name] and day.weekday() >= 5:
+                triggers.append((day, name))
+    
+    # Each substitute is the next weekday that is not already a holiday
+    for last_day, name in sorted(triggers):
+        day = last_day + timedelta(days=1)
+        while day.weekday() >= 5 or day in names:
+            day += timedelta(days=1)
+        add(day, f'대체공휴일({name})')
+    
+    return {day: ', '.join(names[day]) for day in sorted(names)}
+
+
+def _compile_flags() -> np.ndarray:
+    """Boolean array over HOLIDAY_CALENDAR_START..END (index = days since start)."""
+    flags = np.zeros((HOLIDAY_CALENDAR_END - HOLIDAY_CALENDAR_START).days + 1, dtype=bool)
+    for year in LUNAR_HOLIDAYS:
+        for day in holidays_for_year(year):
+            flags[(day - HOLIDAY_CALENDAR_START).days] = True
+    return flags
+
+
+HOLIDAY_FLAGS = _compile_flags()
+_START_DAY = np.datetime64(HOLIDAY_CALENDAR_START, 'D')
+_warned_out_of_range = False
+
+
+def _warn_out_of_range():
+    global _warned_out_of_range
+    if not _warned_out_of_range:
+        _warned_out_of_range = True
+        warnings.warn(
+            f"Date outside the holiday calendar ({HOLIDAY_CALENDAR_START} - {HOLIDAY_CALENDAR_END}); "
+            f"treated as a regular day. Extend holiday_calendar.LUNAR_HOLIDAYS."
+        )
+
+
+def is_holiday(day) -> bool:
+    """
+    Whether a date is a Korean public holiday.
+    
+    Args:
+        day: date or datetime (the calendar date in its own time zone)
+    
+    Returns:
+        True on public and substitute holidays
+    """
+    if isinstance(day, datetime):
+        day = day.date()
+    index = (day - HOLIDAY_CALENDAR_START).days
+    if 0 <= index < len(HOLIDAY_FLAGS):
+        return bool(HOLIDAY_FLAGS[index])
+    _warn_out_of_range()
+    return False
+
+
+def holiday_flags(days) -> np.ndarray:
+    """
+    Vectorized is_holiday() for a column of dates.
+    
+    Args:
+        days: Sequence/Series of dates, datetimes or date strings
+            (missing values are not holidays)
+    
+    Returns:
+        Boolean array, one flag per value
+    """
+    days = pd.to_datetime(pd.Series(days, dtype=object)).to_numpy(dtype='datetime64[D]')
+    valid = ~np.isnat(days)
+    index = np.zeros(len(days), dtype=np.int64)
+    index[valid] = (days[valid] - _START_DAY).astype(np.int64)
+    
+    in_range = valid & (index >= 0) & (index < len(HOLIDAY_FLAGS))
+    if (valid & ~in_range).any():
+        _warn_out_of_range()
+    
+    flags = np.zeros(len(days), dtype=bool)
+    flags[in_range] = HOLIDAY_FLAGS[index[in_range]]
+    return flags
+
+
+def main():
+    """Print the holidays of a year, or the INSERT for the public_holidays table."""
+    parser = argparse.ArgumentParser(description='Korean public holiday calendar')
+    parser.add_argument('--year', type=int, help='Print the holidays of this year')
+    parser.add_argument('--sql', action='store_true',
+                        help='Print an INSERT of every covered holiday into public_holidays')
+    args = parser.parse_args()
+    
+    years = [args.year] if args.year else list(LUNAR_HOLIDAYS)
+    
+    if args.sql:
+        rows = [
+            f"  ('{day.isoformat()}', '{name}')"
+            for year in years
+            for day, name in holidays_for_year(year).items()
+        ]
+        print("INSERT INTO public_holidays (holiday_date, name) VALUES")
+        print(",\n".join(rows))
+        print("ON CONFLICT (holiday_date) DO UPDATE SET name = EXCLUDED.name;")
+        return
+    
+    weekdays = ['월', '화', '수', '목', '금', '토', '일']
+    for year in years:
+        holidays = holidays_for_year(year)
+        print(f"\n{year} ({len(holidays)} holidays)")
+        for day, name in holidays.items():
+            print(f"  {day.isoformat()} ({weekdays[day.weekday()]}) {name}")
+
+
+if __name__ == "__main__":
+    main()
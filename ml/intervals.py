@@ -0,0 +1,176 @@
+"""
+Prediction Intervals
+====================
+
+Lower/upper quantile LightGBM models trained next to the main model and
+saved with it in the registry version (interval_model.pkl).
+
+The quantile models are fitted on the older part of the training window
+and a split-conformal margin is computed on the newest part (conformalized
+quantile regression): the interval [lower - margin, upper + margin] covers
+the calibration rows at the target level, which corrects the under-coverage
+quantile boosting usually has.
+
+Both boosters read the input of the served model, so a request converts
+its features once: the float matrix of preprocess.lightgbm_matrix for a
+LightGBM main model or distilled student, the preprocessor output for
+XGBoost / Random Forest / Ridge. CatBoost has no such input and gets no
+interval model (INTERVAL_CONFIG['model_types']).
+"""
+
+from typing import Dict, List, Tuple, Union
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from config import INTERVAL_CONFIG
+from preprocess import lightgbm_categories, lightgbm_matrix
+
+
+def _rows(X, rows: slice):
+    """Row slice of a DataFrame or a (dense or sparse) matrix."""
+    return X.iloc[rows] if isinstance(X, pd.DataFrame) else X[rows]
+
+
+class QuantileIntervalModel:
+    """
+    Lower and upper quantile LightGBM boosters plus a conformal margin.
+    """
+    
+    # 'lightgbm': fitted on LightGBM-format features (converted by matrix());
+    # 'preprocessed': fitted on the main model's preprocessor output
+    input = 'lightgbm'
+    
+    def __init__(self, lower_alpha: float = INTERVAL_CONFIG['lower_alpha'],
+                 upper_alpha: float = INTERVAL_CONFIG['upper_alpha']):
+        """
+        Args:
+            lower_alpha: Quantile of the lower bound
+            upper_alpha: Quantile of the upper bound
+        """
+        self.lower_alpha = lower_alpha
+        self.upper_alpha = upper_alpha
+        self.lower = None
+        self.upper = None
+        self.margin = 0.0
+        self.categories: List[pd.Index] = []
+    
+    @property
+    def level(self) -> float:
+        """Target coverage of the interval."""
+        return self.upper_alpha - self.lower_alpha
+    
+    def _fit_quantile(self, alpha: float, X, y: pd.Series) -> lgb.LGBMRegressor:
+        """Fit one quantile booster."""
+        # Category dtype columns are LightGBM categorical features
+        model = lgb.LGBMRegressor(objective='quantile', alpha=alpha, **INTERVAL_CONFIG['params'])
+        model.fit(X, y)
+        return model
+    
+    def fit(self, X: Union[pd.DataFrame, np.ndarray], y: pd.Series) -> 'QuantileIntervalModel':
+        """
+        Fit the quantile models and the conformal margin.
+        
+        Args:
+            X: Time-ordered training rows: features in LightGBM format
+                (category dtypes), or the main model's preprocessor output
+                (dense or sparse matrix)
+            y: Training target
+        
+        Returns:
+            self
+        """
+        self.input = 'lightgbm' if isinstance(X, pd.DataFrame) else 'preprocessed'
+        n_calibration = int(X.shape[0] * INTERVAL_CONFIG['calibration_fraction'])
+        X_fit, y_fit = _rows(X, slice(None, -n_calibration)), y.iloc[:-n_calibration]
+        X_cal = _rows(X, slice(-n_calibration, None))
+        y_cal = np.asarray(y.iloc[-n_calibration:], dtype=float)
+        
+        self.lower = self._fit_quantile(self.lower_alpha, X_fit, y_fit)
+        self.upper = self._fit_quantile(self.upper_alpha, X_fit, y_fit)
+        self.categories = lightgbm_categories(self.lower)
+        
+        # Conformity score: how far outside [lower, upper] each calibration row is
+        lower, upper = self._raw_bounds(self.matrix(X_cal))
+        scores = np.maximum(lower - y_cal, y_cal - upper)
+        level = min(1.0, self.level * (1 + 1 / len(scores)))
+        self.margin = float(np.quantile(scores, level))
+        return self
+    
+    def matrix(self, X):
+        """Booster input for rows in the format the model was fitted on."""
+        if self.input == 'preprocessed':
+            return X
+        return lightgbm_matrix(X, self.categories)
+    
+    def _raw_bounds(self, matrix) -> Tuple[np.ndarray, np.ndarray]:
+        """Quantile predictions without margin or clipping."""
+        return self.lower.booster_.predict(matrix), self.upper.booster_.predict(matrix)
+    
+    def predict(self, matrix, predictions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Interval bounds for rows already converted with matrix().
+        
+        Args:
+            matrix: Booster input
+            predictions: Point predictions of the main model (the interval
+                is widened to contain them)
+        
+        Returns:
+            (lower, upper), clipped to [0, 1]
+        """
+        lower, upper = self._raw_bounds(matrix)
+        lower = np.clip(np.minimum(lower - self.margin, predictions), 0, 1)
+        upper = np.clip(np.maximum(upper + self.margin, predictions), 0, 1)
+        return lower, upper
+
+
+def interval_metrics(interval_model: QuantileIntervalModel, X, y: pd.Series,
+                     predictions: np.ndarray) -> Dict:
+    """
+    Coverage and width of the intervals on held-out rows.
+    
+    Args:
+        interval_model: Fitted QuantileIntervalModel
+        X: Held-out rows, in the format the model was fitted on
+        y: Held-out target
+        predictions: Main model predictions for X
+    
+    Returns:
+        Dictionary with level, coverage, mean_width and margin
+    """
+    lower, upper = interval_model.predict(interval_model.matrix(X), predictions)
+    y = np.asarray(y, dtype=float)
+    return {
+        'lower_alpha': interval_model.lower_alpha,
+        'upper_alpha': interval_model.upper_alpha,
+        'level': interval_model.level,
+        'coverage': float(np.mean((y >= lower) & (y <= upper))),
+        'mean_width': float(np.mean(upper - lower)),
+        'margin': interval_model.margin,
+    }
+
+
+def train_interval_model(X_train, y_train: pd.Series, X_test, y_test: pd.Series,
+                         test_predictions: np.ndarray) -> Tuple[QuantileIntervalModel, Dict]:
+    """
+    Train the interval model and score it on the test split.
+    
+    Args:
+        X_train: Time-ordered training rows (LightGBM format, or the main
+            model's preprocessor output; see QuantileIntervalModel.fit)
+        y_train: Training target
+        X_test: Test rows in the same format
+        y_test: Test target
+        test_predictions: Main model predictions for X_test
+    
+    Returns:
+        (interval_model, metrics)
+    """
+    print("\nTraining prediction interval models...")
+    interval_model = QuantileIntervalModel().fit(X_train, y_train)
+    metrics = interval_metrics(interval_model, X_test, y_test, test_predictions)
+    print(f"  ✓ {metrics['level']:.0%} interval: test coverage {metrics['coverage']:.1%}, "
+          f"mean width {metrics['mean_width']:.3f} (conformal margin {metrics['margin']:+.3f})")
+    return interval_model, metrics
@@ -0,0 +1,271 @@
+"""
+API Metrics
+===========
+
+Minimal in-process Prometheus metrics (counters and histograms) for the
+prediction API. Rendered in the Prometheus text exposition format by
+the /metrics endpoint.
+
+Metrics are per process: when running several Gunicorn workers, each
+worker exposes its own counts.
+"""
+
+import bisect
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# Latency buckets in seconds (0.5 ms .. 2.5 s)
+DEFAULT_LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+
+def _format_labels(labelnames: Tuple[str, ...], labelvalues: Tuple[str, ...], extra: str = '') -> str:
+    """Format a Prometheus label set, e.g. {stage="validation",le="0.01"}."""
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _CounterChild:
+    """A single labelled counter series."""
+    
+    __slots__ = ('_value', '_lock')
+    
+    def __init__(self):
+        self._value = 0.0
+        self._lock = threading.Lock()
+    
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+    
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class _HistogramChild:
+    """A single labelled histogram series."""
+    
+    __slots__ = ('_upper_bounds', '_counts', '_sum', '_lock')
+    
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._upper_bounds = buckets
+        self._counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float):
+        index = bisect.bisect_left(self._upper_bounds, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+    
+    @contextmanager
+    def time(self):
+        """Observe the elapsed wall time of a block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+    
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class _Metric(ABC):
+    """Base class for labelled metric families."""
+    
+    kind = ''
+    
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+    
+    @abstractmethod
+    def _new_child(self):
+        """New series of this metric type."""
+    
+    def labels(self, *labelvalues):
+        """Return the series for the given label values (created on first use)."""
+        key = tuple(str(v) for v in labelvalues)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+    
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        for labelvalues, child in sorted(self._children.items()):
+            lines.extend(self._render_child(labelvalues, child))
+        return lines
+    
+    @abstractmethod
+    def _render_child(self, labelvalues, child) -> List[str]:
+        """Exposition lines of one series."""
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+    
+    kind = 'counter'
+    
+    def _new_child(self):
+        return _CounterChild()
+    
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+    
+    def _render_child(self, labelvalues, child) -> List[str]:
+        labels = _format_labels(self.labelnames, labelvalues)
+        return [f"{self.name}{labels} {_format_value(child.value)}"]
+
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed buckets."""
+    
+    kind = 'histogram'
+    
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+    
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+    
+    def observe(self, value: float):
+        self.labels().observe(value)
+    
+    def time(self):
+        return self.labels().time()
+    
+    def _render_child(self, labelvalues, child) -> List[str]:
+        counts, total = child.snapshot()
+        lines = []
+        cumulative = 0
+        for upper, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            le = 'le="' + _format_value(upper) + '"'
+            labels = _format_labels(self.labelnames, labelvalues, le)
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        
+        labels = _format_labels(self.labelnames, labelvalues)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together on /metrics."""
+    
+    CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+    
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+    
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+    
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+    
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Shared registry for the API process
+registry = MetricsRegistry()
+
+PREDICT_REQUESTS = registry.counter(
+    'ml_predict_requests_total',
+    'Prediction requests by HTTP status code.',
+    ('status',),
+)
+PREDICT_ERRORS = registry.counter(
+    'ml_predict_errors_total',
+    'Prediction request errors by type.',
+    ('type',),
+)
+PREDICT_LATENCY = registry.histogram(
+    'ml_predict_duration_seconds',
+    'End-to-end /predict handler latency.',
+)
+PREDICT_STAGE_LATENCY = registry.histogram(
+    'ml_predict_stage_duration_seconds',
+    'Latency of each stage inside the /predict handler.',
+    ('stage',),
+)
+OPTIMIZE_REQUESTS = registry.counter(
+    'ml_optimize_requests_total',
+    'Listing optimizer requests by HTTP status code.',
+    ('status',),
+)
+OPTIMIZE_LATENCY = registry.histogram(
+    'ml_optimize_duration_seconds',
+    'End-to-end /optimize handler latency.',
+)
+CACHE_REQUESTS = registry.counter(
+    'ml_cache_requests_total',
+    'Cache lookups by cache name and result (hit/miss).',
+    ('cache', 'result'),
+)
+SHADOW_PREDICTIONS = registry.counter(
+    'ml_shadow_predictions_total',
+    'Shadow (candidate model) predictions by result (scored/dropped/failed).',
+    ('result',),
+)
+PREDICTION_LOG_ROWS = registry.counter(
+    'ml_prediction_log_rows_total',
+    'prediction_logs rows by result (written/failed/dropped).',
+    ('result',),
+)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    """Count a cache lookup; hit rate = hit / (hit + miss)."""
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
@@ -0,0 +1,172 @@
+"""
+Listing Optimizer
+=================
+
+What-if search over the price and quantity of a listing: a grid of
+candidate (discount_price, product_quantity) pairs is scored in one
+vectorized model call, with every other feature (store, time, category)
+taken from the listing, and the candidate with the highest expected
+revenue or expected units sold is returned.
+    
+    expected_units   = predicted sell-through × product_quantity
+    expected_revenue = expected_units × discount_price
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from config import OPTIMIZE_CONFIG
+
+# Quantities maximized by the optimizer
+OBJECTIVES = {
+    'revenue': 'expected_revenue',
+    'units': 'expected_units',
+}
+
+
+def candidate_grid(
+    original_price: float,
+    discount_price: float,
+    product_quantity: int,
+    discount_rates: Optional[List[float]] = None,
+    quantities: Optional[List[int]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build the candidate (discount_price, product_quantity) grid.
+    
+    Discount rates become prices rounded to OPTIMIZE_CONFIG['price_unit'];
+    the listing's own price and quantity are always part of the grid.
+    
+    Args:
+        original_price: Original price of the listing
+        discount_price: Current discount price
+        product_quantity: Current quantity
+        discount_rates: Candidate discount rates in % (default: config range)
+        quantities: Candidate quantities (default: config factors × current quantity)
+    
+    Returns:
+        Tuple of (discount_prices, quantities), one entry per candidate
+    """
+    if discount_rates is None:
+        discount_rates = np.arange(
+            OPTIMIZE_CONFIG['discount_rate_min'],
+            OPTIMIZE_CONFIG['discount_rate_max'] + 1e-9,
+            OPTIMIZE_CONFIG['discount_rate_step'],
+        )
+    unit = OPTIMIZE_CONFIG['price_unit']
+    prices = np.round(original_price * (1 - np.asarray(discount_rates, dtype=float) / 100) / unit) * unit
+    prices = np.append(prices, discount_price)
+    prices = np.unique(prices[(prices > 0) & (prices < original_price)])
+    
+    if quantities is None:
+        quantities = np.round(product_quantity * np.asarray(OPTIMIZE_CONFIG['quantity_factors']))
+    quantities = np.append(np.asarray(quantities, dtype=float), product_quantity)
+    quantities = np.unique(quantities[quantities >= 1]).astype(np.int64)
+    
+    price_grid, quantity_grid = np.meshgrid(prices, quantities, indexing='ij')
+    return price_grid.ravel(), quantity_grid.ravel()
+
+
+def score_candidates(predictor, features: Dict, discount_prices: np.ndarray,
+                     quantities: np.ndarray) -> pd.DataFrame:
+    """
+    Predict every candidate in one model call.
+    
+    Args:
+        predictor: SellThroughPredictor
+        features: Feature dictionary of the listing (as built for /predict)
+        discount_prices: Candidate discount prices
+        quantities: Candidate quantities
+    
+    Returns:
+        DataFrame with discount_price, discount_rate, product_quantity,
+        predicted_sell_through, expected_units and expected_revenue per candidate
+    """
+    original_price = features['original_price']
+    discount_rates = (original_price - discount_prices) / original_price * 100
+    
+    # Scalars broadcast: store/time/category features are shared by all rows
+    df = pd.DataFrame({
+        **features,
+        'discount_price': discount_prices,
+        'discount_rate': discount_rates,
+        'product_quantity': quantities,
+    })
+    sell_through = predictor.predict_frame(predictor.prepare_frame(df))
+    
+    expected_units = sell_through * quantities
+    return pd.DataFrame({
+        'discount_price': discount_prices,
+        'discount_rate': discount_rates,
+        'product_quantity': quantities,
+        'predicted_sell_through': sell_through,
+        'expected_units': expected_units,
+        'expected_revenue': expected_units * discount_prices,
+    })
+
+
+def _candidate_dict(row: pd.Series) -> Dict:
+    """JSON-friendly candidate."""
+    return {
+        'discount_price': int(row['discount_price']),
+        'discount_rate': round(float(row['discount_rate']), 1),
+        'product_quantity': int(row['product_quantity']),
+        'predicted_sell_through': round(float(row['predicted_sell_through']), 2),
+        'expected_units': round(float(row['expected_units']), 1),
+        'expected_revenue': int(round(row['expected_revenue'])),
+    }
+
+
+def optimize_listing(
+    predictor,
+    features: Dict,
+    objective: str = 'revenue',
+    discount_rates: Optional[List[float]] = None,
+    quantities: Optional[List[int]] = None,
+) -> Dict:
+    """
+    Find the price/quantity candidate maximizing the objective.
+    
+    Args:
+        predictor: SellThroughPredictor
+        features: Feature dictionary of the listing (as built for /predict)
+        objective: 'revenue' or 'units'
+        discount_rates: Candidate discount rates in % (default: config range)
+        quantities: Candidate quantities (default: config factors × current quantity)
+    
+    Returns:
+        Dictionary with the objective, number of candidates, the current
+        listing, the best candidate and the top candidates
+    
+    Raises:
+        ValueError: Unknown objective or too many candidates
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective} (expected one of {list(OBJECTIVES)})")
+    
+    discount_prices, candidate_quantities = candidate_grid(
+        features['original_price'], features['discount_price'], features['product_quantity'],
+        discount_rates=discount_rates, quantities=quantities,
+    )
+    if len(discount_prices) > OPTIMIZE_CONFIG['max_candidates']:
+        raise ValueError(
+            f"Too many candidates: {len(discount_prices)} (max {OPTIMIZE_CONFIG['max_candidates']})"
+        )
+    
+    scored = score_candidates(predictor, features, discount_prices, candidate_quantities)
+    ranked = scored.sort_values(OBJECTIVES[objective], ascending=False, kind='stable')
+    
+    current = scored[
+        (scored['discount_price'] == features['discount_price'])
+        & (scored['product_quantity'] == features['product_quantity'])
+    ].iloc[0]
+    
+    return {
+        'objective': objective,
+        'candidates_evaluated': len(scored),
+        'current': _candidate_dict(current),
+        'best': _candidate_dict(ranked.iloc[0]),
+        'top': [_candidate_dict(row) for _, row in ranked.head(OPTIMIZE_CONFIG['top_n']).iterrows()],
+    }
@@ -12,23 +12,55 @@ import joblib
 import json
 import argparse
 import psycopg2
-from typing import Union, List, Dict
+import queue
+import threading
+import time
+from typing import Union, List, Dict, NamedTuple, Optional, Tuple
 import warnings
 
 from config import (
-    MODEL_PATH,
     METADATA_PATH,
     PREPROCESSOR_PATH,
+    MODEL_REGISTRY_CONFIG,
     DATABASE_URL,
     CONTINUOUS_FEATURES,
     CATEGORICAL_FEATURES,
     BOOLEAN_FEATURES,
     DERIVED_FEATURES,
+    UNKNOWN_CATEGORY,
+    EXPLAIN_CONFIG,
+    INTERVAL_CONFIG,
+    DISTILL_CONFIG,
+    OPTIMIZE_CONFIG,
+)
+from ensemble import ensemble_members, lightgbm_predict
+from explain import (
+    CONTRIBUTION_MODEL_TYPES, LightGBMPathContributions, predict_contributions, output_feature_matrix,
+)
+from holiday_calendar import is_holiday
+from preprocess import CATEGORY_DTYPES, lightgbm_categories, lightgbm_matrix
+from regions import resolve_region
+from registry import (
+    resolve_paths,
+    get_active_version,
+    get_candidate_version,
+    is_registered,
+    list_versions,
+    interval_model_path,
+    student_model_path,
 )
 
 warnings.filterwarnings('ignore')
 
 
+class PredictionDetails(NamedTuple):
+    """Outputs of SellThroughPredictor.predict_frame_details (one entry per row)."""
+    predictions: np.ndarray
+    contributions: Optional[np.ndarray]  # (rows, features), None without native contributions
+    lower: Optional[np.ndarray]          # Interval bounds, None without an interval model
+    upper: Optional[np.ndarray]
+
+
 class SellThroughPredictor:
     """
     Sell-through rate predictor.
@@ -36,51 +68,154 @@ class SellThroughPredictor:
     Loads trained model and provides prediction interface.
     """
     
-    def __init__(self, model_path: str = None, metadata_path: str = None):
+    def __init__(self, model_path: str = None, metadata_path: str = None, preprocessor_path: str = None,
+                 version: str = None, use_student: bool = None):
         """
         Initialize predictor.
         
+        Without model_path the model is loaded from the registry: the given
+        version, or the active one.
+        
         Args:
             model_path: Path to saved model (optional)
             metadata_path: Path to metadata JSON (optional)
+            preprocessor_path: Path to saved preprocessor (optional)
+            version: Registered model version (optional)
+            use_student: Serve the version's distilled student model when it
+                has one (default: DISTILL_CONFIG['serve_student']); False
+                loads the teacher
         """
-        self.model_path = model_path or MODEL_PATH
-        self.metadata_path = metadata_path or METADATA_PATH
+        if model_path is None:
+            model_path, default_metadata_path, default_preprocessor_path = resolve_paths(version)
+        else:
+            default_metadata_path, default_preprocessor_path = METADATA_PATH, PREPROCESSOR_PATH
+        
+        self.model_path = model_path
+        self.metadata_path = metadata_path or default_metadata_path
+        self.preprocessor_path = preprocessor_path or default_preprocessor_path
+        self.use_student = DISTILL_CONFIG['serve_student'] if use_student is None else use_student
         
         self.model = None
         self.preprocessor = None
         self.metadata = None
         self.feature_names = None
+        self.input_features = None
         self.model_type = None
+        self.serves_student = False
+        self.model_version = None
+        self._output_features = None
+        self._path_contributions = None
+        self._lightgbm_categories = None
+        self.interval_model = None
+        self._optimize_student = None
         
         self._load_model()
     
     def _load_model(self):
         """Load model, preprocessor, and metadata."""
-        print(f"Loading model from {self.model_path}...")
-        self.model = joblib.load(self.model_path)
-        
         print(f"Loading metadata from {self.metadata_path}...")
         with open(self.metadata_path, 'r') as f:
             self.metadata = json.load(f)
         
         self.feature_names = self.metadata['features']
+        
+        # Request features the model input is built from (price_ratio is
+        # computed from the prices in prepare_frame)
+        self.input_features = [f for f in self.feature_names if f != 'price_ratio']
+        if 'price_ratio' in self.feature_names:
+            self.input_features += ['discount_price', 'original_price']
         self.model_type = self.metadata['model_type']
+        self.model_version = self.metadata.get(
+            'model_version', f"{self.model_type}-{self.metadata['training_date']}"
+        )
+        
+        # Distilled student (a LightGBM model) instead of the teacher, which
+        # is then not loaded at all
+        student_path = student_model_path(self.metadata_path)
+        if self.use_student and student_path.exists():
+            try:
+                print(f"Loading distilled student model from {student_path}...")
+                self.model = joblib.load(student_path)
+                self.model_type = 'lightgbm'
+                self.serves_student = True
+            except Exception as e:
+                print(f"  ⚠ Student model not loadable, serving the teacher: {e}")
+        
+        if not self.serves_student:
+            print(f"Loading model from {self.model_path}...")
+            self.model = joblib.load(self.model_path)
         
         # Load preprocessor if exists (for XGBoost, RF, Ridge)
         if self.model_type not in ['lightgbm', 'catboost']:
             try:
-                print(f"Loading preprocessor from {PREPROCESSOR_PATH}...")
-                self.preprocessor = joblib.load(PREPROCESSOR_PATH)
+                print(f"Loading preprocessor from {self.preprocessor_path}...")
+                self.preprocessor = joblib.load(self.preprocessor_path)
             except FileNotFoundError:
                 print("  ⚠ Preprocessor not found (may not be needed for this model)")
         
-        print(f"✓ Model loaded: {self.metadata['model_name']}")
+        # Training categories of the LightGBM category columns (see _model_input)
+        if self.model_type == 'lightgbm':
+            self._lightgbm_categories = lightgbm_categories(ensemble_members(self.model)[0][0])
+        
+        # Quantile models for prediction intervals (saved with the version)
+        interval_path = interval_model_path(self.metadata_path)
+        if (INTERVAL_CONFIG['enabled'] and self.model_type in INTERVAL_CONFIG['model_types']
+                and interval_path.exists()):
+            interval_model = joblib.load(interval_path)
+            # Served only when the quantile boosters read this model's input: a
+            # second input matrix per request does not fit the latency budget
+            if self._reads_model_input(interval_model):
+                self.interval_model = interval_model
+            else:
+                print("  ⚠ Interval model was fitted on another model input (teacher/student), "
+                      "serving without intervals")
+        
+        # Encoded columns -> raw features, for per-feature contributions
+        if self.preprocessor is not None and self.model_type in CONTRIBUTION_MODEL_TYPES:
+            self._output_features = output_feature_matrix(self.preprocessor, self.feature_names)
+        
+        # LightGBM has no native approximate contributions (see explain.py)
+        if self.model_type == 'lightgbm' and EXPLAIN_CONFIG['enabled'] and EXPLAIN_CONFIG['approximate']:
+            self._path_contributions = LightGBMPathContributions(self.model)
+        
+        print(f"✓ Model loaded: {self.metadata['model_name']}"
+              + (" (distilled student)" if self.serves_student else ""))
         print(f"  - Training Date: {self.metadata['training_date']}")
         print(f"  - Training Data Size: {self.metadata['data_size']}")
         print(f"  - R² Score: {self.metadata['metrics']['R2']:.4f}")
+        
+        # Loaded with the version, not on the first /optimize request
+        if self.model_type not in OPTIMIZE_CONFIG['model_types'] and student_path.exists():
+            print("Loading distilled student model for /optimize...")
+            student = SellThroughPredictor(self.model_path, self.metadata_path, self.preprocessor_path,
+                                           use_student=True)
+            if student.serves_student:
+                self._optimize_student = student
     
-    def _prepare_features(self, features: Dict) -> pd.DataFrame:
+    @property
+    def optimizer(self) -> Optional['SellThroughPredictor']:
+        """
+        Predictor /optimize scores its candidate grid with.
+        
+        This predictor when its model type scores a grid within
+        OPTIMIZE_CONFIG['latency_budget_ms'], otherwise the version's
+        distilled student; None when there is no student either.
+        """
+        if self.model_type in OPTIMIZE_CONFIG['model_types']:
+            return self
+        return self._optimize_student
+    
+    def _reads_model_input(self, interval_model) -> bool:
+        """Whether an interval model's boosters read the output of _model_input()."""
+        if interval_model.input == 'preprocessed':
+            return self.preprocessor is not None
+        return (
+            self._lightgbm_categories is not None
+            and len(self._lightgbm_categories) == len(interval_model.categories)
+            and all(a.equals(b) for a, b in zip(self._lightgbm_categories, interval_model.categories))
+        )
+    
+    def prepare_features(self, features: Dict) -> pd.DataFrame:
         """
         Prepare features from raw input dictionary.
         
@@ -90,8 +225,24 @@ class SellThroughPredictor:
         Returns:
             DataFrame with proper feature columns
         """
-        # Create DataFrame with expected features
-        df = pd.DataFrame([features])
+        return self.prepare_frame(pd.DataFrame([features]))
+    
+    def prepare_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Prepare features for many rows at once.
+        
+        Args:
+            df: Raw feature values, one row per product (not modified)
+            
+        Returns:
+            DataFrame with proper feature columns
+        """
+        df = df.copy(deep=False)
+        
+        # price_ratio is computable from the request itself (as in create_derived_features)
+        if ('price_ratio' in self.feature_names and 'price_ratio' not in df.columns
+                and {'discount_price', 'original_price'} <= set(df.columns)):
+            df['price_ratio'] = df['discount_price'] / df['original_price'].replace(0, 1)
         
         # Ensure all required features are present
         for feat in self.feature_names:
@@ -100,7 +251,7 @@ class SellThroughPredictor:
                 if feat in CONTINUOUS_FEATURES:
                     df[feat] = 0
                 elif feat in CATEGORICAL_FEATURES:
-                    df[feat] = 'unknown'
+                    df[feat] = UNKNOWN_CATEGORY
                 elif feat in BOOLEAN_FEATURES:
                     df[feat] = False
                 elif feat in DERIVED_FEATURES:
@@ -109,11 +260,21 @@ class SellThroughPredictor:
         # Select only the features used by the model
         df = df[self.feature_names]
         
-        # Convert categorical columns to 'category' dtype for LightGBM/CatBoost
+        # Missing categorical values are 'unknown', as in training
+        cat_features = [f for f in CATEGORICAL_FEATURES if f in df.columns]
+        for col in cat_features:
+            if df[col].isnull().any():
+                df[col] = df[col].fillna(UNKNOWN_CATEGORY)
+        
+        # Convert categorical columns to the training category dtypes for LightGBM/CatBoost
         if self.model_type in ['lightgbm', 'catboost']:
-            cat_features = [f for f in CATEGORICAL_FEATURES if f in df.columns]
             for col in cat_features:
-                df[col] = df[col].astype('category')
+                values = df[col]
+                dtype = CATEGORY_DTYPES.get(col)
+                if dtype is not None:
+                    # Values outside the fixed category list map to 'unknown'
+                    values = values.where(values.isin(dtype.categories), UNKNOWN_CATEGORY)
+                df[col] = values.astype(dtype if dtype is not None else 'category')
         
         return df
     
@@ -147,19 +308,105 @@ class SellThroughPredictor:
             Predicted sell-through rate (0.0 - 1.0)
         """
         # Prepare features
-        X = self._prepare_features(features)
+        X = self.prepare_features(features)
         
-        # Apply preprocessor if needed
-        if self.preprocessor:
-            X = self.preprocessor.transform(X)
+        return float(self.predict_frame(X)[0])
+    
+    def predict_frame(self, X: pd.DataFrame) -> np.ndarray:
+        """
+        Predict sell-through rates for already prepared feature rows.
+        
+        Args:
+            X: DataFrame from prepare_features()
         
-        # Predict
-        y_pred = self.model.predict(X)[0]
+        Returns:
+            Array of predicted sell-through rates clipped to [0, 1]
+        """
+        y_pred = self._predict_input(self._model_input(X))
         
         # Clip to valid range
-        y_pred_clipped = np.clip(y_pred, 0, 1)
+        return np.clip(y_pred, 0, 1)
+    
+    def _predict_input(self, model_input) -> np.ndarray:
+        """Raw (unclipped) predictions for the output of _model_input()."""
+        if self._lightgbm_categories is not None:
+            return lightgbm_predict(self.model, model_input)
+        return self.model.predict(model_input)
+    
+    def _model_input(self, X: pd.DataFrame):
+        """
+        Model input for prepared feature rows.
+        
+        The preprocessor output for XGBoost/RF/Ridge. For LightGBM the
+        float matrix LightGBM would build from the DataFrame itself, but
+        converted once instead of once per fold model (the conversion costs
+        far more than a single-row tree traversal).
+        """
+        if self.preprocessor:
+            return self.preprocessor.transform(X)
+        if self._lightgbm_categories is None:
+            return X
+        return lightgbm_matrix(X, self._lightgbm_categories)
+    
+    @property
+    def explains(self) -> bool:
+        """Whether predictions come with native per-feature contributions."""
+        return EXPLAIN_CONFIG['enabled'] and self.model_type in CONTRIBUTION_MODEL_TYPES
+    
+    def predict_frame_with_contributions(self, X: pd.DataFrame) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """
+        Predict sell-through rates and per-feature contributions in one model call.
         
-        return float(y_pred_clipped)
+        Args:
+            X: DataFrame from prepare_features()
+        
+        Returns:
+            Tuple of (predictions clipped to [0, 1], contributions of shape
+            (rows, len(feature_names)) or None)
+        """
+        details = self.predict_frame_details(X, interval=False)
+        return details.predictions, details.contributions
+    
+    def predict_frame_details(self, X: pd.DataFrame, contributions: bool = True,
+                              interval: bool = True) -> PredictionDetails:
+        """
+        Predictions with per-feature contributions and interval bounds.
+        
+        The features are converted to model input once. With contributions
+        the prediction is the sum of the contributions and the bias (no
+        separate predict() call); the interval models read the same model
+        input.
+        
+        Args:
+            X: DataFrame from prepare_features()
+            contributions: Compute per-feature contributions (when the model
+                type supports them, see explains)
+            interval: Compute interval bounds (when an interval model is loaded)
+        
+        Returns:
+            PredictionDetails; predictions and bounds are clipped to [0, 1],
+            contributions are in feature_names order
+        """
+        model_input = self._model_input(X)
+        
+        row_contributions = None
+        if contributions and self.explains:
+            if self._path_contributions is not None:
+                raw = self._path_contributions(model_input)
+            else:
+                raw = predict_contributions(self.model, self.model_type, model_input)
+            predictions = np.clip(raw.sum(axis=1), 0, 1)
+            row_contributions = raw[:, :-1]
+            if self._output_features is not None:
+                row_contributions = row_contributions @ self._output_features
+        else:
+            predictions = np.clip(self._predict_input(model_input), 0, 1)
+        
+        lower = upper = None
+        if interval and self.interval_model is not None:
+            lower, upper = self.interval_model.predict(model_input, predictions)
+        
+        return PredictionDetails(predictions, row_contributions, lower, upper)
     
     def predict_batch(self, features_list: List[Dict]) -> List[float]:
         """
@@ -171,13 +418,12 @@ class SellThroughPredictor:
         Returns:
             List of predicted sell-through rates
         """
-        predictions = []
-        
-        for features in features_list:
-            pred = self.predict(features)
-            predictions.append(pred)
+        if not features_list:
+            return []
         
-        return predictions
+        # One vectorized model call for the whole batch
+        X = self.prepare_frame(pd.DataFrame(features_list))
+        return self.predict_frame(X).tolist()
     
     def predict_from_db(self, product_id: str) -> Dict:
         """
@@ -206,8 +452,9 @@ class SellThroughPredictor:
                 ((p.original_price - p.discount_price)::DECIMAL / p.original_price) * 100 as discount_rate,
                 p.quantity as product_quantity,
                 EXTRACT(EPOCH FROM (p.pickup_deadline - p.created_at)) / 3600.0 as deadline_hours_remaining,
-                COALESCE(AVG(r.rating), 0) as store_avg_rating,
-                COUNT(r.id) as store_total_reviews,
+                COALESCE(ms.avg_rating, 0)::FLOAT8 as store_avg_rating,
+                COALESCE(ms.total_reviews, 0) as store_total_reviews,
+                COALESCE(ms.total_sales, 0) as store_total_sales,
                 p.category::TEXT as product_category,
                 CASE EXTRACT(DOW FROM p.created_at)::INT
                     WHEN 0 THEN '일'
@@ -226,12 +473,12 @@ class SellThroughPredictor:
                     WHEN EXTRACT(HOUR FROM p.created_at)::INT >= 17 AND EXTRACT(HOUR FROM p.created_at)::INT < 21 THEN '저녁'
                     ELSE '심야'
                 END as time_slot,
-                EXTRACT(DOW FROM p.created_at)::INT IN (0, 6) as is_weekend
+                EXTRACT(DOW FROM p.created_at)::INT IN (0, 6) as is_weekend,
+                p.created_at::DATE as register_date
             FROM products p
             JOIN stores s ON s.id = p.store_id
-            LEFT JOIN reviews r ON r.store_id = p.store_id
+            LEFT JOIN ml_store_stats ms ON ms.store_id = p.store_id
             WHERE p.id = %s
-            GROUP BY p.id, s.id, s.address
             """
             
             cursor.execute(query, (product_id,))
@@ -244,29 +491,16 @@ class SellThroughPredictor:
             # Get column names
             colnames = [desc[0] for desc in cursor.description]
             
-            # Count store total sales
-            cursor.execute("""
-                SELECT COUNT(*) FROM orders o
-                JOIN products p2 ON p2.id = o.product_id
-                WHERE p2.store_id = (SELECT store_id FROM products WHERE id = %s)
-                  AND o.status = 'COMPLETED'
-            """, (product_id,))
-            store_total_sales = cursor.fetchone()[0]
-            
             conn.close()
             
             # Build features dictionary
             features = dict(zip(colnames, result))
-            features['store_total_sales'] = store_total_sales
             
             # Extract region from address
-            address = features.pop('store_address', '')
-            import re
-            region_match = re.search(r'([가-힣]+(?:구|시))', address)
-            features['store_region'] = region_match.group(1) if region_match else 'unknown'
+            features['store_region'] = resolve_region(features.pop('store_address', None))
             
-            # Set default for is_holiday (not implemented yet)
-            features['is_holiday'] = False
+            # Holiday flag of the registration date (bundled calendar)
+            features['is_holiday'] = is_holiday(features.pop('register_date'))
             
             print(f"  ✓ Product features fetched")
             
@@ -294,6 +528,216 @@ class SellThroughPredictor:
             raise
 
 
+class PredictorPool:
+    """
+    Several model versions loaded side by side, one of them active.
+    
+    Requests pick a version explicitly or get the active one. Switching the
+    active version between loaded versions costs nothing; when following
+    the registry, changes of its ACTIVE and CANDIDATE pointers are picked
+    up every `active_check_interval` seconds.
+    
+    Versions are only loaded at startup or by a background thread, never on
+    the request path: a new ACTIVE version keeps the previous one serving
+    until it is loaded, and a request for a registered version that is not
+    loaded yet gets None (answered with 503) while it loads. At most
+    `max_loaded_versions` versions stay loaded; the least recently used
+    ones other than the active and candidate version are unloaded.
+    
+    candidate_version names the version to shadow score (see shadow.py).
+    """
+    
+    def __init__(self, active_check_interval: float = MODEL_REGISTRY_CONFIG['active_check_interval'],
+                 max_loaded_versions: int = MODEL_REGISTRY_CONFIG['max_loaded_versions']):
+        """
+        Initialize an empty pool.
+        
+        Args:
+            active_check_interval: Seconds between registry ACTIVE checks
+            max_loaded_versions: Maximum versions kept loaded
+        """
+        self.active_check_interval = active_check_interval
+        self.max_loaded_versions = max_loaded_versions
+        self.active_version: Optional[str] = None
+        self.candidate_version: Optional[str] = None
+        self._predictors: Dict[str, SellThroughPredictor] = {}
+        self._last_used: Dict[str, float] = {}
+        self._follow_registry = False
+        self._registry_active: Optional[str] = None
+        self._last_active_check = 0.0
+        self._lock = threading.Lock()
+        self._version_locks: Dict[str, threading.Lock] = {}
+        self._load_queue: queue.Queue = queue.Queue()
+        self._queued: set = set()
+        self._loader: Optional[threading.Thread] = None
+    
+    def add(self, predictor: SellThroughPredictor, activate: bool = False):
+        """Add an already loaded predictor (optionally making it active)."""
+        with self._lock:
+            self._predictors[predictor.model_version] = predictor
+            self._last_used[predictor.model_version] = time.monotonic()
+            if activate or self.active_version is None:
+                self.active_version = predictor.model_version
+            self._evict()
+    
+    def _evict(self):
+        """Unload least recently used versions beyond the limit (caller holds _lock)."""
+        pinned = {self.active_version, self.candidate_version, self._registry_active}
+        evictable = sorted((v for v in self._predictors if v not in pinned), key=self._last_used.get)
+        while len(self._predictors) > self.max_loaded_versions and evictable:
+            version = evictable.pop(0)
+            del self._predictors[version]
+            self._last_used.pop(version, None)
+            print(f"  Unloaded model version {version} (max_loaded_versions={self.max_loaded_versions})")
+    
+    def load(self, version: str) -> SellThroughPredictor:
+        """
+        Load a registered version (no-op if it is already loaded).
+        
+        Blocks while the model files are read, so it is only called at
+        startup and from background threads (the loader, the shadow
+        scorer). Concurrent loads of one version wait for a single load.
+        """
+        with self._lock:
+            version_lock = self._version_locks.setdefault(version, threading.Lock())
+        with version_lock:
+            predictor = self._predictors.get(version)
+            if predictor is None:
+                predictor = SellThroughPredictor(version=version)
+                self.add(predictor)
+        return predictor
+    
+    def load_in_background(self, version: str):
+        """Queue a registered version for the background loader (never blocks)."""
+        with self._lock:
+            if version in self._predictors or version in self._queued:
+                return
+            self._queued.add(version)
+            # Started lazily so each forked (Gunicorn) worker gets its own thread
+            if self._loader is None or not self._loader.is_alive():
+                self._loader = threading.Thread(target=self._run_loader, name='model-loader', daemon=True)
+                self._loader.start()
+        self._load_queue.put(version)
+    
+    def _run_loader(self):
+        while True:
+            version = self._load_queue.get()
+            try:
+                self.load(version)
+                loaded = True
+            except Exception as e:
+                loaded = False
+                print(f"⚠️  Loading model version {version} failed: {e}")
+            
+            with self._lock:
+                self._queued.discard(version)
+                if version == self._registry_active:
+                    if loaded:
+                        # Switched only now that the new version can serve
+                        self.active_version = version
+                        print(f"✓ Active model version switched to {version}")
+                    else:
+                        # Keep serving the previous version; retried on the next check
+                        self._registry_active = self.active_version
+    
+    def activate(self, version: str):
+        """Make a version active, loading it first if needed (blocking)."""
+        self.load(version)
+        self.active_version = version
+    
+    def load_registry(self, preload_recent: int = MODEL_REGISTRY_CONFIG['preload_recent']):
+        """
+        Load the registry's active version, the shadow candidate and the most
+        recent other versions, and follow the ACTIVE/CANDIDATE pointers from
+        now on.
+        
+        Falls back to the unversioned model files when nothing is active.
+        
+        Args:
+            preload_recent: Number of recent non-active versions to load
+        """
+        active = get_active_version()
+        if active is None:
+            self.add(SellThroughPredictor(), activate=True)
+            return
+        
+        self._registry_active = active
+        self.activate(active)
+        self.candidate_version = get_candidate_version()
+        if self.candidate_version is not None:
+            self.load(self.candidate_version)
+        
+        recent = [m['model_version'] for m in list_versions() if m['model_version'] != active]
+        for version in recent[:preload_recent]:
+            self.load(version)
+        
+        self._follow_registry = True
+        self._last_active_check = time.monotonic()
+    
+    def _sync_registry(self):
+        """Follow moves of the registry's ACTIVE and CANDIDATE pointers."""
+        if not self._follow_registry:
+            return
+        if time.monotonic() - self._last_active_check < self.active_check_interval:
+            return
+        self._last_active_check = time.monotonic()
+        
+        active = get_active_version()
+        if active is not None and active != self._registry_active:
+            self._registry_active = active
+            if active in self._predictors:
+                self.active_version = active
+                print(f"✓ Active model version switched to {active}")
+            else:
+                # The previous version serves until the loader switches over
+                self.load_in_background(active)
+        
+        # Loaded lazily by the shadow scorer (off the request path)
+        candidate = get_candidate_version()
+        if candidate != self.candidate_version:
+            self.candidate_version = candidate
+            print(f"✓ Shadow candidate version switched to {candidate}")
+    
+    def get(self, version: Optional[str] = None) -> Optional[SellThroughPredictor]:
+        """
+        Predictor for a version (default: the active one).
+        
+        Registered versions that are not loaded yet are queued for the
+        background loader.
+        
+        Returns:
+            The predictor, or None while the version is being loaded
+            
+        Raises:
+            KeyError: If the version is neither loaded nor registered
+        """
+        if version is None:
+            self._sync_registry()
+            version = self.active_version
+        
+        predictor = self._predictors.get(version)
+        if predictor is not None:
+            self._last_used[version] = time.monotonic()
+            return predictor
+        if version is not None and is_registered(version):
+            self.load_in_background(version)
+            return None
+        raise KeyError(f"Unknown model version: {version}")
+    
+    def shadow_version(self) -> Optional[str]:
+        """Candidate version to shadow score, or None if there is none (or it is active)."""
+        if self.candidate_version is None or self.candidate_version == self.active_version:
+            return None
+        return self.candidate_version
+    
+    def versions(self) -> List[str]:
+        """Loaded version names."""
+        return list(self._predictors)
+    
+    def __len__(self) -> int:
+        return len(self._predictors)
+
+
 def main():
     """CLI interface for predictions."""
     parser = argparse.ArgumentParser(
@@ -309,11 +753,16 @@ def main():
         type=str,
         help='JSON string of features for prediction'
     )
+    parser.add_argument(
+        '--model-version',
+        type=str,
+        help='Registered model version (default: active version)'
+    )
     
     args = parser.parse_args()
     
     # Initialize predictor
-    predictor = SellThroughPredictor()
+    predictor = SellThroughPredictor(version=args.model_version)
     
     if args.product_id:
         # Predict from database
@@ -0,0 +1,243 @@
+"""
+Prediction Logs
+===============
+
+Rows for the prediction_logs table, a bulk insert helper, and the
+non-blocking writer used by the API:
+
+- Request handlers enqueue rows (never block; when the bounded queue is
+  full the row is dropped and counted)
+- A background thread writes batches with one multi-row INSERT when
+  `batch_size` rows are pending or `flush_interval` seconds have passed
+
+One row is written per (request, model version): the served prediction
+(is_shadow = false) and, while a candidate model is being shadow scored,
+the candidate's prediction for the same request (is_shadow = true). Both
+share request_id, and the actual sell-through is filled in later by the
+update_prediction_actual_result trigger for rows with a product_id.
+"""
+
+import atexit
+import json
+import queue
+import threading
+import time
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+
+from config import PREDICTION_LOG_CONFIG
+from metrics import PREDICTION_LOG_ROWS
+
+LOG_COLUMNS = (
+    'request_id', 'product_id', 'store_id', 'predicted_sell_through', 'features',
+    'confidence', 'confidence_score', 'model_version', 'is_shadow',
+)
+
+INSERT_QUERY = f"""
+INSERT INTO prediction_logs ({', '.join(LOG_COLUMNS)})
+VALUES %s
+ON CONFLICT (product_id, model_version) DO UPDATE SET
+    request_id = EXCLUDED.request_id,
+    store_id = EXCLUDED.store_id,
+    predicted_sell_through = EXCLUDED.predicted_sell_through,
+    features = EXCLUDED.features,
+    confidence = EXCLUDED.confidence,
+    confidence_score = EXCLUDED.confidence_score,
+    is_shadow = EXCLUDED.is_shadow,
+    predicted_at = now()
+"""
+
+INSERT_TEMPLATE = "(%s, %s, %s, %s, %s::JSONB, %s, %s, %s, %s)"
+
+
+def json_default(value):
+    """JSON encoder for DB/numpy scalar types."""
+    if isinstance(value, (Decimal, np.floating)):
+        return float(value)
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.bool_):
+        return bool(value)
+    return str(value)
+
+
+def build_log_row(
+    request_id: str,
+    store_id: str,
+    features: Dict,
+    prediction: float,
+    model_version: str,
+    is_shadow: bool = False,
+    product_id: Optional[str] = None,
+    confidence: Optional[str] = None,
+    confidence_score: Optional[float] = None,
+) -> tuple:
+    """
+    Build one prediction_logs row (in LOG_COLUMNS order).
+    
+    Args:
+        request_id: ID shared by all predictions of one request
+        store_id: Store UUID
+        features: Feature dictionary the model was given
+        prediction: Predicted sell-through rate (0-1)
+        model_version: Version of the model that made the prediction
+        is_shadow: True for candidate predictions not returned to the caller
+        product_id: Product UUID, if the product already exists
+        confidence: Confidence level of the served prediction
+        confidence_score: Confidence score of the served prediction
+        
+    Returns:
+        Row tuple for write_log_rows()
+    """
+    return (
+        request_id,
+        product_id,
+        store_id,
+        round(float(prediction), 4),
+        json.dumps(features, ensure_ascii=False, default=json_default),
+        confidence,
+        round(float(confidence_score), 2) if confidence_score is not None else None,
+        model_version,
+        is_shadow,
+    )
+
+
+def write_log_rows(conn, rows: List[tuple], page_size: int = 1000) -> int:
+    """
+    Insert rows into prediction_logs with one multi-row statement per page.
+    
+    Rows for the same (product_id, model_version) are collapsed to the last
+    one, as one INSERT ... ON CONFLICT cannot update a row twice.
+    
+    Returns:
+        Number of rows written
+    """
+    product_index = LOG_COLUMNS.index('product_id')
+    version_index = LOG_COLUMNS.index('model_version')
+    
+    unique_rows = {}
+    for position, row in enumerate(rows):
+        key = (row[product_index], row[version_index]) if row[product_index] else position
+        unique_rows[key] = row
+    rows = list(unique_rows.values())
+    
+    with conn.cursor() as cursor:
+        execute_values(cursor, INSERT_QUERY, rows, template=INSERT_TEMPLATE, page_size=page_size)
+    conn.commit()
+    return len(rows)
+
+
+class PredictionLogWriter:
+    """
+    Bounded, batched background writer for prediction_logs rows.
+    
+    COPY cannot upsert, so batches use a multi-row INSERT ... ON CONFLICT
+    (execute_values), one round trip per `page_size` rows.
+    """
+    
+    def __init__(
+        self,
+        database_url: str,
+        queue_size: int = PREDICTION_LOG_CONFIG['queue_size'],
+        batch_size: int = PREDICTION_LOG_CONFIG['batch_size'],
+        flush_interval: float = PREDICTION_LOG_CONFIG['flush_interval'],
+    ):
+        """
+        Initialize writer (the writer thread starts on the first submit).
+        
+        Args:
+            database_url: PostgreSQL connection string
+            queue_size: Maximum pending rows; further rows are dropped
+            batch_size: Rows written per batch
+            flush_interval: Seconds before a partial batch is written
+        """
+        self.database_url = database_url
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._batch_lock = threading.Lock()
+        self._batch: List[tuple] = []
+        self._conn = None
+        self.dropped = 0
+    
+    def _ensure_started(self):
+        # Started lazily so each forked (Gunicorn) worker gets its own thread
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='prediction-log-writer', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+    
+    def submit(self, row: tuple) -> bool:
+        """
+        Queue a row (built with build_log_row) for writing; never blocks.
+        
+        Returns:
+            False if the queue was full and the row was dropped
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            PREDICTION_LOG_ROWS.labels('dropped').inc()
+            return False
+        return True
+    
+    def _run(self):
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                row = self._queue.get(timeout=max(deadline - time.monotonic(), 0.01))
+            except queue.Empty:
+                row = None
+            
+            rows = None
+            with self._batch_lock:
+                if row is not None:
+                    self._batch.append(row)
+                if len(self._batch) >= self.batch_size or (self._batch and time.monotonic() >= deadline):
+                    rows, self._batch = self._batch, []
+                if not self._batch:
+                    deadline = time.monotonic() + self.flush_interval
+            if rows:
+                self._write(rows)
+    
+    def flush(self):
+        """Write the current batch and all queued rows now (called at interpreter exit)."""
+        with self._batch_lock:
+            rows, self._batch = self._batch, []
+            while True:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+        for start in range(0, len(rows), self.batch_size):
+            self._write(rows[start:start + self.batch_size])
+    
+    def _write(self, rows: List[tuple]):
+        with self._write_lock:
+            try:
+                if self._conn is None or self._conn.closed:
+                    self._conn = psycopg2.connect(self.database_url)
+                written = write_log_rows(self._conn, rows)
+                PREDICTION_LOG_ROWS.labels('written').inc(written)
+            except Exception as e:
+                PREDICTION_LOG_ROWS.labels('failed').inc(len(rows))
+                print(f"Prediction log write error: {e}")
+                if self._conn is not None:
+                    self._conn.close()
+                    self._conn = None
+    
+    def pending(self) -> int:
+        """Rows waiting to be written."""
+        return self._queue.qsize() + len(self._batch)
@@ -10,12 +10,16 @@ import pandas as pd
 import numpy as np
 import psycopg2
 from sklearn.model_selection import train_test_split
+from sklearn.base import BaseEstimator, OneToOneFeatureMixin, TransformerMixin
 from sklearn.preprocessing import StandardScaler, OneHotEncoder, OrdinalEncoder
 from sklearn.impute import SimpleImputer
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 import joblib
-from typing import Tuple, Optional
+import pyarrow as pa
+import pyarrow.ipc
+from pathlib import Path
+from typing import List, Tuple, Optional
 import warnings
 
 from config import (
@@ -31,17 +35,73 @@ from config import (
     TRAIN_TEST_CONFIG,
     PREPROCESSOR_PATH,
     DATA_STRATEGY,
+    CATEGORY_VALUES,
+    COLUMN_DTYPES,
+    UNKNOWN_CATEGORY,
+    REGION_ENCODING_CONFIG,
 )
+from profiling import profiler
 
 warnings.filterwarnings('ignore')
 
+# Category dtypes for the columns with a fixed category list
+CATEGORY_DTYPES = {
+    col: pd.CategoricalDtype(categories + [UNKNOWN_CATEGORY])
+    for col, categories in CATEGORY_VALUES.items()
+    if categories is not None
+}
+
+
+def apply_dtype_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Cast columns to the compact schema from config (COLUMN_DTYPES, CATEGORY_VALUES).
+    
+    - Integer columns use int8/int32 (float32 while they contain NULLs)
+    - Rates and decimals use float32
+    - Categorical columns become pandas categoricals; values outside a
+      fixed category list become NULL (filled with 'unknown' later)
+    
+    Args:
+        df: DataFrame as returned by the database (converted in place)
+        
+    Returns:
+        The same DataFrame with compact dtypes
+    """
+    for col, dtype in COLUMN_DTYPES.items():
+        if col not in df.columns:
+            continue
+        
+        if dtype == 'bool':
+            # NULL booleans default to false, like the table definition
+            df[col] = df[col].fillna(False).astype(bool)
+            continue
+        
+        # DECIMAL columns arrive as Python Decimal objects
+        values = pd.to_numeric(df[col])
+        if np.dtype(dtype).kind == 'i' and values.isnull().any():
+            dtype = 'float32'
+        df[col] = values.astype(dtype)
+    
+    for col, categories in CATEGORY_VALUES.items():
+        if col not in df.columns:
+            continue
+        
+        dtype = CATEGORY_DTYPES.get(col)
+        if dtype is None:
+            observed = sorted(v for v in df[col].dropna().unique() if v != UNKNOWN_CATEGORY)
+            dtype = pd.CategoricalDtype(observed + [UNKNOWN_CATEGORY])
+        df[col] = df[col].astype(dtype)
+    
+    return df
+
 
 def fetch_training_data() -> pd.DataFrame:
     """
     Fetch training data from PostgreSQL prediction_training_data table.
     
     Returns:
-        DataFrame with all columns from prediction_training_data
+        DataFrame with all columns from prediction_training_data,
+        cast to the compact dtype schema
     """
     print("Fetching training data from database...")
     
@@ -57,7 +117,10 @@ def fetch_training_data() -> pd.DataFrame:
         df = pd.read_sql(query, conn)
         conn.close()
         
-        print(f"✓ Fetched {len(df)} rows from database")
+        df = apply_dtype_schema(df)
+        
+        print(f"✓ Fetched {len(df)} rows from database "
+              f"({df.memory_usage(deep=True).sum() / 1024 / 1024:.1f} MB)")
         return df
     
     except Exception as e:
@@ -75,6 +138,9 @@ def handle_missing_values(df: pd.DataFrame) -> pd.DataFrame:
     - Categorical: fill with 'unknown'
     - Boolean: fill with False
     
+    Only columns that contain NULLs are replaced; all other columns keep
+    sharing their buffers with the input frame.
+    
     Args:
         df: Raw DataFrame
         
@@ -83,48 +149,77 @@ def handle_missing_values(df: pd.DataFrame) -> pd.DataFrame:
     """
     print("\nHandling missing values...")
     
-    # Drop optional features that are mostly NULL
+    # Drop optional features that are mostly NULL (no data copy)
     df_clean = df.drop(columns=FEATURES_TO_DROP, errors='ignore')
     
-    # Report missing values
-    missing_counts = df_clean[ALL_FEATURES + [TARGET]].isnull().sum()
-    if missing_counts.sum() > 0:
+    # Count missing values per column (avoids a full boolean frame)
+    missing_counts = {
+        col: int(df_clean[col].isnull().sum())
+        for col in ALL_FEATURES + [TARGET]
+        if col in df_clean.columns
+    }
+    missing_counts = {col: count for col, count in missing_counts.items() if count > 0}
+    if missing_counts:
         print(f"Missing values found:")
-        for col, count in missing_counts[missing_counts > 0].items():
+        for col, count in missing_counts.items():
             pct = (count / len(df_clean)) * 100
             print(f"  - {col}: {count} ({pct:.1f}%)")
     
     # Handle continuous features: median imputation
     for col in CONTINUOUS_FEATURES:
-        if col in df_clean.columns and df_clean[col].isnull().any():
+        if col in missing_counts:
             median_val = df_clean[col].median()
-            df_clean[col].fillna(median_val, inplace=True)
+            df_clean[col] = df_clean[col].fillna(median_val)
             print(f"  ✓ Imputed {col} with median: {median_val:.2f}")
     
     # Handle categorical features: fill with 'unknown'
     for col in CATEGORICAL_FEATURES:
-        if col in df_clean.columns and df_clean[col].isnull().any():
-            df_clean[col].fillna('unknown', inplace=True)
-            print(f"  ✓ Filled {col} with 'unknown'")
+        if col in missing_counts:
+            values = df_clean[col]
+            if isinstance(values.dtype, pd.CategoricalDtype) and UNKNOWN_CATEGORY not in values.cat.categories:
+                values = values.cat.add_categories([UNKNOWN_CATEGORY])
+            df_clean[col] = values.fillna(UNKNOWN_CATEGORY)
+            print(f"  ✓ Filled {col} with '{UNKNOWN_CATEGORY}'")
     
     # Handle boolean features: fill with False
     for col in BOOLEAN_FEATURES:
-        if col in df_clean.columns and df_clean[col].isnull().any():
-            df_clean[col].fillna(False, inplace=True)
+        if col in missing_counts:
+            df_clean[col] = df_clean[col].fillna(False).astype(bool)
             print(f"  ✓ Filled {col} with False")
     
-    # Drop rows with missing target
-    before_len = len(df_clean)
-    df_clean = df_clean.dropna(subset=[TARGET])
-    after_len = len(df_clean)
-    
-    if before_len != after_len:
-        print(f"  ✓ Dropped {before_len - after_len} rows with missing target")
+    # Drop rows with missing target (the only row-wise copy, and only if needed)
+    if TARGET in missing_counts:
+        df_clean = df_clean[df_clean[TARGET].notnull().to_numpy()]
+        print(f"  ✓ Dropped {missing_counts[TARGET]} rows with missing target")
     
     print(f"✓ Data shape after handling missing values: {df_clean.shape}")
     return df_clean
 
 
+def _prior_group_mean(values: pd.Series, groups: pd.Series, fill_value: float) -> pd.Series:
+    """
+    Mean of the earlier values in each group (expanding mean shifted by one).
+    
+    Computed with grouped cumulative sums instead of a per-group
+    expanding window; the first row of each group gets fill_value.
+    
+    Args:
+        values: Values in time order
+        groups: Group key per row
+        fill_value: Value for rows without earlier rows in their group
+        
+    Returns:
+        float32 Series aligned with values
+    """
+    values64 = values.astype('float64')
+    grouped = values64.groupby(groups, observed=True, sort=False)
+    prior_sum = grouped.cumsum() - values64
+    prior_count = grouped.cumcount()
+    
+    prior_mean = (prior_sum / prior_count.where(prior_count > 0)).fillna(fill_value)
+    return prior_mean.astype('float32')
+
+
 def create_derived_features(df: pd.DataFrame) -> pd.DataFrame:
     """
     Create derived features if data size >= 1000 rows.
@@ -135,6 +230,11 @@ def create_derived_features(df: pd.DataFrame) -> pd.DataFrame:
     - dow_avg_sell_through: historical average per day-of-week
     - price_ratio: discount_price / original_price
     
+    The historical averages only use earlier rows of the same group
+    (rows are in recorded_at order), so there is no target leakage.
+    The new columns are added to a shallow copy: the input columns are
+    shared, not copied.
+    
     Args:
         df: DataFrame with base features
         
@@ -146,46 +246,45 @@ def create_derived_features(df: pd.DataFrame) -> pd.DataFrame:
         return df
     
     print("\nCreating derived features...")
-    df_derived = df.copy()
+    df_derived = df.copy(deep=False)
     
     # Price ratio
     df_derived['price_ratio'] = (
         df_derived['discount_price'] / df_derived['original_price'].replace(0, 1)
-    )
+    ).astype('float32')
     print(f"  ✓ Created price_ratio")
     
-    # Store average sell-through (using expanding mean to avoid data leakage)
+    target = df_derived[TARGET]
+    global_mean = target.mean()
+    
+    # Store average sell-through (expanding mean of earlier rows to avoid data leakage)
     if 'store_id' in df_derived.columns:
-        df_derived['store_avg_sell_through'] = (
-            df_derived.groupby('store_id')[TARGET]
-            .transform(lambda x: x.expanding().mean().shift(1))
-        )
-        # Fill first occurrence with global mean
-        global_mean = df_derived[TARGET].mean()
-        df_derived['store_avg_sell_through'].fillna(global_mean, inplace=True)
+        df_derived['store_avg_sell_through'] = _prior_group_mean(target, df_derived['store_id'], global_mean)
         print(f"  ✓ Created store_avg_sell_through")
     
     # Category average sell-through
-    df_derived['category_avg_sell_through'] = (
-        df_derived.groupby('product_category')[TARGET]
-        .transform(lambda x: x.expanding().mean().shift(1))
+    df_derived['category_avg_sell_through'] = _prior_group_mean(
+        target, df_derived['product_category'], global_mean
     )
-    global_mean = df_derived[TARGET].mean()
-    df_derived['category_avg_sell_through'].fillna(global_mean, inplace=True)
     print(f"  ✓ Created category_avg_sell_through")
     
     # Day-of-week average sell-through
-    df_derived['dow_avg_sell_through'] = (
-        df_derived.groupby('register_day_of_week')[TARGET]
-        .transform(lambda x: x.expanding().mean().shift(1))
+    df_derived['dow_avg_sell_through'] = _prior_group_mean(
+        target, df_derived['register_day_of_week'], global_mean
     )
-    df_derived['dow_avg_sell_through'].fillna(global_mean, inplace=True)
     print(f"  ✓ Created dow_avg_sell_through")
     
     print(f"✓ Data shape after derived features: {df_derived.shape}")
     return df_derived
 
 
+def time_ordered(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows sorted by recorded_at (fetch_training_data already returns them sorted)."""
+    if df['recorded_at'].is_monotonic_increasing:
+        return df
+    return df.sort_values('recorded_at')
+
+
 def split_data(
     df: pd.DataFrame,
     include_derived_features: bool = False
@@ -214,10 +313,11 @@ def split_data(
     feature_cols = [c for c in feature_cols if c in df.columns]
     
     # Sort by recorded_at for time-based split
-    df_sorted = df.sort_values('recorded_at').reset_index(drop=True)
-    
-    X = df_sorted[feature_cols]
-    y = df_sorted[TARGET]
+    df_sorted = time_ordered(df)
+        
+    # New objects with a positional index (the caller's frame is never relabelled)
+    X = df_sorted[feature_cols].reset_index(drop=True)
+    y = df_sorted[TARGET].reset_index(drop=True)
     
     # Time-based split (no shuffle)
     test_size = TRAIN_TEST_CONFIG['test_size']
@@ -231,12 +331,82 @@ def split_data(
     print(f"  - Train set: {len(X_train)} samples ({(1-test_size)*100:.0f}%)")
     print(f"  - Test set: {len(X_test)} samples ({test_size*100:.0f}%)")
     print(f"  - Features: {len(feature_cols)}")
-    print(f"  - Train date range: {df_sorted.iloc[0]['recorded_at']} to {df_sorted.iloc[split_idx-1]['recorded_at']}")
-    print(f"  - Test date range: {df_sorted.iloc[split_idx]['recorded_at']} to {df_sorted.iloc[-1]['recorded_at']}")
+    recorded_at = df_sorted['recorded_at']
+    print(f"  - Train date range: {recorded_at.iloc[0]} to {recorded_at.iloc[split_idx-1]}")
+    print(f"  - Test date range: {recorded_at.iloc[split_idx]} to {recorded_at.iloc[-1]}")
     
     return X_train, X_test, y_train, y_test
 
 
+class OrderedTargetEncoder(OneToOneFeatureMixin, TransformerMixin, BaseEstimator):
+    """
+    Expanding-window target encoding of categorical columns.
+    
+    fit_transform() encodes each training row with the smoothed mean target
+    of the earlier rows of its category (the rows must be time-ordered, as
+    split_data() returns them), so no encoding contains its own or a later
+    target and every time-series CV fold is validated on encodings of its
+    own past. transform() (test rows, serving) uses all training rows.
+    Means are shrunk towards the overall mean by `smooth` pseudo-rows;
+    unseen categories get the overall mean.
+    """
+    
+    def __init__(self, smooth: float = 10.0):
+        """
+        Args:
+            smooth: Pseudo-rows of the overall mean in each category mean (> 0)
+        """
+        self.smooth = smooth
+    
+    def fit(self, X, y):
+        """Learn the category means of all rows."""
+        self.fit_transform(X, y)
+        return self
+    
+    def fit_transform(self, X, y):
+        """
+        Learn the category means and encode the training rows from their past.
+        
+        Args:
+            X: Time-ordered categorical columns
+            y: Target
+        
+        Returns:
+            Float array of the same shape as X
+        """
+        X = np.asarray(X, dtype=object)
+        y = np.asarray(y, dtype=float)
+        self.n_features_in_ = X.shape[1]
+        self.prior_ = float(y.mean())
+        
+        # Overall mean of the preceding rows (the first row has none)
+        prior = np.full(len(y), self.prior_)
+        prior[1:] = np.cumsum(y)[:-1] / np.arange(1, len(y))
+        
+        self.encodings_ = []
+        encoded = np.empty(X.shape, dtype=float)
+        for j in range(X.shape[1]):
+            codes, categories = pd.factorize(X[:, j])
+            grouped = pd.Series(y).groupby(codes)
+            count_before = grouped.cumcount().to_numpy()
+            sum_before = grouped.cumsum().to_numpy() - y
+            encoded[:, j] = (sum_before + self.smooth * prior) / (count_before + self.smooth)
+            
+            sums = np.bincount(codes, weights=y, minlength=len(categories))
+            counts = np.bincount(codes, minlength=len(categories))
+            means = (sums + self.smooth * self.prior_) / (counts + self.smooth)
+            self.encodings_.append(dict(zip(categories, means)))
+        return encoded
+    
+    def transform(self, X):
+        """Encode rows with the means of all training rows."""
+        X = np.asarray(X, dtype=object)
+        encoded = np.empty(X.shape, dtype=float)
+        for j, means in enumerate(self.encodings_):
+            encoded[:, j] = [means.get(value, self.prior_) for value in X[:, j]]
+        return encoded
+
+
 def create_preprocessor(
     model_type: str,
     categorical_features: list,
@@ -251,8 +421,12 @@ def create_preprocessor(
         continuous_features: List of continuous feature names
         
     Returns:
-        ColumnTransformer with appropriate preprocessing steps
+        ColumnTransformer with appropriate preprocessing steps (for Ridge it
+        outputs a sparse CSR matrix; see REGION_ENCODING_CONFIG)
     """
+    extra_transformers = []
+    sparse_threshold = 0.3
+    
     if model_type in ['lightgbm', 'catboost']:
         # LightGBM and CatBoost: no encoding needed (handle categories natively)
         # Just impute and pass through
@@ -265,6 +439,15 @@ def create_preprocessor(
         ])
     
     elif model_type in ['xgboost', 'random_forest']:
+        if REGION_ENCODING_CONFIG['tree_encoding'] == 'target' and 'store_region' in categorical_features:
+            # Mean target per region, from earlier rows only (fit_transform needs y)
+            region_transformer = Pipeline(steps=[
+                ('imputer', SimpleImputer(strategy='constant', fill_value='unknown')),
+                ('encoder', OrderedTargetEncoder(smooth=REGION_ENCODING_CONFIG['target_smooth']))
+            ])
+            extra_transformers.append(('region', region_transformer, ['store_region']))
+            categorical_features = [f for f in categorical_features if f != 'store_region']
+        
         # XGBoost and RF: OrdinalEncoder for categorical
         categorical_transformer = Pipeline(steps=[
             ('imputer', SimpleImputer(strategy='constant', fill_value='unknown')),
@@ -276,11 +459,13 @@ def create_preprocessor(
         ])
     
     elif model_type == 'ridge':
-        # Ridge: OneHotEncoder + StandardScaler
+        # Ridge: OneHotEncoder + StandardScaler, kept sparse end to end
+        # (one column per store_region value; Ridge fits CSR input directly)
         categorical_transformer = Pipeline(steps=[
             ('imputer', SimpleImputer(strategy='constant', fill_value='unknown')),
-            ('encoder', OneHotEncoder(handle_unknown='ignore', sparse_output=False))
+            ('encoder', OneHotEncoder(handle_unknown='ignore', sparse_output=True))
         ])
+        sparse_threshold = 1.0
         
         continuous_transformer = Pipeline(steps=[
             ('imputer', SimpleImputer(strategy='median')),
@@ -294,17 +479,20 @@ def create_preprocessor(
         transformers=[
             ('cat', categorical_transformer, categorical_features),
             ('num', continuous_transformer, continuous_features)
-        ],
-        remainder='passthrough'  # Pass through boolean features
+        ] + extra_transformers,
+        remainder='passthrough',  # Pass through boolean features
+        sparse_threshold=sparse_threshold
     )
     
     return preprocessor
 
 
+@profiler.profiled('prepare_data')
 def prepare_data_for_model(
     X_train: pd.DataFrame,
     X_test: pd.DataFrame,
-    model_type: str
+    model_type: str,
+    y_train: Optional[pd.Series] = None
 ) -> Tuple:
     """
     Prepare data for a specific model type.
@@ -313,6 +501,8 @@ def prepare_data_for_model(
         X_train: Training features
         X_test: Test features
         model_type: Model type
+        y_train: Training target (required by the XGBoost/RF preprocessor
+            when REGION_ENCODING_CONFIG['tree_encoding'] is 'target')
         
     Returns:
         X_train_processed, X_test_processed, preprocessor, feature_names
@@ -328,14 +518,19 @@ def prepare_data_for_model(
         cont_features.extend(derived_in_data)
     
     if model_type in ['lightgbm', 'catboost']:
-        # Native categorical support - just ensure proper dtypes
-        X_train_processed = X_train.copy()
-        X_test_processed = X_test.copy()
+        # Native categorical support - the frames are used as they are
+        # when the categorical columns already have 'category' dtype
+        X_train_processed = X_train
+        X_test_processed = X_test
         
-        # Convert categorical columns to 'category' dtype
-        for col in cat_features:
-            X_train_processed[col] = X_train_processed[col].astype('category')
-            X_test_processed[col] = X_test_processed[col].astype('category')
+        # Convert remaining categorical columns to 'category' dtype
+        to_convert = {
+            col: 'category' for col in cat_features
+            if not isinstance(X_train[col].dtype, pd.CategoricalDtype)
+        }
+        if to_convert:
+            X_train_processed = X_train.astype(to_convert)
+            X_test_processed = X_test.astype(to_convert)
         
         # Get categorical feature indices (for LightGBM)
         cat_indices = [X_train_processed.columns.get_loc(col) for col in cat_features]
@@ -346,7 +541,7 @@ def prepare_data_for_model(
         # XGBoost, RF, Ridge: use preprocessor
         preprocessor = create_preprocessor(model_type, cat_features, cont_features)
         
-        X_train_processed = preprocessor.fit_transform(X_train)
+        X_train_processed = preprocessor.fit_transform(X_train, y_train)
         X_test_processed = preprocessor.transform(X_test)
         
         # Get feature names after transformation
@@ -360,11 +555,96 @@ def prepare_data_for_model(
             
             feature_names = list(cat_feature_names) + cont_features + bool_features
         else:
-            feature_names = cat_features + cont_features + bool_features
+            # One output column per feature ('region__store_region' last
+            # among the encoded columns when it is target-encoded)
+            feature_names = [name.split('__', 1)[-1] for name in preprocessor.get_feature_names_out()]
         
         return X_train_processed, X_test_processed, preprocessor, feature_names, None
 
 
+def lightgbm_categories(model) -> List[pd.Index]:
+    """Training categories of the categorical columns of a fitted LGBMRegressor."""
+    return [pd.Index(c) for c in model.booster_.pandas_categorical or []]
+
+
+def lightgbm_matrix(X: pd.DataFrame, categories: List[pd.Index]) -> np.ndarray:
+    """
+    Float matrix for a LightGBM booster trained on a DataFrame.
+    
+    Category (or string) columns are encoded as positions in the training
+    categories stored in the booster (`booster.pandas_categorical`), which
+    is what LightGBM does itself for every DataFrame it is given; unseen and
+    missing values become NaN. Converting once lets several boosters
+    (fold models, quantile models) share the matrix.
+    
+    Args:
+        X: Feature rows in training column order
+        categories: Training categories per categorical column, in column order
+        
+    Returns:
+        Array of shape (rows, columns)
+    """
+    matrix = np.empty(X.shape, dtype=float)
+    remaining = iter(categories)
+    for i, (col, dtype) in enumerate(X.dtypes.items()):
+        # Backing arrays directly: Series accessors dominate for single rows
+        values = X[col].array
+        if isinstance(dtype, pd.CategoricalDtype):
+            # Frame codes -> training codes
+            remap = next(remaining).get_indexer(dtype.categories).astype(float)
+            remap[remap < 0] = np.nan
+            matrix[:, i] = np.where(values.codes >= 0, remap[values.codes], np.nan)
+        elif col in CATEGORICAL_FEATURES:
+            codes = next(remaining).get_indexer(values).astype(float)
+            codes[codes < 0] = np.nan
+            matrix[:, i] = codes
+        else:
+            matrix[:, i] = values.to_numpy(dtype=float, na_value=np.nan)
+    return matrix
+
+
+def save_test_split(path: Path, X_test: pd.DataFrame, y_test: pd.Series, row_ids) -> int:
+    """
+    Write the test split as an uncompressed Arrow IPC file.
+    
+    Column dtypes are kept (categories as dictionary columns), and the
+    uncompressed layout lets load_test_split() memory-map the file.
+    
+    Args:
+        path: Output file
+        X_test: Test features (as returned by split_data)
+        y_test: Test target
+        row_ids: prediction_training_data id per test row
+        
+    Returns:
+        Number of rows written
+    """
+    df = X_test.assign(**{TARGET: y_test.to_numpy(), 'id': np.asarray(row_ids, dtype=str)})
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    
+    with pa.OSFile(str(path), 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    
+    return len(df)
+
+
+def load_test_split(path: Path) -> Tuple[pd.DataFrame, pd.Series, np.ndarray]:
+    """
+    Memory-map a test split written by save_test_split().
+    
+    Args:
+        path: Arrow IPC file
+        
+    Returns:
+        X_test, y_test, row_ids
+    """
+    with pa.memory_map(str(path), 'r') as source:
+        df = pa.ipc.open_file(source).read_all().to_pandas()
+    
+    return df.drop(columns=[TARGET, 'id']), df[TARGET], df['id'].to_numpy()
+
+
 def load_and_preprocess_data(
     include_derived: bool = True
 ) -> dict:
@@ -382,7 +662,9 @@ def load_and_preprocess_data(
     print("="*60)
     
     # Step 1: Fetch data
-    df = fetch_training_data()
+    with profiler.stage('fetch_training_data') as stage:
+        df = fetch_training_data()
+        stage['rows'] = len(df)
     
     # Check minimum data size
     if len(df) < DATA_STRATEGY["MIN_DATA_SIZE"]:
@@ -391,17 +673,20 @@ def load_and_preprocess_data(
         )
     
     # Step 2: Handle missing values
-    df_clean = handle_missing_values(df)
+    with profiler.stage('handle_missing_values'):
+        df_clean = handle_missing_values(df)
     
     # Step 3: Create derived features (if data size permits)
     if include_derived and len(df_clean) >= DATA_STRATEGY["SIMPLE_THRESHOLD"]:
-        df_clean = create_derived_features(df_clean)
+        with profiler.stage('create_derived_features'):
+            df_clean = create_derived_features(df_clean)
         has_derived = True
     else:
         has_derived = False
     
     # Step 4: Split data
-    X_train, X_test, y_train, y_test = split_data(df_clean, include_derived_features=has_derived)
+    with profiler.stage('split_data'):
+        X_train, X_test, y_train, y_test = split_data(df_clean, include_derived_features=has_derived)
     
     print("\n" + "="*60)
     print("DATA PREPROCESSING COMPLETE")
@@ -412,11 +697,15 @@ def load_and_preprocess_data(
     print(f"Target range: [{y_train.min():.4f}, {y_train.max():.4f}]")
     print("="*60 + "\n")
     
+    # prediction_training_data ids of the test rows (same order as X_test)
+    test_ids = time_ordered(df_clean)['id'].iloc[len(X_train):].astype(str).to_numpy()
+    
     return {
         'X_train': X_train,
         'X_test': X_test,
         'y_train': y_train,
         'y_test': y_test,
+        'test_ids': test_ids,
         'data_size': len(df_clean),
         'has_derived_features': has_derived,
         'feature_names': list(X_train.columns),
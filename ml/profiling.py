@@ -0,0 +1,253 @@
+"""
+Pipeline Profiling
+==================
+
+Lightweight stage instrumentation for the training pipeline.
+Records wall time, CPU time and memory per (nested) stage, and
+optionally dumps a cProfile file per stage.
+
+Memory is attributed to the stage: on Linux the kernel's RSS high-water
+mark (VmHWM) is reset when a stage starts (/proc/self/clear_refs), so
+peak_rss_mb is the highest RSS reached during the stage and
+peak_growth_mb its rise over the RSS at stage start. Elsewhere only the
+process-lifetime peak (ru_maxrss) exists; peak_growth_mb is then how far
+the stage raised that peak (0 for a stage below an earlier peak).
+"""
+
+import cProfile
+import functools
+import json
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _cpu_time() -> float:
+    """CPU seconds used by this process and its finished child processes."""
+    if resource is None:
+        return time.process_time()
+    
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+def _proc_status_mb(field: str) -> Optional[float]:
+    """A kB field of /proc/self/status in MB (None where /proc is unavailable)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """Reset VmHWM to the current RSS (Linux); False if not supported."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """
+    High-water RSS in MB: since the last _reset_peak_rss() on Linux, the
+    process-lifetime peak elsewhere (None if unavailable on this platform).
+    """
+    peak = _proc_status_mb('VmHWM')
+    if peak is not None or resource is None:
+        return peak
+    
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, kilobytes on Linux
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return peak / divisor
+
+
+def _rss_mb() -> Optional[float]:
+    """Current RSS in MB (the lifetime peak where it cannot be read)."""
+    rss = _proc_status_mb('VmRSS')
+    return rss if rss is not None else _peak_rss_mb()
+
+
+class StageProfiler:
+    """
+    Records timing and memory for named pipeline stages.
+    
+    Stages nest: a stage opened inside another is recorded as
+    "parent/child". Usage:
+        
+        with profiler.stage('fetch_training_data'):
+            df = fetch_training_data()
+    """
+    
+    def __init__(self):
+        self.stages = []
+        self.cprofile_dir: Optional[Path] = None
+        self._stack = []
+        self._started_at = None
+    
+    def reset(self, cprofile_dir: Optional[Path] = None):
+        """
+        Clear recorded stages.
+        
+        Args:
+            cprofile_dir: If set, dump a cProfile .prof file per stage here
+        """
+        self.stages = []
+        self._stack = []
+        self._started_at = time.perf_counter()
+        self.cprofile_dir = Path(cprofile_dir) if cprofile_dir else None
+        
+        if self.cprofile_dir:
+            self.cprofile_dir.mkdir(parents=True, exist_ok=True)
+    
+    @contextmanager
+    def stage(self, name: str, **info):
+        """
+        Time a block of code as a named stage.
+        
+        Args:
+            name: Stage name (prefixed with the enclosing stage names)
+            **info: Extra fields stored with the stage record (e.g. rows=...)
+        """
+        if self._started_at is None:
+            self._started_at = time.perf_counter()
+        
+        parent = self._stack[-1] if self._stack else None
+        full_name = f"{parent['name']}/{name}" if parent else name
+        
+        record = {
+            'name': full_name,
+            'depth': len(self._stack),
+            'start_offset_s': round(time.perf_counter() - self._started_at, 4),
+            **info,
+        }
+        self.stages.append(record)
+        
+        # Only one cProfile can be active: pause the parent's while nested
+        stage_profile = None
+        if self.cprofile_dir:
+            if parent and parent.get('_profile'):
+                parent['_profile'].disable()
+            stage_profile = cProfile.Profile()
+            record['_profile'] = stage_profile
+            stage_profile.enable()
+        
+        # The enclosing stages keep the high-water mark reached so far;
+        # this stage measures from its own start
+        self._fold_peak_rss()
+        _reset_peak_rss()
+        rss_start = _rss_mb()
+        record['_peak_rss'] = rss_start
+        
+        self._stack.append(record)
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_time()
+        
+        try:
+            yield record
+        finally:
+            record['wall_time_s'] = round(time.perf_counter() - wall_start, 4)
+            record['cpu_time_s'] = round(_cpu_time() - cpu_start, 4)
+            self._fold_peak_rss()
+            peak = record.pop('_peak_rss')
+            record['rss_start_mb'] = round(rss_start, 1) if rss_start is not None else None
+            record['peak_rss_mb'] = round(peak, 1) if peak is not None else None
+            record['peak_growth_mb'] = (
+                round(max(peak - rss_start, 0.0), 1) if peak is not None and rss_start is not None else None
+            )
+            
+            self._stack.pop()
+            
+            if stage_profile:
+                stage_profile.disable()
+                dump_name = full_name.replace('/', '__') + '.prof'
+                stage_profile.dump_stats(str(self.cprofile_dir / dump_name))
+                record['cprofile'] = dump_name
+                del record['_profile']
+                
+                if parent and parent.get('_profile'):
+                    parent['_profile'].enable()
+    
+    def _fold_peak_rss(self):
+        """Raise the open stages' peaks to the current high-water mark."""
+        peak = _peak_rss_mb()
+        if peak is None:
+            return
+        for record in self._stack:
+            if record.get('_peak_rss') is not None:
+                record['_peak_rss'] = max(record['_peak_rss'], peak)
+    
+    def profiled(self, name: str):
+        """Decorator form of stage() for whole functions."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+    
+    def to_dict(self) -> dict:
+        """Stage records (completed stages only) as a JSON-serializable dict."""
+        stages = [
+            {k: v for k, v in s.items() if not k.startswith('_')}
+            for s in self.stages
+            if 'wall_time_s' in s
+        ]
+        peaks = [s['peak_rss_mb'] for s in stages if s['peak_rss_mb'] is not None]
+        
+        return {
+            'stages': stages,
+            'total_wall_time_s': round(sum(s['wall_time_s'] for s in stages if s['depth'] == 0), 4),
+            'peak_rss_mb': max(peaks) if peaks else None,
+        }
+    
+    def save_report(self, path: Path, **extra):
+        """
+        Write the profiling report as JSON.
+        
+        Args:
+            path: Output JSON path
+            **extra: Additional top-level fields (e.g. model_type)
+        """
+        report = {
+            'generated_at': datetime.now().isoformat(),
+            **extra,
+            **self.to_dict(),
+        }
+        
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        
+        print(f"✓ Saved profiling report to {path}")
+    
+    def print_summary(self):
+        """Print a per-stage timing table."""
+        report = self.to_dict()
+        
+        print("\nStage timings:")
+        print(f"  {'Stage':50s} {'Wall(s)':>9s} {'CPU(s)':>9s} {'PeakRSS(MB)':>12s} {'Growth(MB)':>11s}")
+        for s in report['stages']:
+            label = '  ' * s['depth'] + s['name'].split('/')[-1]
+            peak = f"{s['peak_rss_mb']:.1f}" if s['peak_rss_mb'] is not None else 'n/a'
+            growth = f"{s['peak_growth_mb']:+.1f}" if s['peak_growth_mb'] is not None else 'n/a'
+            print(f"  {label:50s} {s['wall_time_s']:9.2f} {s['cpu_time_s']:9.2f} {peak:>12s} {growth:>11s}")
+
+
+# Shared profiler used by preprocess.py and train_model.py
+profiler = StageProfiler()
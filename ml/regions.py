@@ -0,0 +1,86 @@
+"""
+Store Region Resolution
+=======================
+
+Region (구/시) of a store address, resolved exactly like the database
+function extract_region() used by collect_training_data(), so serving and
+training produce the same store_region categories:
+
+- the first Hangul run containing 구/시 after its first character,
+  cut after the last such 구/시 ("서울시 강남구 역삼동" → "서울시")
+- otherwise the first space-separated token of the address
+- NULL/empty addresses and an empty first token → 'unknown' (extract_region()
+  returns NULL for them and training fills NULL regions the same way)
+
+This is the same result as regexp_match(address, '([가-힣]+(?:구|시))'),
+computed with a character scan. Results are cached per address.
+"""
+
+from functools import lru_cache
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from config import UNKNOWN_CATEGORY
+
+REGION_SUFFIXES = ('구', '시')
+REGION_CACHE_SIZE = 65536
+
+
+def _is_hangul(char: str) -> bool:
+    return '가' <= char <= '힣'
+
+
+@lru_cache(maxsize=REGION_CACHE_SIZE)
+def resolve_region(address: Optional[str]) -> str:
+    """
+    Region of a store address.
+    
+    Args:
+        address: Store address (may be None)
+        
+    Returns:
+        Region name, or 'unknown' for a missing address
+    """
+    if not address:
+        return UNKNOWN_CATEGORY
+    
+    n = len(address)
+    i = 0
+    while i < n:
+        if not _is_hangul(address[i]):
+            i += 1
+            continue
+        
+        # Hangul run [i, j); keep the last 구/시 past its first character
+        end = None
+        j = i + 1
+        while j < n and _is_hangul(address[j]):
+            if address[j] in REGION_SUFFIXES:
+                end = j + 1
+            j += 1
+        
+        if end is not None:
+            return address[i:end]
+        i = j
+    
+    return address.split(' ', 1)[0] or UNKNOWN_CATEGORY
+
+
+def resolve_regions(addresses: Iterable[Optional[str]]) -> pd.Series:
+    """
+    Resolve many addresses, parsing each distinct address once.
+    
+    Args:
+        addresses: Store addresses (Series, list, ...)
+        
+    Returns:
+        Series of regions aligned with the input
+    """
+    addresses = addresses if isinstance(addresses, pd.Series) else pd.Series(list(addresses), dtype=object)
+    codes, uniques = pd.factorize(addresses, use_na_sentinel=True)
+    
+    # Trailing UNKNOWN is picked by the missing-value code -1
+    regions = np.array([resolve_region(address) for address in uniques] + [UNKNOWN_CATEGORY], dtype=object)
+    return pd.Series(regions[codes], index=addresses.index, dtype=object)
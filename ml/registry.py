@@ -0,0 +1,289 @@
+"""
+Model Registry
+==============
+
+Versioned model artifacts kept side by side under models/registry/:
+    
+    models/registry/
+    ├── ACTIVE                          # version served by default
+    ├── CANDIDATE                       # version shadow scored (optional)
+    ├── lightgbm-20260301-030012/
+    │   ├── sell_through_model.pkl
+    │   ├── preprocessor.pkl            # (models that need one)
+    │   ├── interval_model.pkl          # quantile models for prediction intervals
+    │   ├── student_model.pkl           # distilled model served instead (optional)
+    │   ├── test_split.arrow            # held-out test rows (evaluate.py)
+    │   └── model_metadata.json
+    └── catboost-20260308-030044/
+        └── ...
+
+Retraining registers a new version instead of overwriting the previous
+model; switching the active version is a pointer change (rollback).
+
+Usage:
+    python registry.py list
+    python registry.py activate lightgbm-20260301-030012
+    python registry.py shadow catboost-20260308-030044
+    python registry.py shadow --clear
+"""
+
+import argparse
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import joblib
+
+from config import (
+    MODEL_PATH,
+    METADATA_PATH,
+    PREPROCESSOR_PATH,
+    INTERVAL_MODEL_PATH,
+    STUDENT_MODEL_PATH,
+    TEST_SPLIT_PATH,
+    REGISTRY_DIR,
+    ACTIVE_VERSION_PATH,
+    CANDIDATE_VERSION_PATH,
+)
+from preprocess import save_test_split
+
+
+def make_version(model_type: str, trained_at: datetime) -> str:
+    """Version name for a model trained at trained_at."""
+    return f"{model_type}-{trained_at:%Y%m%d-%H%M%S}"
+
+
+def version_dir(version: str) -> Path:
+    """Directory holding the artifacts of a version."""
+    return REGISTRY_DIR / version
+
+
+def version_paths(version: str) -> Tuple[Path, Path, Path]:
+    """
+    Artifact paths of a registered version.
+    
+    Returns:
+        (model_path, metadata_path, preprocessor_path)
+    """
+    directory = version_dir(version)
+    return directory / MODEL_PATH.name, directory / METADATA_PATH.name, directory / PREPROCESSOR_PATH.name
+
+
+def register_model(model, preprocessor, metadata: Dict, activate: bool = False,
+                   test_split: Optional[Tuple] = None, interval_model=None, student_model=None) -> str:
+    """
+    Save a trained model as a new registry version.
+    
+    Artifacts are written to a temporary directory and renamed into place,
+    so a partially written version is never visible.
+    
+    Args:
+        model: Trained model
+        preprocessor: Fitted preprocessor (or None)
+        metadata: Model metadata (model_type and training_date are required);
+            model_version is added
+        activate: Make the new version the active one
+        test_split: (X_test, y_test, row_ids) stored with the model (optional)
+        interval_model: Fitted intervals.QuantileIntervalModel (optional)
+        student_model: Distilled model served instead of model (optional)
+                
+    Returns:
+        Registered version name
+    """
+    version = make_version(metadata['model_type'], datetime.fromisoformat(metadata['training_date']))
+    metadata = {**metadata, 'model_version': version}
+    
+    target = version_dir(version)
+    if target.exists():
+        raise FileExistsError(f"Model version {version} is already registered")
+    
+    staging = REGISTRY_DIR / f".{version}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+    
+    joblib.dump(model, staging / MODEL_PATH.name)
+    if preprocessor is not None:
+        joblib.dump(preprocessor, staging / PREPROCESSOR_PATH.name)
+    if interval_model is not None:
+        joblib.dump(interval_model, staging / INTERVAL_MODEL_PATH.name)
+    if student_model is not None:
+        joblib.dump(student_model, staging / STUDENT_MODEL_PATH.name)
+    if test_split is not None:
+        save_test_split(staging / TEST_SPLIT_PATH.name, *test_split)
+    with open(staging / METADATA_PATH.name, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    
+    staging.rename(target)
+    
+    if activate:
+        set_active_version(version)
+    
+    return version
+
+
+def list_versions() -> List[Dict]:
+    """
+    Metadata of all registered versions, newest first.
+    
+    Returns:
+        List of metadata dictionaries (with model_version, active and
+        candidate flags)
+    """
+    if not REGISTRY_DIR.exists():
+        return []
+    
+    active = get_active_version()
+    candidate = get_candidate_version()
+    versions = []
+    for directory in REGISTRY_DIR.iterdir():
+        metadata_path = directory / METADATA_PATH.name
+        if directory.name.startswith('.') or not metadata_path.exists():
+            continue
+        with open(metadata_path, 'r') as f:
+            metadata = json.load(f)
+        metadata['model_version'] = directory.name
+        metadata['active'] = directory.name == active
+        metadata['candidate'] = directory.name == candidate
+        versions.append(metadata)
+    
+    return sorted(versions, key=lambda m: m['training_date'], reverse=True)
+
+
+def is_registered(version: str) -> bool:
+    """True if version has artifacts in the registry."""
+    # Plain directory names only (versions can come from API requests)
+    if not isinstance(version, str) or Path(version).name != version or version.startswith('.'):
+        return False
+    return (version_dir(version) / METADATA_PATH.name).exists()
+
+
+def _read_pointer(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_pointer(path: Path, version: str):
+    """Point a pointer file at a registered version (atomic file replace)."""
+    if not is_registered(version):
+        raise ValueError(f"Unknown model version: {version}")
+    
+    tmp_path = path.with_suffix('.tmp')
+    tmp_path.write_text(version + '\n')
+    os.replace(tmp_path, path)
+
+
+def get_active_version() -> Optional[str]:
+    """Active version name, or None if nothing has been activated."""
+    return _read_pointer(ACTIVE_VERSION_PATH)
+
+
+def set_active_version(version: str):
+    """
+    Point ACTIVE at a registered version.
+    
+    Raises:
+        ValueError: If the version is not registered
+    """
+    _write_pointer(ACTIVE_VERSION_PATH, version)
+
+
+def get_candidate_version() -> Optional[str]:
+    """Version being shadow scored, or None."""
+    return _read_pointer(CANDIDATE_VERSION_PATH)
+
+
+def set_candidate_version(version: Optional[str]):
+    """
+    Point CANDIDATE at a registered version (None stops shadow scoring).
+    
+    Raises:
+        ValueError: If the version is not registered
+    """
+    if version is None:
+        CANDIDATE_VERSION_PATH.unlink(missing_ok=True)
+    else:
+        _write_pointer(CANDIDATE_VERSION_PATH, version)
+
+
+def interval_model_path(metadata_path: Path) -> Path:
+    """Interval model of the model whose metadata is at metadata_path."""
+    return Path(metadata_path).parent / INTERVAL_MODEL_PATH.name
+
+
+def student_model_path(metadata_path: Path) -> Path:
+    """Distilled student of the model whose metadata is at metadata_path."""
+    return Path(metadata_path).parent / STUDENT_MODEL_PATH.name
+
+
+def test_split_path(metadata_path: Path) -> Path:
+    """Stored test split of the model whose metadata is at metadata_path."""
+    return Path(metadata_path).parent / TEST_SPLIT_PATH.name
+
+
+def resolve_paths(version: Optional[str] = None) -> Tuple[Path, Path, Path]:
+    """
+    Artifact paths for a version (default: the active one).
+    
+    Falls back to the unversioned MODEL_PATH/METADATA_PATH/PREPROCESSOR_PATH
+    when no version is given and nothing is active (models trained before
+    the registry existed).
+    
+    Returns:
+        (model_path, metadata_path, preprocessor_path)
+    """
+    version = version or get_active_version()
+    if version is None:
+        return MODEL_PATH, METADATA_PATH, PREPROCESSOR_PATH
+    if not is_registered(version):
+        raise ValueError(f"Unknown model version: {version}")
+    return version_paths(version)
+
+
+def main():
+    """CLI interface for the model registry."""
+    parser = argparse.ArgumentParser(description='Manage registered model versions')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list', help='List registered versions (* active, S shadow candidate)')
+    activate_parser = subparsers.add_parser('activate', help='Make a version the active one')
+    activate_parser.add_argument('version', type=str, help='Version name (see list)')
+    shadow_parser = subparsers.add_parser('shadow', help='Shadow score a version on live traffic')
+    shadow_parser.add_argument('version', type=str, nargs='?', help='Version name (see list)')
+    shadow_parser.add_argument('--clear', action='store_true', help='Stop shadow scoring')
+    
+    args = parser.parse_args()
+    
+    if args.command == 'list':
+        versions = list_versions()
+        if not versions:
+            print("No registered models")
+            return
+        print(f"{'':3s}{'Version':36s} {'Model':20s} {'R2':>8s} {'RMSE':>8s} {'Data':>8s}")
+        for metadata in versions:
+            marker = ('*' if metadata['active'] else ' ') + ('S' if metadata['candidate'] else ' ') + ' '
+            print(f"{marker}{metadata['model_version']:36s} {metadata['model_name']:20s} "
+                  f"{metadata['metrics']['R2']:8.4f} {metadata['metrics']['RMSE']:8.4f} {metadata['data_size']:8d}")
+    
+    elif args.command == 'activate':
+        previous = get_active_version()
+        set_active_version(args.version)
+        print(f"✓ Active model version: {previous} → {args.version}")
+        print("  Running API servers switch on their next active-version check")
+    
+    elif args.command == 'shadow':
+        if args.clear:
+            set_candidate_version(None)
+            print("✓ Shadow scoring stopped")
+        elif args.version:
+            set_candidate_version(args.version)
+            print(f"✓ Shadow scoring {args.version} (active: {get_active_version()})")
+        else:
+            print(f"Candidate version: {get_candidate_version()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Shadow Scoring
+==============
+
+Scores live /predict traffic with a candidate model version without
+affecting responses:
+
+- The request handler only enqueues the request (non-blocking; when the
+  queue is full the request is not shadow scored and counted as dropped)
+- A background thread predicts queued requests with the candidate in
+  batches (one vectorized model call per batch)
+- Candidate predictions are handed to the PredictionLogWriter, next to
+  the served prediction the API already logged for the request; both
+  share request_id (is_shadow distinguishes them)
+
+The candidate is the registry's CANDIDATE version (registry.py shadow);
+it is loaded by the background thread, never on the request path.
+"""
+
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from config import SHADOW_CONFIG
+from metrics import SHADOW_PREDICTIONS
+from prediction_log import PredictionLogWriter, build_log_row
+
+
+class ShadowScorer:
+    """
+    Background shadow scoring of a candidate model.
+    """
+    
+    def __init__(
+        self,
+        pool,
+        log_writer: PredictionLogWriter,
+        queue_size: int = SHADOW_CONFIG['queue_size'],
+        batch_size: int = SHADOW_CONFIG['batch_size'],
+        flush_interval: float = SHADOW_CONFIG['flush_interval'],
+    ):
+        """
+        Initialize scorer (the worker thread starts on the first submit).
+        
+        Args:
+            pool: PredictorPool holding (or able to load) the candidate
+            log_writer: Writer receiving the candidate's prediction_logs rows
+            queue_size: Maximum pending requests
+            batch_size: Requests predicted per batch
+            flush_interval: Seconds before a partial batch is processed
+        """
+        self.pool = pool
+        self.log_writer = log_writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+    
+    def _ensure_started(self):
+        # Started lazily so each forked (Gunicorn) worker gets its own thread
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='shadow-scorer', daemon=True)
+                self._thread.start()
+    
+    def submit(self, candidate_version: str, served: Dict) -> bool:
+        """
+        Queue a served request for shadow scoring (never blocks).
+        
+        Args:
+            candidate_version: Version to shadow score with
+            served: Served request: request_id, store_id, product_id, features
+        
+        Returns:
+            False if the queue was full and the request was dropped
+        """
+        self._ensure_started()
+        try:
+            self._queue.put_nowait((candidate_version, served))
+        except queue.Full:
+            SHADOW_PREDICTIONS.labels('dropped').inc()
+            return False
+        return True
+    
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                batch.append(self._queue.get(timeout=max(deadline - time.monotonic(), 0.01)))
+            except queue.Empty:
+                pass
+            
+            if len(batch) >= self.batch_size or (batch and time.monotonic() >= deadline):
+                self.process_batch(batch)
+                batch = []
+            if not batch:
+                deadline = time.monotonic() + self.flush_interval
+    
+    def process_batch(self, batch: List[tuple]):
+        """Predict a batch with the candidate(s) and queue the shadow log rows."""
+        by_version: Dict[str, List[Dict]] = {}
+        for candidate_version, served in batch:
+            by_version.setdefault(candidate_version, []).append(served)
+        
+        for candidate_version, requests in by_version.items():
+            try:
+                candidate = self.pool.load(candidate_version)
+                X = candidate.prepare_frame(pd.DataFrame([served['features'] for served in requests]))
+                predictions = candidate.predict_frame(X)
+            except Exception as e:
+                SHADOW_PREDICTIONS.labels('failed').inc(len(requests))
+                print(f"Shadow scoring error ({candidate_version}): {e}")
+                continue
+            
+            SHADOW_PREDICTIONS.labels('scored').inc(len(requests))
+            for served, prediction in zip(requests, predictions):
+                self.log_writer.submit(build_log_row(
+                    served['request_id'], served['store_id'], served['features'], prediction,
+                    candidate.model_version, is_shadow=True, product_id=served.get('product_id'),
+                ))
+        
+    def pending(self) -> int:
+        """Requests waiting to be shadow scored."""
+        return self._queue.qsize()
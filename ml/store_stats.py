@@ -0,0 +1,148 @@
+"""
+Store Statistics Snapshot
+=========================
+
+In-memory snapshot of the ml_store_stats table (store rating, review
+count, completed sales, region) for the prediction API.
+
+- The full table is loaded once at startup
+- Afterwards only rows with updated_at past the last seen value are
+  fetched, at most every `refresh_interval` seconds
+- Stores missing from the snapshot are looked up by primary key and added
+
+ml_store_stats is maintained by database triggers (see the
+create_ml_store_stats migration), so no request joins reviews/orders.
+"""
+
+import threading
+import time
+from typing import Dict, Optional
+
+import psycopg2
+
+from config import DATABASE_URL, STORE_STATS_CONFIG
+from regions import resolve_region
+
+STORE_STATS_QUERY = """
+SELECT
+    s.id::TEXT AS store_id,
+    COALESCE(ms.avg_rating, 0)::FLOAT8 AS store_avg_rating,
+    COALESCE(ms.total_reviews, 0) AS store_total_reviews,
+    COALESCE(ms.total_sales, 0) AS store_total_sales,
+    s.address AS store_address,
+    ms.updated_at
+FROM stores s
+LEFT JOIN ml_store_stats ms ON ms.store_id = s.id
+"""
+
+
+def _row_to_features(row) -> Dict:
+    """Convert a STORE_STATS_QUERY row to store feature values."""
+    return {
+        'store_avg_rating': float(row[1]),
+        'store_total_reviews': int(row[2]),
+        'store_total_sales': int(row[3]),
+        'store_region': resolve_region(row[4]),
+    }
+
+
+class StoreStatsSnapshot:
+    """
+    Process-local copy of ml_store_stats, refreshed incrementally.
+    """
+    
+    def __init__(self, database_url: str = DATABASE_URL,
+                 refresh_interval: float = STORE_STATS_CONFIG['refresh_interval']):
+        """
+        Initialize snapshot (nothing is loaded until load()).
+        
+        Args:
+            database_url: PostgreSQL connection string
+            refresh_interval: Minimum seconds between incremental refreshes
+        """
+        self.database_url = database_url
+        self.refresh_interval = refresh_interval
+        self._stores: Dict[str, Dict] = {}
+        self._watermark = None
+        self._last_refresh = 0.0
+        self._lock = threading.Lock()
+    
+    def _fetch(self, where: str = '', params: tuple = ()) -> list:
+        conn = psycopg2.connect(self.database_url)
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(STORE_STATS_QUERY + where, params)
+                return cursor.fetchall()
+        finally:
+            conn.close()
+    
+    def _apply(self, rows: list):
+        with self._lock:
+            for row in rows:
+                self._stores[row[0]] = _row_to_features(row)
+                if row[5] is not None and (self._watermark is None or row[5] > self._watermark):
+                    self._watermark = row[5]
+            self._last_refresh = time.monotonic()
+    
+    def load(self) -> int:
+        """
+        Load the full table, replacing the current snapshot.
+        
+        Returns:
+            Number of stores loaded
+        """
+        rows = self._fetch()
+        with self._lock:
+            self._stores = {}
+            self._watermark = None
+        self._apply(rows)
+        return len(rows)
+    
+    def refresh(self) -> int:
+        """
+        Fetch rows changed since the last load/refresh.
+        
+        Returns:
+            Number of stores updated
+        """
+        if self._watermark is None:
+            return self.load()
+        
+        # Overlap window: rows committed late with an earlier now() are not missed
+        rows = self._fetch(
+            "WHERE ms.updated_at > %s - make_interval(secs => %s)",
+            (self._watermark, STORE_STATS_CONFIG['refresh_overlap']),
+        )
+        self._apply(rows)
+        return len(rows)
+    
+    def get(self, store_id: str) -> Optional[Dict]:
+        """
+        Store features for store_id (None if the store does not exist).
+        
+        Refreshes the snapshot first if it is older than refresh_interval;
+        unknown stores are fetched individually and added.
+        """
+        if time.monotonic() - self._last_refresh >= self.refresh_interval:
+            try:
+                self.refresh()
+            except Exception as e:
+                # Serve the (slightly stale) snapshot; retry after the interval
+                self._last_refresh = time.monotonic()
+                print(f"Error refreshing store stats: {e}")
+        
+        features = self._stores.get(store_id)
+        if features is not None:
+            return features
+        
+        rows = self._fetch("WHERE s.id = %s", (store_id,))
+        if not rows:
+            return None
+        
+        features = _row_to_features(rows[0])
+        with self._lock:
+            self._stores[store_id] = features
+        return features
+    
+    def __len__(self) -> int:
+        return len(self._stores)
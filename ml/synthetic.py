@@ -0,0 +1,261 @@
+"""
+Synthetic Data
+==============
+
+Deterministic synthetic `prediction_training_data` frames, prediction
+inputs and small trained models matching the `config` feature schema.
+Used by the benchmark harnesses so they run without a database.
+"""
+
+import contextlib
+import io
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from config import (
+    ALL_FEATURES,
+    TARGET,
+    MODEL_NAMES,
+    RANDOM_STATE,
+    PRODUCT_CATEGORIES,
+    DAYS_OF_WEEK,
+    INTERVAL_CONFIG,
+    DISTILL_CONFIG,
+    FEATURE_SELECTION_CONFIG,
+)
+
+MODEL_FILENAME = 'sell_through_model.pkl'
+PREPROCESSOR_FILENAME = 'preprocessor.pkl'
+METADATA_FILENAME = 'model_metadata.json'
+INTERVAL_MODEL_FILENAME = 'interval_model.pkl'
+STUDENT_MODEL_FILENAME = 'student_model.pkl'
+
+
+def _time_slot(hours: np.ndarray) -> np.ndarray:
+    """Vectorized time slot classification (same boundaries as get_time_slot)."""
+    bins = np.array([6, 11, 14, 17, 21])
+    labels = np.array(['심야', '아침', '점심', '오후', '저녁', '심야'])
+    return labels[np.searchsorted(bins, hours, side='right')]
+
+
+def make_region_names(n_regions: int) -> List[str]:
+    """Synthetic 구/시 region names."""
+    return [f'지역{i:04d}구' for i in range(n_regions)]
+
+
+def make_training_frame(
+    n_rows: int,
+    seed: int = RANDOM_STATE,
+    n_regions: int = 25,
+    missing_rate: float = 0.01,
+) -> pd.DataFrame:
+    """
+    Generate a synthetic prediction_training_data frame.
+    
+    Columns, value ranges and category values follow the table definition;
+    rows are ordered by recorded_at and dtypes are those pandas infers from
+    the database (apply preprocess.apply_dtype_schema like fetch_training_data()).
+    
+    Args:
+        n_rows: Number of rows
+        seed: Random seed
+        n_regions: Number of distinct store regions
+        missing_rate: Fraction of NULLs injected into some feature columns
+        
+    Returns:
+        DataFrame shaped like prediction_training_data
+    """
+    rng = np.random.default_rng(seed)
+    
+    # Stores keep a fixed region and slowly varying stats (at least one
+    # store per region, so every region occurs)
+    n_stores = max(10, n_rows // 50, n_regions)
+    regions = np.array(make_region_names(n_regions))
+    store_idx = rng.integers(0, n_stores, n_rows)
+    store_region = regions[np.arange(n_stores) % n_regions][store_idx]
+    store_rating = rng.uniform(2.5, 5.0, n_stores).round(2)[store_idx]
+    store_reviews = rng.integers(0, 500, n_stores)[store_idx]
+    store_sales = rng.integers(0, 3000, n_stores)[store_idx]
+    store_effect = rng.normal(0, 0.08, n_stores)[store_idx]
+    
+    hours = rng.integers(0, 24, n_rows)
+    original_price = rng.integers(20, 300, n_rows) * 100
+    discount_rate = rng.uniform(10, 70, n_rows).round(2)
+    discount_price = (original_price * (1 - discount_rate / 100)).astype(np.int64)
+    quantity = rng.integers(1, 50, n_rows)
+    deadline = rng.uniform(0.5, 12, n_rows).round(2)
+    dow_idx = rng.integers(0, 7, n_rows)
+    category_idx = rng.integers(0, len(PRODUCT_CATEGORIES), n_rows)
+    
+    rate = (
+        0.25
+        + 0.9 * discount_rate / 100
+        - quantity / 150
+        + 0.03 * (deadline > 3)
+        + 0.04 * (dow_idx >= 4)
+        + 0.02 * (category_idx % 3)
+        + 0.03 * (store_rating - 3.75)
+        + store_effect
+        + rng.normal(0, 0.05, n_rows)
+    )
+    
+    df = pd.DataFrame({
+        'id': np.arange(n_rows),
+        'product_id': np.arange(n_rows),
+        'store_id': store_idx,
+        'recorded_at': pd.Timestamp('2026-01-01') + pd.to_timedelta(np.arange(n_rows) * 30, unit='s'),
+        TARGET: np.clip(rate, 0, 1).round(4),
+        'product_register_hour': hours,
+        'product_register_minute': rng.integers(0, 60, n_rows),
+        'original_price': original_price,
+        'discount_price': discount_price,
+        'discount_rate': discount_rate,
+        'product_quantity': quantity,
+        'deadline_hours_remaining': deadline,
+        'store_avg_rating': store_rating,
+        'store_total_reviews': store_reviews,
+        'store_total_sales': store_sales,
+        'weather_temperature': np.nan,
+        'distance_from_station': np.nan,
+        'product_category': np.array(PRODUCT_CATEGORIES)[category_idx],
+        'register_day_of_week': np.array(DAYS_OF_WEEK)[dow_idx],
+        'store_region': store_region,
+        'time_slot': _time_slot(hours),
+        'is_holiday': rng.random(n_rows) < 0.04,
+        'is_weekend': dow_idx >= 5,
+    })
+    
+    # Inject NULLs like the real table has
+    if missing_rate > 0:
+        for col in ['store_avg_rating', 'deadline_hours_remaining', 'store_region']:
+            mask = rng.random(n_rows) < missing_rate
+            df.loc[mask, col] = None
+    
+    return df
+
+
+def make_feature_dicts(n: int, seed: int = RANDOM_STATE, n_regions: int = 25) -> List[Dict]:
+    """
+    Generate raw prediction inputs (one dict per product, ALL_FEATURES keys).
+    
+    Args:
+        n: Number of feature dictionaries
+        seed: Random seed
+        n_regions: Number of distinct store regions
+        
+    Returns:
+        List of feature dictionaries accepted by SellThroughPredictor.predict
+    """
+    df = make_training_frame(n, seed=seed, n_regions=n_regions, missing_rate=0.0)
+    records = df[ALL_FEATURES].to_dict('records')
+    
+    # Plain Python scalars, like a decoded JSON request
+    return [
+        {k: (v.item() if isinstance(v, np.generic) else v) for k, v in record.items()}
+        for record in records
+    ]
+
+
+def build_synthetic_model(
+    model_type: str,
+    output_dir: Path,
+    n_rows: int = 3000,
+    seed: int = RANDOM_STATE,
+    serve_student: bool = DISTILL_CONFIG['serve_student'],
+) -> Path:
+    """
+    Train a model of the given type on synthetic data through the regular
+    preprocessing/feature selection/training functions and save its artifacts (with the
+    prediction interval model when INTERVAL_CONFIG is enabled, and the
+    distilled student when DISTILL_CONFIG is enabled and it passes its check).
+    
+    Args:
+        model_type: 'lightgbm', 'catboost', 'xgboost', 'random_forest', or 'ridge'
+        output_dir: Directory for model, preprocessor and metadata files
+        n_rows: Synthetic training rows
+        seed: Random seed
+        serve_student: Fit the interval model for the student's input
+            instead of the model's (when a student is saved)
+        
+    Returns:
+        output_dir
+    """
+    import train_model
+    from preprocess import (
+        apply_dtype_schema, handle_missing_values, create_derived_features, split_data, prepare_data_for_model
+    )
+    
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    trainers = {
+        'lightgbm': train_model.train_lightgbm,
+        'catboost': train_model.train_catboost,
+        'xgboost': train_model.train_xgboost,
+        'random_forest': train_model.train_random_forest,
+        'ridge': train_model.train_ridge,
+    }
+    
+    # Training output is not part of what is being measured
+    with contextlib.redirect_stdout(io.StringIO()):
+        df = apply_dtype_schema(make_training_frame(n_rows, seed=seed))
+        df = create_derived_features(handle_missing_values(df))
+        X_train, X_test, y_train, y_test = split_data(df, include_derived_features=True)
+        
+        # Same features as a trained version (the registration minute is usually dropped)
+        if FEATURE_SELECTION_CONFIG['enabled']:
+            selected, _ = train_model.select_training_features({
+                'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'data_size': n_rows,
+                'feature_names': list(X_train.columns),
+            })
+            X_train, X_test = selected['X_train'], selected['X_test']
+        
+        X_train_p, X_test_p, preprocessor, cat_features, cat_indices = prepare_data_for_model(
+            X_train, X_test, model_type, y_train
+        )
+        
+        if model_type == 'lightgbm':
+            model, metrics = trainers[model_type](X_train_p, y_train, X_test_p, y_test, cat_indices)
+        elif model_type == 'catboost':
+            model, metrics = trainers[model_type](X_train_p, y_train, X_test_p, y_test, cat_features)
+        else:
+            model, metrics = trainers[model_type](X_train_p, y_train, X_test_p, y_test)
+        
+        data = {'X_train': X_train, 'X_test': X_test, 'y_train': y_train, 'y_test': y_test}
+        student = None
+        if DISTILL_CONFIG['enabled']:
+            student, _ = train_model.train_student_model(data, model_type, model, preprocessor)
+            if student is not None:
+                joblib.dump(student, output_dir / STUDENT_MODEL_FILENAME)
+        
+        if INTERVAL_CONFIG['enabled']:
+            interval_model, _ = train_model.train_prediction_intervals(
+                data, model_type, model, preprocessor,
+                student_model=student if serve_student else None
+            )
+            if interval_model is not None:
+                joblib.dump(interval_model, output_dir / INTERVAL_MODEL_FILENAME)
+    
+    joblib.dump(model, output_dir / MODEL_FILENAME)
+    if preprocessor is not None:
+        joblib.dump(preprocessor, output_dir / PREPROCESSOR_FILENAME)
+    
+    metadata = {
+        'model_name': MODEL_NAMES[model_type],
+        'model_type': model_type,
+        'training_date': datetime.now().isoformat(),
+        'data_size': n_rows,
+        'features': list(X_train.columns),
+        'metrics': {k: float(metrics[k]) for k in ['R2', 'RMSE', 'MAE', 'CV_R2']},
+        'synthetic': True,
+    }
+    with open(output_dir / METADATA_FILENAME, 'w') as f:
+        json.dump(metadata, f, indent=2, ensure_ascii=False)
+    
+    return output_dir
@@ -8,17 +8,17 @@ and save the best model for prediction.
 
 import numpy as np
 import pandas as pd
+from sklearn.base import clone
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.linear_model import Ridge
-from sklearn.model_selection import cross_val_score, KFold
+from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import r2_score, mean_squared_error, mean_absolute_error
 import lightgbm as lgb
 import catboost as cb
 import xgboost as xgb
 import optuna
 from optuna.samplers import TPESampler
-import joblib
-import json
+import argparse
 from datetime import datetime
 import warnings
 
@@ -33,14 +33,25 @@ from config import (
     RIDGE_PARAMS,
     DATA_STRATEGY,
     CV_FOLDS,
+    EARLY_STOPPING_CONFIG,
     OPTUNA_CONFIG,
-    MODEL_PATH,
-    METADATA_PATH,
+    TRAINING_PROFILE_PATH,
+    PROFILES_DIR,
     PERFORMANCE_THRESHOLDS,
     MODEL_NAMES,
     RANDOM_STATE,
+    INTERVAL_CONFIG,
+    DISTILL_CONFIG,
+    FEATURE_SELECTION_CONFIG,
 )
 from preprocess import load_and_preprocess_data, prepare_data_for_model
+from ensemble import FoldEnsemble
+from profiling import profiler
+from registry import register_model, version_dir, set_candidate_version
+from drift import build_feature_profile
+from intervals import train_interval_model
+from distill import distill_model
+from feature_selection import select_features
 
 warnings.filterwarnings('ignore')
 optuna.logging.set_verbosity(optuna.logging.WARNING)
@@ -89,59 +100,222 @@ def calculate_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
     }
 
 
-def train_lightgbm(X_train, y_train, X_test, y_test, cat_features=None):
-    """Train LightGBM model."""
-    print("\n[1/5] Training LightGBM...")
+def _take_rows(X, idx):
+    """Select rows by position from a DataFrame/Series or an array."""
+    if hasattr(X, 'iloc'):
+        return X.iloc[idx]
+    return X[idx]
+
+
+def early_stopping_split(X, y, fraction: float = EARLY_STOPPING_CONFIG['validation_fraction']) -> tuple:
+    """
+    Split time-ordered training rows into a fit part and the newest tail
+    used to monitor early stopping.
     
-    params = LIGHTGBM_DEFAULT_PARAMS.copy()
+    Args:
+        X: Training features (time-ordered)
+        y: Training target
+        fraction: Share of rows in the tail
+        
+    Returns:
+        Tuple of (X_fit, y_fit, X_stop, y_stop)
+    """
+    n_stop = max(int(len(y) * fraction), 1)
+    fit_idx, stop_idx = np.arange(len(y) - n_stop), np.arange(len(y) - n_stop, len(y))
+    return _take_rows(X, fit_idx), _take_rows(y, fit_idx), _take_rows(X, stop_idx), _take_rows(y, stop_idx)
+
+
+def time_series_splits(n_samples: int, cv_folds: int = CV_FOLDS) -> list:
+    """
+    Expanding-window splits over time-ordered rows.
     
-    if cat_features:
-        # Categorical features provided as indices
-        model = lgb.LGBMRegressor(**params)
-        model.fit(
-            X_train, y_train,
-            categorical_feature=cat_features,
-            eval_set=[(X_test, y_test)],
-            callbacks=[lgb.early_stopping(stopping_rounds=50, verbose=False)]
-        )
-    else:
-        model = lgb.LGBMRegressor(**params)
-        model.fit(X_train, y_train)
+    The rows are cut into `cv_folds + 1` contiguous blocks; fold k trains on
+    blocks [0, k] and validates on block k + 1, so no fold sees the future.
+    
+    Args:
+        n_samples: Number of (time-ordered) training rows
+        cv_folds: Number of folds
+        
+    Returns:
+        List of (train_indices, val_indices) tuples
+    """
+    tscv = TimeSeriesSplit(n_splits=cv_folds)
+    return list(tscv.split(np.zeros((n_samples, 1))))
+
+
+@profiler.profiled('cross_validation')
+def time_series_cross_validate(fit_fn, X, y, cv_folds: int = CV_FOLDS) -> tuple:
+    """
+    Perform expanding-window time-series cross-validation.
+    
+    The fold models are kept: their out-of-fold predictions give the CV score,
+    and together they form the final model (a FoldEnsemble). The validation
+    blocks are only scored (fit_fn never sees them, early stopping included).
+    The newest block is validated on but never trained on by any fold, so
+    after scoring the last member is refit on the full window.
     
-    y_pred = model.predict(X_test)
+    Args:
+        fit_fn: Callable (X_train, y_train) -> fitted model
+        X: Training features (time-ordered)
+        y: Training target
+        cv_folds: Number of folds
+        
+    Returns:
+        Tuple of (FoldEnsemble, cv_metrics)
+    """
+    print(f"  Running {cv_folds}-fold time-series cross-validation...")
+    
+    y_values = np.asarray(y, dtype=float)
+    models, weights, fold_scores = [], [], []
+    
+    for train_idx, val_idx in time_series_splits(len(y_values), cv_folds):
+        X_tr, X_val = _take_rows(X, train_idx), _take_rows(X, val_idx)
+        y_tr = _take_rows(y, train_idx)
+        
+        model = fit_fn(X_tr, y_tr)
+        y_pred = clip_predictions(model.predict(X_val))
+        
+        models.append(model)
+        weights.append(len(train_idx))
+        fold_scores.append(r2_score(y_values[val_idx], y_pred))
+    
+    # The last member also learns the newest block
+    models[-1] = fit_fn(X, y)
+    weights[-1] = len(y_values)
+    
+    cv_metrics = {
+        'CV_R2': float(np.mean(fold_scores)),
+        'CV_R2_std': float(np.std(fold_scores)),
+        'CV_fold_R2': [float(s) for s in fold_scores],
+    }
+    
+    return FoldEnsemble(models, weights), cv_metrics
+
+
+def fit_and_evaluate(fit_fn, X_train, y_train, X_test, y_test) -> tuple:
+    """
+    Cross-validate a model and score the resulting fold ensemble on the test set.
+    
+    Args:
+        fit_fn: Callable (X_train, y_train) -> fitted model
+        X_train, y_train: Training data (time-ordered)
+        X_test, y_test: Hold-out test data
+        
+    Returns:
+        Tuple of (FoldEnsemble, metrics)
+    """
+    model, cv_metrics = time_series_cross_validate(fit_fn, X_train, y_train, CV_FOLDS)
+    
+    with profiler.stage('evaluate_test'):
+        y_pred = model.predict(X_test)
     metrics = calculate_metrics(y_test, y_pred)
+    metrics.update(cv_metrics)
     
     print(f"  R² = {metrics['R2']:.4f}, RMSE = {metrics['RMSE']:.4f}, MAE = {metrics['MAE']:.4f}")
+    print(f"  CV R² = {metrics['CV_R2']:.4f} (± {metrics['CV_R2_std']:.4f})")
     
     return model, metrics
 
 
-def train_catboost(X_train, y_train, X_test, y_test, cat_features=None):
-    """Train CatBoost model."""
-    print("\n[2/5] Training CatBoost...")
-    
-    params = CATBOOST_DEFAULT_PARAMS.copy()
+def lightgbm_fit_fn(params: dict, cat_features=None, early_stopping: bool = True):
+    """Build a fold fit function for LightGBM."""
+    def fit(X_tr, y_tr):
+        model = lgb.LGBMRegressor(**params)
+        
+        if cat_features and early_stopping:
+            # Categorical features provided as indices
+            X_fit, y_fit, X_stop, y_stop = early_stopping_split(X_tr, y_tr)
+            model.fit(
+                X_fit, y_fit,
+                categorical_feature=cat_features,
+                eval_set=[(X_stop, y_stop)],
+                callbacks=[lgb.early_stopping(stopping_rounds=EARLY_STOPPING_CONFIG['stopping_rounds'],
+                                              verbose=False)]
+            )
+        elif cat_features:
+            model.fit(X_tr, y_tr, categorical_feature=cat_features)
+        else:
+            model.fit(X_tr, y_tr)
+        
+        return model
     
-    if cat_features:
-        # Categorical features provided as column names
-        model = cb.CatBoostRegressor(**params)
-        model.fit(
-            X_train, y_train,
-            cat_features=cat_features,
-            eval_set=(X_test, y_test),
-            early_stopping_rounds=50,
-            verbose=False
-        )
-    else:
+    return fit
+
+
+def catboost_fit_fn(params: dict, cat_features=None, early_stopping: bool = True):
+    """Build a fold fit function for CatBoost."""
+    def fit(X_tr, y_tr):
         model = cb.CatBoostRegressor(**params)
-        model.fit(X_train, y_train, verbose=False)
+        
+        if cat_features and early_stopping:
+            # Categorical features provided as column names
+            X_fit, y_fit, X_stop, y_stop = early_stopping_split(X_tr, y_tr)
+            model.fit(
+                X_fit, y_fit,
+                cat_features=cat_features,
+                eval_set=(X_stop, y_stop),
+                early_stopping_rounds=EARLY_STOPPING_CONFIG['stopping_rounds'],
+                verbose=False
+            )
+        elif cat_features:
+            model.fit(X_tr, y_tr, cat_features=cat_features, verbose=False)
+        else:
+            model.fit(X_tr, y_tr, verbose=False)
+        
+        return model
     
-    y_pred = model.predict(X_test)
-    metrics = calculate_metrics(y_test, y_pred)
+    return fit
+
+
+def xgboost_fit_fn(params: dict):
+    """Build a fold fit function for XGBoost."""
+    def fit(X_tr, y_tr):
+        X_fit, y_fit, X_stop, y_stop = early_stopping_split(X_tr, y_tr)
+        model = xgb.XGBRegressor(**params, early_stopping_rounds=EARLY_STOPPING_CONFIG['stopping_rounds'])
+        model.fit(X_fit, y_fit, eval_set=[(X_stop, y_stop)], verbose=False)
+        return model
     
-    print(f"  R² = {metrics['R2']:.4f}, RMSE = {metrics['RMSE']:.4f}, MAE = {metrics['MAE']:.4f}")
+    return fit
+
+
+def random_forest_fit_fn(params: dict):
+    """Build a fold fit function for Random Forest."""
+    def fit(X_tr, y_tr):
+        model = RandomForestRegressor(**params)
+        model.fit(X_tr, y_tr)
+        return model
     
-    return model, metrics
+    return fit
+
+
+def ridge_fit_fn(params: dict):
+    """Build a fold fit function for Ridge Regression."""
+    def fit(X_tr, y_tr):
+        model = Ridge(**params)
+        model.fit(X_tr, y_tr)
+        return model
+    
+    return fit
+
+
+def train_lightgbm(X_train, y_train, X_test, y_test, cat_features=None):
+    """Train LightGBM model."""
+    print("\n[1/5] Training LightGBM...")
+    
+    params = LIGHTGBM_DEFAULT_PARAMS.copy()
+    return fit_and_evaluate(
+        lightgbm_fit_fn(params, cat_features), X_train, y_train, X_test, y_test
+    )
+
+
+def train_catboost(X_train, y_train, X_test, y_test, cat_features=None):
+    """Train CatBoost model."""
+    print("\n[2/5] Training CatBoost...")
+    
+    params = CATBOOST_DEFAULT_PARAMS.copy()
+    return fit_and_evaluate(
+        catboost_fit_fn(params, cat_features), X_train, y_train, X_test, y_test
+    )
 
 
 def train_xgboost(X_train, y_train, X_test, y_test):
@@ -149,74 +323,38 @@ def train_xgboost(X_train, y_train, X_test, y_test):
     print("\n[3/5] Training XGBoost...")
     
     params = XGBOOST_DEFAULT_PARAMS.copy()
-    model = xgb.XGBRegressor(**params)
-    model.fit(
-        X_train, y_train,
-        eval_set=[(X_test, y_test)],
-        early_stopping_rounds=50,
-        verbose=False
+    return fit_and_evaluate(
+        xgboost_fit_fn(params), X_train, y_train, X_test, y_test
     )
-    
-    y_pred = model.predict(X_test)
-    metrics = calculate_metrics(y_test, y_pred)
-    
-    print(f"  R² = {metrics['R2']:.4f}, RMSE = {metrics['RMSE']:.4f}, MAE = {metrics['MAE']:.4f}")
-    
-    return model, metrics
 
 
 def train_random_forest(X_train, y_train, X_test, y_test):
     """Train Random Forest model."""
     print("\n[4/5] Training Random Forest...")
     
-    model = RandomForestRegressor(**RANDOM_FOREST_PARAMS)
-    model.fit(X_train, y_train)
-    
-    y_pred = model.predict(X_test)
-    metrics = calculate_metrics(y_test, y_pred)
-    
-    print(f"  R² = {metrics['R2']:.4f}, RMSE = {metrics['RMSE']:.4f}, MAE = {metrics['MAE']:.4f}")
-    
-    return model, metrics
+    return fit_and_evaluate(
+        random_forest_fit_fn(RANDOM_FOREST_PARAMS), X_train, y_train, X_test, y_test
+    )
 
 
 def train_ridge(X_train, y_train, X_test, y_test):
     """Train Ridge Regression model."""
     print("\n[5/5] Training Ridge Regression...")
     
-    model = Ridge(**RIDGE_PARAMS)
-    model.fit(X_train, y_train)
-    
-    y_pred = model.predict(X_test)
-    metrics = calculate_metrics(y_test, y_pred)
-    
-    print(f"  R² = {metrics['R2']:.4f}, RMSE = {metrics['RMSE']:.4f}, MAE = {metrics['MAE']:.4f}")
-    
-    return model, metrics
-
-
-def perform_cross_validation(model, X, y, cv_folds=5):
-    """
-    Perform k-fold cross-validation.
-    
-    Args:
-        model: Trained model
-        X: Features
-        y: Target
-        cv_folds: Number of folds
-        
-    Returns:
-        Average R² score across folds
-    """
-    kf = KFold(n_splits=cv_folds, shuffle=False, random_state=RANDOM_STATE)
-    cv_scores = cross_val_score(model, X, y, cv=kf, scoring='r2', n_jobs=-1)
-    return cv_scores.mean()
+    return fit_and_evaluate(
+        ridge_fit_fn(RIDGE_PARAMS), X_train, y_train, X_test, y_test
+    )
 
 
 def tune_lightgbm(X_train, y_train, X_test, y_test, cat_features=None):
     """Hyperparameter tuning for LightGBM using Optuna."""
     print("\n🔧 Tuning LightGBM hyperparameters with Optuna...")
     
+    # Score trials on the most recent CV window so the test set stays unseen
+    train_idx, val_idx = time_series_splits(len(y_train), CV_FOLDS)[-1]
+    X_tr, X_val = _take_rows(X_train, train_idx), _take_rows(X_train, val_idx)
+    y_tr, y_val = _take_rows(y_train, train_idx), _take_rows(y_train, val_idx)
+    
     def objective(trial):
         params = {
             'n_estimators': trial.suggest_int('n_estimators', *LIGHTGBM_PARAM_GRID['n_estimators']),
@@ -232,16 +370,11 @@ def tune_lightgbm(X_train, y_train, X_test, y_test, cat_features=None):
             'verbose': -1,
         }
         
-        model = lgb.LGBMRegressor(**params)
-        
-        if cat_features:
-            model.fit(X_train, y_train, categorical_feature=cat_features)
-        else:
-            model.fit(X_train, y_train)
+        model = lightgbm_fit_fn(params, cat_features, early_stopping=False)(X_tr, y_tr)
         
-        y_pred = model.predict(X_test)
+        y_pred = model.predict(X_val)
         y_pred_clipped = clip_predictions(y_pred)
-        r2 = r2_score(y_test, y_pred_clipped)
+        r2 = r2_score(y_val, y_pred_clipped)
         
         return r2
     
@@ -249,37 +382,37 @@ def tune_lightgbm(X_train, y_train, X_test, y_test, cat_features=None):
         direction='maximize',
         sampler=TPESampler(seed=RANDOM_STATE)
     )
-    study.optimize(
-        objective,
-        n_trials=OPTUNA_CONFIG['n_trials'],
-        n_jobs=OPTUNA_CONFIG['n_jobs'],
-        show_progress_bar=OPTUNA_CONFIG['show_progress_bar']
-    )
+    with profiler.stage('optuna', n_trials=OPTUNA_CONFIG['n_trials']):
+        study.optimize(
+            objective,
+            n_trials=OPTUNA_CONFIG['n_trials'],
+            n_jobs=OPTUNA_CONFIG['n_jobs'],
+            show_progress_bar=OPTUNA_CONFIG['show_progress_bar']
+        )
     
     print(f"  Best R²: {study.best_value:.4f}")
     print(f"  Best params: {study.best_params}")
     
-    # Train final model with best params
+    # Cross-validate best params; the fold models become the final model
     best_params = study.best_params
     best_params['random_state'] = RANDOM_STATE
     best_params['verbose'] = -1
     
-    model = lgb.LGBMRegressor(**best_params)
-    if cat_features:
-        model.fit(X_train, y_train, categorical_feature=cat_features)
-    else:
-        model.fit(X_train, y_train)
-    
-    y_pred = model.predict(X_test)
-    metrics = calculate_metrics(y_test, y_pred)
-    
-    return model, metrics
+    return fit_and_evaluate(
+        lightgbm_fit_fn(best_params, cat_features, early_stopping=False),
+        X_train, y_train, X_test, y_test
+    )
 
 
 def tune_catboost(X_train, y_train, X_test, y_test, cat_features=None):
     """Hyperparameter tuning for CatBoost using Optuna."""
     print("\n🔧 Tuning CatBoost hyperparameters with Optuna...")
     
+    # Score trials on the most recent CV window so the test set stays unseen
+    train_idx, val_idx = time_series_splits(len(y_train), CV_FOLDS)[-1]
+    X_tr, X_val = _take_rows(X_train, train_idx), _take_rows(X_train, val_idx)
+    y_tr, y_val = _take_rows(y_train, train_idx), _take_rows(y_train, val_idx)
+    
     def objective(trial):
         params = {
             'iterations': trial.suggest_int('iterations', *CATBOOST_PARAM_GRID['iterations']),
@@ -292,16 +425,11 @@ def tune_catboost(X_train, y_train, X_test, y_test, cat_features=None):
             'verbose': False,
         }
         
-        model = cb.CatBoostRegressor(**params)
-        
-        if cat_features:
-            model.fit(X_train, y_train, cat_features=cat_features, verbose=False)
-        else:
-            model.fit(X_train, y_train, verbose=False)
+        model = catboost_fit_fn(params, cat_features, early_stopping=False)(X_tr, y_tr)
         
-        y_pred = model.predict(X_test)
+        y_pred = model.predict(X_val)
         y_pred_clipped = clip_predictions(y_pred)
-        r2 = r2_score(y_test, y_pred_clipped)
+        r2 = r2_score(y_val, y_pred_clipped)
         
         return r2
     
@@ -309,31 +437,55 @@ def tune_catboost(X_train, y_train, X_test, y_test, cat_features=None):
         direction='maximize',
         sampler=TPESampler(seed=RANDOM_STATE)
     )
-    study.optimize(
-        objective,
-        n_trials=OPTUNA_CONFIG['n_trials'],
-        n_jobs=OPTUNA_CONFIG['n_jobs'],
-        show_progress_bar=OPTUNA_CONFIG['show_progress_bar']
-    )
+    with profiler.stage('optuna', n_trials=OPTUNA_CONFIG['n_trials']):
+        study.optimize(
+            objective,
+            n_trials=OPTUNA_CONFIG['n_trials'],
+            n_jobs=OPTUNA_CONFIG['n_jobs'],
+            show_progress_bar=OPTUNA_CONFIG['show_progress_bar']
+        )
     
     print(f"  Best R²: {study.best_value:.4f}")
     print(f"  Best params: {study.best_params}")
     
-    # Train final model with best params
+    # Cross-validate best params; the fold models become the final model
     best_params = study.best_params
     best_params['random_state'] = RANDOM_STATE
     best_params['verbose'] = False
     
-    model = cb.CatBoostRegressor(**best_params)
-    if cat_features:
-        model.fit(X_train, y_train, cat_features=cat_features, verbose=False)
-    else:
-        model.fit(X_train, y_train, verbose=False)
+    return fit_and_evaluate(
+        catboost_fit_fn(best_params, cat_features, early_stopping=False),
+        X_train, y_train, X_test, y_test
+    )
+
+
+def select_training_features(data: dict) -> tuple:
+    """
+    Restrict the training data to the selected features.
     
-    y_pred = model.predict(X_test)
-    metrics = calculate_metrics(y_test, y_pred)
+    Args:
+        data: Output of load_and_preprocess_data()
+        
+    Returns:
+        (data with X_train/X_test/feature_names reduced to the selected
+        features, selection report or None if selection was skipped)
+    """
+    if data['data_size'] < FEATURE_SELECTION_CONFIG['min_rows']:
+        print(f"\nSkipping feature selection (data size {data['data_size']} < "
+              f"{FEATURE_SELECTION_CONFIG['min_rows']})")
+        return data, None
     
-    return model, metrics
+    print("\n" + "="*60)
+    print("FEATURE SELECTION")
+    print("="*60)
+    
+    selected, report = select_features(data['X_train'], data['y_train'])
+    return {
+        **data,
+        'X_train': data['X_train'][selected],
+        'X_test': data['X_test'][selected],
+        'feature_names': selected,
+    }, report
 
 
 def train_all_models(data: dict) -> dict:
@@ -369,53 +521,67 @@ def train_all_models(data: dict) -> dict:
     
     # Train each model
     for model_type in model_types:
-        # Prepare data for specific model type
-        if model_type in ['lightgbm', 'catboost']:
-            X_train, X_test, _, cat_features, cat_indices = prepare_data_for_model(
-                X_train_raw, X_test_raw, model_type
-            )
+        with profiler.stage(model_type):
+            # Prepare data for specific model type
+            if model_type in ['lightgbm', 'catboost']:
+                X_train, X_test, _, cat_features, cat_indices = prepare_data_for_model(
+                    X_train_raw, X_test_raw, model_type
+                )
+                
+                if model_type == 'lightgbm':
+                    model, metrics = train_lightgbm(X_train, y_train, X_test, y_test, cat_indices)
+                else:
+                    model, metrics = train_catboost(X_train, y_train, X_test, y_test, cat_features)
             
-            if model_type == 'lightgbm':
-                model, metrics = train_lightgbm(X_train, y_train, X_test, y_test, cat_indices)
-            else:
-                model, metrics = train_catboost(X_train, y_train, X_test, y_test, cat_features)
-        
-        elif model_type == 'xgboost':
-            X_train, X_test, preprocessor, _, _ = prepare_data_for_model(
-                X_train_raw, X_test_raw, model_type
-            )
-            model, metrics = train_xgboost(X_train, y_train, X_test, y_test)
-        
-        elif model_type == 'random_forest':
-            X_train, X_test, preprocessor, _, _ = prepare_data_for_model(
-                X_train_raw, X_test_raw, model_type
-            )
-            model, metrics = train_random_forest(X_train, y_train, X_test, y_test)
-        
-        elif model_type == 'ridge':
-            X_train, X_test, preprocessor, _, _ = prepare_data_for_model(
-                X_train_raw, X_test_raw, model_type
-            )
-            model, metrics = train_ridge(X_train, y_train, X_test, y_test)
-        
-        # Perform cross-validation
-        print(f"  Running {CV_FOLDS}-fold cross-validation...")
-        cv_r2 = perform_cross_validation(model, X_train, y_train, CV_FOLDS)
-        metrics['CV_R2'] = cv_r2
-        print(f"  CV R² = {cv_r2:.4f}")
-        
-        results[model_type] = {
-            'model': model,
-            'metrics': metrics,
-            'preprocessor': preprocessor if model_type not in ['lightgbm', 'catboost'] else None,
-        }
+            elif model_type == 'xgboost':
+                X_train, X_test, preprocessor, _, _ = prepare_data_for_model(
+                    X_train_raw, X_test_raw, model_type, y_train
+                )
+                model, metrics = train_xgboost(X_train, y_train, X_test, y_test)
+            
+            elif model_type == 'random_forest':
+                X_train, X_test, preprocessor, _, _ = prepare_data_for_model(
+                    X_train_raw, X_test_raw, model_type, y_train
+                )
+                model, metrics = train_random_forest(X_train, y_train, X_test, y_test)
+            
+            elif model_type == 'ridge':
+                X_train, X_test, preprocessor, _, _ = prepare_data_for_model(
+                    X_train_raw, X_test_raw, model_type, y_train
+                )
+                model, metrics = train_ridge(X_train, y_train, X_test, y_test)
+            
+            results[model_type] = {
+                'model': model,
+                'metrics': metrics,
+                'preprocessor': preprocessor if model_type not in ['lightgbm', 'catboost'] else None,
+            }
     
     return results
 
 
+def rank_models(results: dict) -> list:
+    """
+    Rank trained models by time-series CV R² (best first).
+    
+    Args:
+        results: Dictionary of model results
+        
+    Returns:
+        List of (model_name, result) tuples
+    """
+    return sorted(
+        results.items(),
+        key=lambda x: x[1]['metrics']['CV_R2'],
+        reverse=True
+    )
+
+
 def select_best_model(results: dict) -> tuple:
     """
-    Select the best model based on test R².
+    Select the best model based on time-series CV R² (out-of-fold).
+    
+    The test set is only reported, never used for ranking.
     
     Args:
         results: Dictionary of model results
@@ -427,18 +593,15 @@ def select_best_model(results: dict) -> tuple:
     print("MODEL COMPARISON")
     print("="*60)
     
-    # Sort models by R²
-    sorted_models = sorted(
-        results.items(),
-        key=lambda x: x[1]['metrics']['R2'],
-        reverse=True
-    )
+    # Sort models by CV R²
+    sorted_models = rank_models(results)
     
-    print("\nRanking by R²:")
+    print("\nRanking by CV R²:")
     for i, (model_name, result) in enumerate(sorted_models, 1):
         metrics = result['metrics']
         status = "✓" if metrics['R2'] >= PERFORMANCE_THRESHOLDS['R2'] else "✗"
-        print(f"{i}. {MODEL_NAMES[model_name]:20s} - R²: {metrics['R2']:.4f} {status}")
+        print(f"{i}. {MODEL_NAMES[model_name]:20s} - CV R²: {metrics['CV_R2']:.4f}, "
+              f"Test R²: {metrics['R2']:.4f} {status}")
     
     best_model_name, best_result = sorted_models[0]
     print(f"\n🏆 Best model: {MODEL_NAMES[best_model_name]}")
@@ -474,56 +637,126 @@ def tune_top_models(results: dict, data: dict) -> dict:
     y_test = data['y_test']
     
     # Get top-2 models
-    sorted_models = sorted(
-        results.items(),
-        key=lambda x: x[1]['metrics']['R2'],
-        reverse=True
-    )[:2]
+    sorted_models = rank_models(results)[:2]
     
     for model_name, _ in sorted_models:
-        if model_name == 'lightgbm':
-            X_train, X_test, _, cat_features, cat_indices = prepare_data_for_model(
-                X_train_raw, X_test_raw, model_name
-            )
-            model, metrics = tune_lightgbm(X_train, y_train, X_test, y_test, cat_indices)
-            
-            # Update results
-            cv_r2 = perform_cross_validation(model, X_train, y_train, CV_FOLDS)
-            metrics['CV_R2'] = cv_r2
-            results[model_name] = {
-                'model': model,
-                'metrics': metrics,
-                'preprocessor': None,
-            }
-        
-        elif model_name == 'catboost':
-            X_train, X_test, _, cat_features, cat_indices = prepare_data_for_model(
-                X_train_raw, X_test_raw, model_name
-            )
-            model, metrics = tune_catboost(X_train, y_train, X_test, y_test, cat_features)
+        with profiler.stage(model_name):
+            if model_name == 'lightgbm':
+                X_train, X_test, _, cat_features, cat_indices = prepare_data_for_model(
+                    X_train_raw, X_test_raw, model_name
+                )
+                model, metrics = tune_lightgbm(X_train, y_train, X_test, y_test, cat_indices)
+                
+                # Update results
+                results[model_name] = {
+                    'model': model,
+                    'metrics': metrics,
+                    'preprocessor': None,
+                }
             
-            # Update results
-            cv_r2 = perform_cross_validation(model, X_train, y_train, CV_FOLDS)
-            metrics['CV_R2'] = cv_r2
-            results[model_name] = {
-                'model': model,
-                'metrics': metrics,
-                'preprocessor': None,
-            }
+            elif model_name == 'catboost':
+                X_train, X_test, _, cat_features, cat_indices = prepare_data_for_model(
+                    X_train_raw, X_test_raw, model_name
+                )
+                model, metrics = tune_catboost(X_train, y_train, X_test, y_test, cat_features)
+                
+                # Update results
+                results[model_name] = {
+                    'model': model,
+                    'metrics': metrics,
+                    'preprocessor': None,
+                }
     
     return results
 
 
+def train_prediction_intervals(data: dict, model_name: str, model, preprocessor,
+                               student_model=None) -> tuple:
+    """
+    Train the quantile interval models for the served model.
+    
+    The quantile boosters are fitted on the served model's own input (see
+    intervals.py), so serving converts the features only once: LightGBM
+    format for a LightGBM model or the distilled student, the preprocessor
+    output otherwise. Model types outside INTERVAL_CONFIG['model_types']
+    get no interval model.
+    
+    Args:
+        data: Output of load_and_preprocess_data()
+        model_name: Selected model type
+        model: Selected model
+        preprocessor: Its preprocessor (or None)
+        student_model: Distilled student, when it is served instead of the model
+        
+    Returns:
+        (interval_model, interval metrics on the test split), or (None, None)
+    """
+    served_type = 'lightgbm' if student_model is not None else model_name
+    if served_type not in INTERVAL_CONFIG['model_types']:
+        print(f"\n⚠️  No prediction intervals for {MODEL_NAMES[served_type]} "
+              f"(not in INTERVAL_CONFIG['model_types'])")
+        return None, None
+    
+    X_train_lgb, X_test_lgb, _, _, _ = prepare_data_for_model(data['X_train'], data['X_test'], 'lightgbm')
+    
+    # Served model predictions on the test split (intervals are widened to contain them)
+    if student_model is not None:
+        test_predictions = clip_predictions(student_model.predict(X_test_lgb))
+    elif preprocessor is not None:
+        X_test_model = preprocessor.transform(data['X_test'])
+        test_predictions = clip_predictions(model.predict(X_test_model))
+    else:
+        X_test_model = prepare_data_for_model(data['X_train'], data['X_test'], model_name)[1]
+        test_predictions = clip_predictions(model.predict(X_test_model))
+    
+    if preprocessor is None or student_model is not None:
+        return train_interval_model(X_train_lgb, data['y_train'], X_test_lgb, data['y_test'], test_predictions)
+    
+    # Same training matrix as the selected model (preprocessing is deterministic,
+    # target encodings included), without refitting the saved preprocessor
+    X_train_model = clone(preprocessor).fit_transform(data['X_train'], data['y_train'])
+    return train_interval_model(X_train_model, data['y_train'], X_test_model, data['y_test'], test_predictions)
+
+
+def train_student_model(data: dict, model_name: str, model, preprocessor) -> tuple:
+    """
+    Distill the selected model into a small student model.
+    
+    Args:
+        data: Output of load_and_preprocess_data()
+        model_name: Selected model type
+        model: Selected model (the teacher)
+        preprocessor: Its preprocessor (or None)
+        
+    Returns:
+        (student model or None if it is not to be served, distillation report)
+    """
+    print("\n" + "="*60)
+    print("MODEL DISTILLATION")
+    print("="*60)
+    
+    return distill_model(model, model_name, preprocessor, data['X_train'], data['X_test'], data['y_test'])
+
+
 def save_model_and_metadata(
     model_name: str,
     model,
     metrics: dict,
     preprocessor,
     feature_names: list,
-    data_size: int
-):
+    data_size: int,
+    profile: dict = None,
+    activate: bool = True,
+    feature_profile: dict = None,
+    test_split: tuple = None,
+    interval_model=None,
+    interval_metrics: dict = None,
+    student_model=None,
+    distillation: dict = None,
+    feature_selection: dict = None
+) -> str:
     """
-    Save the best model and metadata.
+    Register the best model and metadata as a new version in the model registry.
     
     Args:
         model_name: Name of the model
@@ -532,22 +765,24 @@ def save_model_and_metadata(
         preprocessor: Preprocessing pipeline (if any)
         feature_names: List of feature names
         data_size: Training data size
+        profile: Stage timing report from the profiler (optional)
+        activate: Make the new version the active one (False: register it as
+            the shadow scoring candidate)
+        feature_profile: Training feature distribution (drift reference, optional)
+        test_split: (X_test, y_test, row_ids) saved with the model for evaluate.py (optional)
+        interval_model: Quantile interval model saved with the model (optional)
+        interval_metrics: Interval coverage/width on the test split (optional)
+        student_model: Distilled model served instead of model (optional)
+        distillation: Teacher/student accuracy and latency report (optional)
+        feature_selection: Feature importances and dropped features (optional)
+                        
+    Returns:
+        Registered model version
     """
     print("\n" + "="*60)
     print("SAVING MODEL")
     print("="*60)
     
-    # Save model
-    joblib.dump(model, MODEL_PATH)
-    print(f"✓ Saved model to {MODEL_PATH}")
-    
-    # Save preprocessor if exists
-    if preprocessor:
-        from config import PREPROCESSOR_PATH
-        joblib.dump(preprocessor, PREPROCESSOR_PATH)
-        print(f"✓ Saved preprocessor to {PREPROCESSOR_PATH}")
-    
-    # Save metadata
     metadata = {
         'model_name': MODEL_NAMES[model_name],
         'model_type': model_name,
@@ -561,22 +796,47 @@ def save_model_and_metadata(
             'MAPE': float(metrics['MAPE']),
             'CV_R2': float(metrics['CV_R2']),
         },
+        'cross_validation': {
+            'strategy': 'expanding_window',
+            'folds': CV_FOLDS,
+            'fold_R2': metrics.get('CV_fold_R2', []),
+            'ensemble_size': len(model) if isinstance(model, FoldEnsemble) else 1,
+        },
         'performance_check': {
             'R2_threshold': PERFORMANCE_THRESHOLDS['R2'],
-            'R2_pass': metrics['R2'] >= PERFORMANCE_THRESHOLDS['R2'],
+            'R2_pass': bool(metrics['R2'] >= PERFORMANCE_THRESHOLDS['R2']),
             'RMSE_threshold': PERFORMANCE_THRESHOLDS['RMSE'],
-            'RMSE_pass': metrics['RMSE'] <= PERFORMANCE_THRESHOLDS['RMSE'],
+            'RMSE_pass': bool(metrics['RMSE'] <= PERFORMANCE_THRESHOLDS['RMSE']),
             'MAE_threshold': PERFORMANCE_THRESHOLDS['MAE'],
-            'MAE_pass': metrics['MAE'] <= PERFORMANCE_THRESHOLDS['MAE'],
+            'MAE_pass': bool(metrics['MAE'] <= PERFORMANCE_THRESHOLDS['MAE']),
             'CV_R2_threshold': PERFORMANCE_THRESHOLDS['CV_R2'],
-            'CV_R2_pass': metrics['CV_R2'] >= PERFORMANCE_THRESHOLDS['CV_R2'],
+            'CV_R2_pass': bool(metrics['CV_R2'] >= PERFORMANCE_THRESHOLDS['CV_R2']),
         }
     }
     
-    with open(METADATA_PATH, 'w') as f:
-        json.dump(metadata, f, indent=2)
-    
-    print(f"✓ Saved metadata to {METADATA_PATH}")
+    if profile:
+        metadata['profile'] = profile
+    if feature_profile:
+        metadata['feature_profile'] = feature_profile
+    if test_split is not None:
+        metadata['test_size'] = len(test_split[1])
+    if interval_metrics:
+        metadata['interval'] = interval_metrics
+    if distillation:
+        metadata['distillation'] = distillation
+    if feature_selection:
+        metadata['feature_selection'] = feature_selection
+    
+    version = register_model(
+        model, preprocessor, metadata, activate=activate, test_split=test_split,
+        interval_model=interval_model, student_model=student_model
+    )
+    print(f"✓ Registered model version {version} in {version_dir(version)}")
+    if activate:
+        print("  Activated")
+    else:
+        set_candidate_version(version)
+        print("  Not activated - shadow scored by the API as the candidate")
     
     # Print performance check
     print("\nPerformance Check:")
@@ -585,34 +845,87 @@ def save_model_and_metadata(
             status = "✓ PASS" if value else "✗ FAIL"
             metric_name = key.replace('_pass', '').upper()
             print(f"  {metric_name}: {status}")
+    
+    return version
 
 
-def main():
-    """Main training pipeline."""
+def main(profile: bool = False, activate: bool = True):
+    """
+    Main training pipeline.
+    
+    Args:
+        profile: Also dump a cProfile file per stage into PROFILES_DIR
+        activate: Make the trained model the active registry version
+    """
     print("\n" + "="*60)
     print("SELL-THROUGH RATE PREDICTION MODEL TRAINING")
     print("="*60)
     
+    profiler.reset(cprofile_dir=PROFILES_DIR if profile else None)
+    
     # Step 1: Load and preprocess data
-    data = load_and_preprocess_data(include_derived=True)
+    with profiler.stage('load_and_preprocess_data'):
+        data = load_and_preprocess_data(include_derived=True)
+    
+    # Step 2: Feature selection (reduced schema used by every model)
+    feature_selection = None
+    if FEATURE_SELECTION_CONFIG['enabled']:
+        with profiler.stage('select_features'):
+            data, feature_selection = select_training_features(data)
     
-    # Step 2: Train all models
-    results = train_all_models(data)
+    # Step 3: Train all models
+    with profiler.stage('train_all_models'):
+        results = train_all_models(data)
     
-    # Step 3: Tune top models (if data permits)
-    results = tune_top_models(results, data)
+    # Step 4: Tune top models (if data permits)
+    with profiler.stage('tune_top_models'):
+        results = tune_top_models(results, data)
     
-    # Step 4: Select best model
+    # Step 5: Select best model
     best_model_name, best_model, best_metrics, best_preprocessor = select_best_model(results)
     
-    # Step 5: Save model and metadata
-    save_model_and_metadata(
-        best_model_name,
-        best_model,
-        best_metrics,
-        best_preprocessor,
-        data['feature_names'],
-        data['data_size']
+    # Step 6: Distilled student model
+    student_model, distillation = None, None
+    if DISTILL_CONFIG['enabled']:
+        with profiler.stage('train_student_model'):
+            student_model, distillation = train_student_model(
+                data, best_model_name, best_model, best_preprocessor
+            )
+    
+    # Step 7: Prediction interval models (on the input of the served model)
+    interval_model, interval_metrics = None, None
+    if INTERVAL_CONFIG['enabled']:
+        with profiler.stage('train_prediction_intervals'):
+            interval_model, interval_metrics = train_prediction_intervals(
+                data, best_model_name, best_model, best_preprocessor,
+                student_model=student_model if DISTILL_CONFIG['serve_student'] else None
+            )
+    
+    # Step 8: Save model and metadata
+    with profiler.stage('save_model_and_metadata'):
+        save_model_and_metadata(
+            best_model_name,
+            best_model,
+            best_metrics,
+            best_preprocessor,
+            data['feature_names'],
+            data['data_size'],
+            profile=profiler.to_dict(),
+            activate=activate,
+            feature_profile=build_feature_profile(data['X_train']),
+            test_split=(data['X_test'], data['y_test'], data['test_ids']),
+            interval_model=interval_model,
+            interval_metrics=interval_metrics,
+            student_model=student_model,
+            distillation=distillation,
+            feature_selection=feature_selection
+        )
+    
+    profiler.print_summary()
+    profiler.save_report(
+        TRAINING_PROFILE_PATH,
+        data_size=data['data_size'],
+        best_model=best_model_name,
     )
     
     print("\n" + "="*60)
@@ -623,10 +936,26 @@ def main():
     print(f"RMSE = {best_metrics['RMSE']:.4f}")
     print(f"MAE = {best_metrics['MAE']:.4f}")
     print(f"CV R² = {best_metrics['CV_R2']:.4f}")
+    if student_model is not None:
+        print(f"Served by: distilled student (R² = {distillation['student']['R2']:.4f}, "
+              f"{distillation['speedup']:.1f}× faster)")
     print("="*60 + "\n")
     
     return results, best_model_name
 
 
 if __name__ == "__main__":
-    results, best_model_name = main()
+    parser = argparse.ArgumentParser(description='Train sell-through rate prediction models')
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Dump a cProfile file per pipeline stage into reports/profiles/'
+    )
+    parser.add_argument(
+        '--candidate',
+        action='store_true',
+        help='Register the model as the shadow scoring candidate instead of activating it'
+    )
+    args = parser.parse_args()
+    
+    results, best_model_name = main(profile=args.profile, activate=not args.candidate)
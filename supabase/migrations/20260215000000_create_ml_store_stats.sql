@@ -0,0 +1,189 @@
+-- ============================================================
+-- Migration: ML 가게 통계 테이블
+-- Description: 예측 API/배치 스코어링용 가게별 평점·리뷰·판매 통계를
+--              reviews × orders 조인 없이 조회하도록 미리 집계하여 저장
+--              (트리거로 증분 갱신, refresh_ml_store_stats()로 전체 재계산)
+-- ============================================================
+
+-- 1. 가게 통계 테이블 생성
+CREATE TABLE IF NOT EXISTS ml_store_stats (
+  store_id UUID PRIMARY KEY REFERENCES stores(id) ON DELETE CASCADE,
+
+  -- 리뷰 통계 (평균은 합계/개수로 계산하여 증분 갱신 가능)
+  rating_sum BIGINT NOT NULL DEFAULT 0,
+  total_reviews INT NOT NULL DEFAULT 0,
+  avg_rating DECIMAL(3,2) GENERATED ALWAYS AS (
+    CASE WHEN total_reviews > 0 THEN ROUND(rating_sum::DECIMAL / total_reviews, 2) ELSE 0 END
+  ) STORED,
+
+  -- 판매 통계 (COMPLETED 주문 수)
+  total_sales INT NOT NULL DEFAULT 0,
+
+  updated_at TIMESTAMPTZ DEFAULT now() NOT NULL
+);
+
+-- 증분 스냅샷 로딩 (updated_at > 마지막 조회 시각)
+CREATE INDEX IF NOT EXISTS idx_ml_store_stats_updated_at ON ml_store_stats(updated_at);
+
+COMMENT ON TABLE ml_store_stats IS 'ML 피처용 가게 통계 (평점/리뷰 수/판매 수), 트리거로 증분 갱신';
+COMMENT ON COLUMN ml_store_stats.rating_sum IS '리뷰 평점 합계 (avg_rating = rating_sum / total_reviews)';
+COMMENT ON COLUMN ml_store_stats.total_sales IS 'COMPLETED 상태 주문 수';
+COMMENT ON COLUMN ml_store_stats.updated_at IS '마지막 갱신 시각 (API 스냅샷 증분 로딩 기준)';
+
+-- 2. 증분 갱신 헬퍼 함수
+CREATE OR REPLACE FUNCTION apply_ml_store_stats_delta(
+  p_store_id UUID,
+  p_rating_delta INT,
+  p_review_delta INT,
+  p_sales_delta INT
+)
+RETURNS VOID AS $$
+BEGIN
+  IF p_store_id IS NULL THEN
+    RETURN;
+  END IF;
+
+  INSERT INTO ml_store_stats (store_id, rating_sum, total_reviews, total_sales, updated_at)
+  VALUES (p_store_id, p_rating_delta, p_review_delta, p_sales_delta, now())
+  ON CONFLICT (store_id) DO UPDATE SET
+    rating_sum = ml_store_stats.rating_sum + EXCLUDED.rating_sum,
+    total_reviews = ml_store_stats.total_reviews + EXCLUDED.total_reviews,
+    total_sales = ml_store_stats.total_sales + EXCLUDED.total_sales,
+    updated_at = now();
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION apply_ml_store_stats_delta IS 'ml_store_stats 증분 갱신 (행이 없으면 생성)';
+
+-- 3. 리뷰 변경 트리거
+CREATE OR REPLACE FUNCTION update_ml_store_stats_on_review()
+RETURNS TRIGGER AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM apply_ml_store_stats_delta(OLD.store_id, -OLD.rating, -1, 0);
+  END IF;
+
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM apply_ml_store_stats_delta(NEW.store_id, NEW.rating, 1, 0);
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_ml_store_stats_review ON reviews;
+CREATE TRIGGER trigger_ml_store_stats_review
+AFTER INSERT OR DELETE OR UPDATE OF rating, store_id ON reviews
+FOR EACH ROW
+EXECUTE FUNCTION update_ml_store_stats_on_review();
+
+-- 4. 주문 상태 변경 트리거 (COMPLETED 진입/이탈 시에만 갱신)
+CREATE OR REPLACE FUNCTION update_ml_store_stats_on_order()
+RETURNS TRIGGER AS $$
+DECLARE
+  v_old_completed BOOLEAN := TG_OP IN ('UPDATE', 'DELETE') AND OLD.status = 'COMPLETED';
+  v_new_completed BOOLEAN := TG_OP IN ('INSERT', 'UPDATE') AND NEW.status = 'COMPLETED';
+BEGIN
+  IF v_old_completed AND NOT (v_new_completed AND NEW.product_id = OLD.product_id) THEN
+    PERFORM apply_ml_store_stats_delta(
+      (SELECT store_id FROM products WHERE id = OLD.product_id), 0, 0, -1
+    );
+  END IF;
+
+  IF v_new_completed AND NOT (v_old_completed AND NEW.product_id = OLD.product_id) THEN
+    PERFORM apply_ml_store_stats_delta(
+      (SELECT store_id FROM products WHERE id = NEW.product_id), 0, 0, 1
+    );
+  END IF;
+
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_ml_store_stats_order ON orders;
+CREATE TRIGGER trigger_ml_store_stats_order
+AFTER INSERT OR DELETE OR UPDATE OF status, product_id ON orders
+FOR EACH ROW
+EXECUTE FUNCTION update_ml_store_stats_on_order();
+
+-- 5. 전체 재계산 함수 (초기 백필 / 정합성 복구용, 조인 팬아웃 없이 집계)
+CREATE OR REPLACE FUNCTION refresh_ml_store_stats(p_store_id UUID DEFAULT NULL)
+RETURNS INT AS $$
+DECLARE
+  v_count INT;
+BEGIN
+  WITH review_stats AS (
+    SELECT store_id, SUM(rating) AS rating_sum, COUNT(*) AS total_reviews
+    FROM reviews
+    WHERE p_store_id IS NULL OR store_id = p_store_id
+    GROUP BY store_id
+  ),
+  sales_stats AS (
+    SELECT p.store_id, COUNT(*) AS total_sales
+    FROM orders o
+    JOIN products p ON p.id = o.product_id
+    WHERE o.status = 'COMPLETED'
+      AND (p_store_id IS NULL OR p.store_id = p_store_id)
+    GROUP BY p.store_id
+  )
+  INSERT INTO ml_store_stats (store_id, rating_sum, total_reviews, total_sales, updated_at)
+  SELECT
+    s.id,
+    COALESCE(rs.rating_sum, 0),
+    COALESCE(rs.total_reviews, 0),
+    COALESCE(ss.total_sales, 0),
+    now()
+  FROM stores s
+  LEFT JOIN review_stats rs ON rs.store_id = s.id
+  LEFT JOIN sales_stats ss ON ss.store_id = s.id
+  WHERE p_store_id IS NULL OR s.id = p_store_id
+  ON CONFLICT (store_id) DO UPDATE SET
+    rating_sum = EXCLUDED.rating_sum,
+    total_reviews = EXCLUDED.total_reviews,
+    total_sales = EXCLUDED.total_sales,
+    updated_at = now()
+  WHERE (ml_store_stats.rating_sum, ml_store_stats.total_reviews, ml_store_stats.total_sales)
+    IS DISTINCT FROM (EXCLUDED.rating_sum, EXCLUDED.total_reviews, EXCLUDED.total_sales);
+
+  GET DIAGNOSTICS v_count = ROW_COUNT;
+  RETURN v_count;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION refresh_ml_store_stats IS 'ml_store_stats 전체(또는 단일 가게) 재계산, 변경된 행 수 반환';
+
+-- 6. 가게 생성/주소 변경 트리거 (주소 변경 시 updated_at 갱신 → API 스냅샷이 지역 재계산)
+CREATE OR REPLACE FUNCTION touch_ml_store_stats_on_store()
+RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO ml_store_stats (store_id) VALUES (NEW.id)
+  ON CONFLICT (store_id) DO UPDATE SET updated_at = now();
+  RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_ml_store_stats_store ON stores;
+CREATE TRIGGER trigger_ml_store_stats_store
+AFTER INSERT OR UPDATE OF address ON stores
+FOR EACH ROW
+EXECUTE FUNCTION touch_ml_store_stats_on_store();
+
+-- 7. RLS (service_role만 접근)
+ALTER TABLE ml_store_stats ENABLE ROW LEVEL SECURITY;
+
+-- 8. 초기 백필
+SELECT refresh_ml_store_stats();
+
+-- 9. 검증
+DO $$
+DECLARE
+  v_store_count INT;
+  v_stats_count INT;
+BEGIN
+  SELECT COUNT(*) INTO v_store_count FROM stores;
+  SELECT COUNT(*) INTO v_stats_count FROM ml_store_stats;
+
+  RAISE NOTICE '✓ ml_store_stats 테이블 생성 완료 (가게 %개 / 통계 %개)', v_store_count, v_stats_count;
+  RAISE NOTICE '✓ 리뷰/주문/가게 트리거 생성 완료';
+  RAISE NOTICE '✓ refresh_ml_store_stats() 함수 생성 완료';
+END $$;
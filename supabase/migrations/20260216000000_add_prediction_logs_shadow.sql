@@ -0,0 +1,110 @@
+-- ============================================================
+-- Migration: 예측 로그 섀도우 스코어링 지원
+-- Description: 같은 상품/요청에 대해 모델 버전별 예측을 함께 기록
+--              (서비스 모델 + 섀도우 후보 모델 비교용)
+-- ============================================================
+
+-- 1. 컬럼 추가
+ALTER TABLE prediction_logs
+  ADD COLUMN IF NOT EXISTS request_id UUID,
+  ADD COLUMN IF NOT EXISTS is_shadow BOOLEAN NOT NULL DEFAULT false;
+
+COMMENT ON COLUMN prediction_logs.request_id IS '예측 요청 ID (같은 요청의 서비스/섀도우 예측을 묶음)';
+COMMENT ON COLUMN prediction_logs.is_shadow IS '섀도우 예측 여부 (true: 응답에 사용되지 않은 후보 모델 예측)';
+
+-- 2. 모델 버전 필수화 (버전별 유니크 제약을 위해)
+UPDATE prediction_logs SET model_version = 'unknown' WHERE model_version IS NULL;
+
+ALTER TABLE prediction_logs
+  ALTER COLUMN model_version SET DEFAULT 'unknown',
+  ALTER COLUMN model_version SET NOT NULL;
+
+-- 3. 유니크 제약 변경: 상품당 1건 → 상품 × 모델 버전당 1건
+ALTER TABLE prediction_logs DROP CONSTRAINT IF EXISTS prediction_logs_product_unique;
+ALTER TABLE prediction_logs
+  ADD CONSTRAINT prediction_logs_product_model_unique UNIQUE (product_id, model_version);
+
+CREATE INDEX IF NOT EXISTS idx_prediction_logs_request ON prediction_logs(request_id) WHERE request_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_prediction_logs_model_version ON prediction_logs(model_version);
+
+-- 4. 실제 결과 업데이트 함수 수정 (상품의 모든 모델 버전 예측에 각자 오차 기록)
+CREATE OR REPLACE FUNCTION update_prediction_actual_result()
+RETURNS TRIGGER AS $$
+DECLARE
+  v_sold_quantity INT;
+  v_actual_sell_through DECIMAL(5,4);
+BEGIN
+  -- 상품이 마감되었을 때만 실행
+  IF NEW.pickup_deadline < now() AND (OLD.pickup_deadline >= now() OR OLD.id IS NULL) THEN
+
+    -- 예측 로그가 있는지 확인
+    IF EXISTS (SELECT 1 FROM prediction_logs WHERE product_id = NEW.id) THEN
+      -- 실제 판매 수량 계산
+      SELECT COALESCE(SUM(quantity), 0) INTO v_sold_quantity
+      FROM orders
+      WHERE product_id = NEW.id
+        AND status = 'COMPLETED';
+
+      -- 실제 소진율 계산
+      IF NEW.quantity > 0 THEN
+        v_actual_sell_through := v_sold_quantity::DECIMAL / NEW.quantity;
+      ELSE
+        v_actual_sell_through := 0;
+      END IF;
+
+      -- 예측 로그 업데이트 (모델 버전별 예측값 기준 오차)
+      UPDATE prediction_logs
+      SET
+        actual_sell_through = v_actual_sell_through,
+        actual_recorded_at = now(),
+        prediction_error = ABS(v_actual_sell_through - predicted_sell_through)
+      WHERE product_id = NEW.id;
+
+      RAISE NOTICE '✓ 예측 로그 업데이트: product_id=%, actual=%', NEW.id, v_actual_sell_through;
+    END IF;
+  END IF;
+
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- 5. 가게별 정확도 요약 뷰: 서비스 예측만 집계
+CREATE OR REPLACE VIEW prediction_accuracy_summary AS
+SELECT
+  pl.store_id,
+  COUNT(*) FILTER (WHERE pl.actual_sell_through IS NOT NULL) as completed_predictions,
+  AVG(pl.prediction_error) FILTER (WHERE pl.actual_sell_through IS NOT NULL) as avg_error,
+  AVG(ABS(pl.actual_sell_through - pl.predicted_sell_through)) FILTER (WHERE pl.actual_sell_through IS NOT NULL) as mae,
+  SQRT(AVG(POWER(pl.actual_sell_through - pl.predicted_sell_through, 2))) FILTER (WHERE pl.actual_sell_through IS NOT NULL) as rmse,
+  -- 정확도 (100% - 평균 오차%)
+  (1 - AVG(pl.prediction_error) FILTER (WHERE pl.actual_sell_through IS NOT NULL)) * 100 as accuracy_percent
+FROM prediction_logs pl
+WHERE pl.actual_sell_through IS NOT NULL
+  AND NOT pl.is_shadow
+GROUP BY pl.store_id;
+
+-- 6. 모델 버전별 비교 뷰 (섀도우 포함)
+CREATE OR REPLACE VIEW prediction_model_comparison AS
+SELECT
+  pl.model_version,
+  pl.is_shadow,
+  COUNT(*) as predictions,
+  COUNT(*) FILTER (WHERE pl.actual_sell_through IS NOT NULL) as completed_predictions,
+  AVG(pl.predicted_sell_through) as avg_predicted,
+  AVG(ABS(pl.actual_sell_through - pl.predicted_sell_through)) FILTER (WHERE pl.actual_sell_through IS NOT NULL) as mae,
+  SQRT(AVG(POWER(pl.actual_sell_through - pl.predicted_sell_through, 2))) FILTER (WHERE pl.actual_sell_through IS NOT NULL) as rmse,
+  MIN(pl.predicted_at) as first_predicted_at,
+  MAX(pl.predicted_at) as last_predicted_at
+FROM prediction_logs pl
+GROUP BY pl.model_version, pl.is_shadow;
+
+COMMENT ON VIEW prediction_model_comparison IS '모델 버전별 예측 정확도 비교 (서비스/섀도우)';
+
+-- 7. 검증
+DO $$
+BEGIN
+  RAISE NOTICE '✓ prediction_logs.request_id / is_shadow 컬럼 추가 완료';
+  RAISE NOTICE '✓ 유니크 제약 (product_id, model_version) 변경 완료';
+  RAISE NOTICE '✓ update_prediction_actual_result() 함수 수정 완료';
+  RAISE NOTICE '✓ prediction_model_comparison 뷰 생성 완료';
+END $$;
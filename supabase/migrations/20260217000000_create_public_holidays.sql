@@ -0,0 +1,374 @@
+-- ============================================================
+-- Migration: 공휴일 캘린더
+-- Description: 학습 데이터의 is_holiday 피처를 채우기 위한 한국 공휴일 테이블
+--              (설날/추석/부처님오신날, 선거일·임시공휴일, 대체공휴일 포함)
+--              ml/holiday_calendar.py와 같은 데이터이며, 연도 추가 시
+--              `python ml/holiday_calendar.py --sql` 출력으로 갱신
+-- ============================================================
+
+-- 1. 공휴일 테이블 생성
+CREATE TABLE IF NOT EXISTS public_holidays (
+  holiday_date DATE PRIMARY KEY,
+  name TEXT NOT NULL
+);
+
+COMMENT ON TABLE public_holidays IS '한국 공휴일 (ml/holiday_calendar.py에서 생성, 2020~2027년)';
+COMMENT ON COLUMN public_holidays.name IS '공휴일 이름 (대체공휴일은 "대체공휴일(원래 공휴일)")';
+
+-- 2. 공휴일 데이터 (python ml/holiday_calendar.py --sql)
+INSERT INTO public_holidays (holiday_date, name) VALUES
+  ('2020-01-01', '신정'),
+  ('2020-01-24', '설날'),
+  ('2020-01-25', '설날'),
+  ('2020-01-26', '설날'),
+  ('2020-01-27', '대체공휴일(설날)'),
+  ('2020-03-01', '삼일절'),
+  ('2020-04-15', '국회의원 선거일'),
+  ('2020-04-30', '부처님오신날'),
+  ('2020-05-05', '어린이날'),
+  ('2020-06-06', '현충일'),
+  ('2020-08-15', '광복절'),
+  ('2020-08-17', '임시공휴일'),
+  ('2020-09-30', '추석'),
+  ('2020-10-01', '추석'),
+  ('2020-10-02', '추석'),
+  ('2020-10-03', '개천절'),
+  ('2020-10-09', '한글날'),
+  ('2020-12-25', '성탄절'),
+  ('2021-01-01', '신정'),
+  ('2021-02-11', '설날'),
+  ('2021-02-12', '설날'),
+  ('2021-02-13', '설날'),
+  ('2021-03-01', '삼일절'),
+  ('2021-05-05', '어린이날'),
+  ('2021-05-19', '부처님오신날'),
+  ('2021-06-06', '현충일'),
+  ('2021-08-15', '광복절'),
+  ('2021-08-16', '대체공휴일(광복절)'),
+  ('2021-09-20', '추석'),
+  ('2021-09-21', '추석'),
+  ('2021-09-22', '추석'),
+  ('2021-10-03', '개천절'),
+  ('2021-10-04', '대체공휴일(개천절)'),
+  ('2021-10-09', '한글날'),
+  ('2021-10-11', '대체공휴일(한글날)'),
+  ('2021-12-25', '성탄절'),
+  ('2022-01-01', '신정'),
+  ('2022-01-31', '설날'),
+  ('2022-02-01', '설날'),
+  ('2022-02-02', '설날'),
+  ('2022-03-01', '삼일절'),
+  ('2022-03-09', '대통령 선거일'),
+  ('2022-05-05', '어린이날'),
+  ('2022-05-08', '부처님오신날'),
+  ('2022-06-01', '지방선거일'),
+  ('2022-06-06', '현충일'),
+  ('2022-08-15', '광복절'),
+  ('2022-09-09', '추석'),
+  ('2022-09-10', '추석'),
+  ('2022-09-11', '추석'),
+  ('2022-09-12', '대체공휴일(추석)'),
+  ('2022-10-03', '개천절'),
+  ('2022-10-09', '한글날'),
+  ('2022-10-10', '대체공휴일(한글날)'),
+  ('2022-12-25', '성탄절'),
+  ('2023-01-01', '신정'),
+  ('2023-01-21', '설날'),
+  ('2023-01-22', '설날'),
+  ('2023-01-23', '설날'),
+  ('2023-01-24', '대체공휴일(설날)'),
+  ('2023-03-01', '삼일절'),
+  ('2023-05-05', '어린이날'),
+  ('2023-05-27', '부처님오신날'),
+  ('2023-05-29', '대체공휴일(부처님오신날)'),
+  ('2023-06-06', '현충일'),
+  ('2023-08-15', '광복절'),
+  ('2023-09-28', '추석'),
+  ('2023-09-29', '추석'),
+  ('2023-09-30', '추석'),
+  ('2023-10-02', '임시공휴일'),
+  ('2023-10-03', '개천절'),
+  ('2023-10-09', '한글날'),
+  ('2023-12-25', '성탄절'),
+  ('2024-01-01', '신정'),
+  ('2024-02-09', '설날'),
+  ('2024-02-10', '설날'),
+  ('2024-02-11', '설날'),
+  ('2024-02-12', '대체공휴일(설날)'),
+  ('2024-03-01', '삼일절'),
+  ('2024-04-10', '국회의원 선거일'),
+  ('2024-05-05', '어린이날'),
+  ('2024-05-06', '대체공휴일(어린이날)'),
+  ('2024-05-15', '부처님오신날'),
+  ('2024-06-06', '현충일'),
+  ('2024-08-15', '광복절'),
+  ('2024-09-16', '추석'),
+  ('2024-09-17', '추석'),
+  ('2024-09-18', '추석'),
+  ('2024-10-01', '임시공휴일'),
+  ('2024-10-03', '개천절'),
+  ('2024-10-09', '한글날'),
+  ('2024-12-25', '성탄절'),
+  ('2025-01-01', '신정'),
+  ('2025-01-27', '임시공휴일'),
+  ('2025-01-28', '설날'),
+  ('2025-01-29', '설날'),
+  ('2025-01-30', '설날'),
+  ('2025-03-01', '삼일절'),
+  ('2025-03-03', '대체공휴일(삼일절)'),
+  ('2025-05-05', '어린이날, 부처님오신날'),
+  ('2025-05-06', '대체공휴일(어린이날)'),
+  ('2025-06-03', '대통령 선거일'),
+  ('2025-06-06', '현충일'),
+  ('2025-08-15', '광복절'),
+  ('2025-10-03', '개천절'),
+  ('2025-10-05', '추석'),
+  ('2025-10-06', '추석'),
+  ('2025-10-07', '추석'),
+  ('2025-10-08', '대체공휴일(추석)'),
+  ('2025-10-09', '한글날'),
+  ('2025-12-25', '성탄절'),
+  ('2026-01-01', '신정'),
+  ('2026-02-16', '설날'),
+  ('2026-02-17', '설날'),
+  ('2026-02-18', '설날'),
+  ('2026-03-01', '삼일절'),
+  ('2026-03-02', '대체공휴일(삼일절)'),
+  ('2026-05-05', '어린이날'),
+  ('2026-05-24', '부처님오신날'),
+  ('2026-05-25', '대체공휴일(부처님오신날)'),
+  ('2026-06-03', '지방선거일'),
+  ('2026-06-06', '현충일'),
+  ('2026-08-15', '광복절'),
+  ('2026-08-17', '대체공휴일(광복절)'),
+  ('2026-09-24', '추석'),
+  ('2026-09-25', '추석'),
+  ('2026-09-26', '추석'),
+  ('2026-10-03', '개천절'),
+  ('2026-10-05', '대체공휴일(개천절)'),
+  ('2026-10-09', '한글날'),
+  ('2026-12-25', '성탄절'),
+  ('2027-01-01', '신정'),
+  ('2027-02-06', '설날'),
+  ('2027-02-07', '설날'),
+  ('2027-02-08', '설날'),
+  ('2027-02-09', '대체공휴일(설날)'),
+  ('2027-03-01', '삼일절'),
+  ('2027-05-05', '어린이날'),
+  ('2027-05-13', '부처님오신날'),
+  ('2027-06-06', '현충일'),
+  ('2027-08-15', '광복절'),
+  ('2027-08-16', '대체공휴일(광복절)'),
+  ('2027-09-14', '추석'),
+  ('2027-09-15', '추석'),
+  ('2027-09-16', '추석'),
+  ('2027-10-03', '개천절'),
+  ('2027-10-04', '대체공휴일(개천절)'),
+  ('2027-10-09', '한글날'),
+  ('2027-10-11', '대체공휴일(한글날)'),
+  ('2027-12-25', '성탄절'),
+  ('2027-12-27', '대체공휴일(성탄절)')
+ON CONFLICT (holiday_date) DO UPDATE SET name = EXCLUDED.name;
+
+-- 3. 공휴일 조회 함수
+CREATE OR REPLACE FUNCTION is_public_holiday(p_date DATE)
+RETURNS BOOLEAN AS $$
+  SELECT EXISTS (SELECT 1 FROM public_holidays WHERE holiday_date = p_date);
+$$ LANGUAGE sql STABLE;
+
+COMMENT ON FUNCTION is_public_holiday IS '날짜가 공휴일(대체공휴일 포함)인지 여부';
+
+-- 4. 학습 데이터 수집 함수 수정 (is_holiday를 등록일의 공휴일 여부로 기록)
+CREATE OR REPLACE FUNCTION collect_training_data_for_product(p_product_id UUID)
+RETURNS VOID AS $$
+DECLARE
+  v_product RECORD;
+  v_store RECORD;
+  v_sold_quantity INT;
+  v_sell_through_rate DECIMAL(5,4);
+  v_register_hour INT;
+  v_register_minute INT;
+  v_register_dow TEXT;
+  v_deadline_hours DECIMAL(6,2);
+  v_time_slot TEXT;
+  v_is_weekend BOOLEAN;
+  v_is_holiday BOOLEAN;
+  v_store_avg_rating DECIMAL(3,2);
+  v_store_total_reviews INT;
+  v_store_total_sales INT;
+  v_discount_rate DECIMAL(5,2);
+BEGIN
+  -- 이미 수집된 데이터인지 확인
+  IF EXISTS (
+    SELECT 1 FROM prediction_training_data WHERE product_id = p_product_id
+  ) THEN
+    RAISE NOTICE '이미 수집된 상품: %', p_product_id;
+    RETURN;
+  END IF;
+
+  -- 상품 정보 조회
+  SELECT * INTO v_product
+  FROM products
+  WHERE id = p_product_id;
+  
+  IF NOT FOUND THEN
+    RAISE NOTICE '상품을 찾을 수 없음: %', p_product_id;
+    RETURN;
+  END IF;
+  
+  -- 마감되지 않은 상품은 수집하지 않음
+  IF v_product.pickup_deadline >= now() THEN
+    RAISE NOTICE '아직 마감되지 않은 상품: %', p_product_id;
+    RETURN;
+  END IF;
+  
+  -- 가게 정보 조회
+  SELECT * INTO v_store
+  FROM stores
+  WHERE id = v_product.store_id;
+  
+  -- 판매된 수량 계산 (COMPLETED 주문의 quantity 합계)
+  SELECT COALESCE(SUM(quantity), 0) INTO v_sold_quantity
+  FROM orders
+  WHERE product_id = p_product_id
+    AND status = 'COMPLETED';
+  
+  -- 소진율 계산
+  IF v_product.quantity > 0 THEN
+    v_sell_through_rate := v_sold_quantity::DECIMAL / v_product.quantity;
+  ELSE
+    v_sell_through_rate := 0;
+  END IF;
+  
+  -- 등록 시각 추출
+  v_register_hour := EXTRACT(HOUR FROM v_product.created_at);
+  v_register_minute := EXTRACT(MINUTE FROM v_product.created_at);
+  
+  -- 요일 추출 (한글)
+  v_register_dow := CASE EXTRACT(DOW FROM v_product.created_at)::INT
+    WHEN 0 THEN '일'
+    WHEN 1 THEN '월'
+    WHEN 2 THEN '화'
+    WHEN 3 THEN '수'
+    WHEN 4 THEN '목'
+    WHEN 5 THEN '금'
+    WHEN 6 THEN '토'
+  END;
+  
+  -- 주말 여부
+  v_is_weekend := EXTRACT(DOW FROM v_product.created_at)::INT IN (0, 6);
+  
+  -- 공휴일 여부 (등록일 기준, public_holidays 조회)
+  v_is_holiday := is_public_holiday(v_product.created_at::DATE);
+  
+  -- 마감까지 남은 시간 (등록 시점 기준, 시간 단위)
+  v_deadline_hours := EXTRACT(EPOCH FROM (v_product.pickup_deadline - v_product.created_at)) / 3600.0;
+  
+  -- 시간대 분류
+  v_time_slot := get_time_slot(v_register_hour);
+  
+  -- 할인율 계산 (%)
+  IF v_product.original_price > 0 THEN
+    v_discount_rate := ((v_product.original_price - v_product.discount_price)::DECIMAL / v_product.original_price) * 100;
+  ELSE
+    v_discount_rate := 0;
+  END IF;
+  
+  -- 가게 평균 평점 계산
+  SELECT COALESCE(AVG(rating), 0) INTO v_store_avg_rating
+  FROM reviews
+  WHERE store_id = v_product.store_id;
+  
+  -- 가게 리뷰 수
+  SELECT COUNT(*) INTO v_store_total_reviews
+  FROM reviews
+  WHERE store_id = v_product.store_id;
+  
+  -- 가게 누적 판매 건수 (상품 등록 시점 기준)
+  SELECT COUNT(*) INTO v_store_total_sales
+  FROM orders o
+  JOIN products p ON p.id = o.product_id
+  WHERE p.store_id = v_product.store_id
+    AND o.status = 'COMPLETED'
+    AND o.completed_at < v_product.created_at;  -- 등록 시점 이전 판매만
+  
+  -- 학습 데이터 삽입
+  INSERT INTO prediction_training_data (
+    sell_through_rate,
+    product_register_hour,
+    product_register_minute,
+    original_price,
+    discount_price,
+    discount_rate,
+    product_quantity,
+    deadline_hours_remaining,
+    store_avg_rating,
+    store_total_reviews,
+    store_total_sales,
+    product_category,
+    register_day_of_week,
+    store_region,
+    time_slot,
+    is_holiday,
+    is_weekend,
+    product_id,
+    store_id,
+    recorded_at
+  ) VALUES (
+    v_sell_through_rate,
+    v_register_hour,
+    v_register_minute,
+    v_product.original_price,
+    v_product.discount_price,
+    v_discount_rate,
+    v_product.quantity,
+    v_deadline_hours,
+    v_store_avg_rating,
+    v_store_total_reviews,
+    v_store_total_sales,
+    v_product.category::TEXT,
+    v_register_dow,
+    extract_region(v_store.address),
+    v_time_slot,
+    v_is_holiday,
+    v_is_weekend,
+    p_product_id,
+    v_product.store_id,
+    now()
+  )
+  ON CONFLICT (product_id) DO NOTHING;  -- 중복 방지
+  
+  RAISE NOTICE '✓ 학습 데이터 수집 완료: product_id=%, 소진율=%', p_product_id, v_sell_through_rate;
+  
+EXCEPTION
+  WHEN OTHERS THEN
+    RAISE WARNING '학습 데이터 수집 실패: product_id=%, error=%', p_product_id, SQLERRM;
+END;
+$$ LANGUAGE plpgsql;
+
+COMMENT ON FUNCTION collect_training_data_for_product IS '단일 상품의 소진율과 피처를 수집하여 학습 데이터 테이블에 저장';
+
+-- 5. 기존 학습 데이터 백필 (상품 등록일 기준)
+UPDATE prediction_training_data t
+SET is_holiday = is_public_holiday(p.created_at::DATE)
+FROM products p
+WHERE p.id = t.product_id
+  AND t.is_holiday IS DISTINCT FROM is_public_holiday(p.created_at::DATE);
+
+-- 6. RLS 정책 (읽기 전용 참조 데이터)
+ALTER TABLE public_holidays ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Anyone can view public holidays"
+  ON public_holidays
+  FOR SELECT
+  USING (true);
+
+-- 7. 검증
+DO $$
+BEGIN
+  RAISE NOTICE '✓ public_holidays 테이블 생성 완료 (% 건)', (SELECT COUNT(*) FROM public_holidays);
+  RAISE NOTICE '✓ is_public_holiday() 함수 생성 완료';
+  RAISE NOTICE '✓ collect_training_data_for_product() 함수 수정 완료';
+  RAISE NOTICE '✓ prediction_training_data.is_holiday 백필 완료 (공휴일 % 건)',
+    (SELECT COUNT(*) FROM prediction_training_data WHERE is_holiday);
+END $$;
@@ -0,0 +1,46 @@
+-- ============================================================
+-- Migration: extract_region() 빈 결과 NULL 처리
+-- Description: 빈 주소 또는 공백으로 시작하는 주소는 split_part()가 ''를
+--              반환하므로 NULL로 변환 (학습 시 'unknown'으로 채워지며,
+--              서빙 측 ml/regions.py resolve_region()과 같은 값)
+-- ============================================================
+
+-- 1. 지역 추출 함수 수정
+CREATE OR REPLACE FUNCTION extract_region(address TEXT)
+RETURNS TEXT AS $$
+DECLARE
+  region TEXT;
+BEGIN
+  -- 주소가 null이면 null 반환
+  IF address IS NULL THEN
+    RETURN NULL;
+  END IF;
+  
+  -- "서울시 강남구 역삼동" → "강남구" 추출
+  -- "경기도 성남시 분당구" → "성남시 분당구" 추출
+  -- 정규식으로 "XX구" 또는 "XX시" 패턴 찾기
+  region := (regexp_match(address, '([가-힣]+(?:구|시))'))[1];
+  
+  -- 찾지 못하면 원본 주소의 첫 단어 반환 (빈 문자열이면 NULL)
+  IF region IS NULL THEN
+    region := NULLIF(split_part(address, ' ', 1), '');
+  END IF;
+  
+  RETURN region;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+COMMENT ON FUNCTION extract_region IS '주소에서 구/시 단위 지역명 추출 (추출 불가 시 NULL)';
+
+-- 2. 기존 학습 데이터 정리 (빈 지역 → NULL)
+UPDATE prediction_training_data
+SET store_region = NULL
+WHERE store_region = '';
+
+-- 3. 검증
+DO $$
+BEGIN
+  ASSERT extract_region('') IS NULL, 'extract_region('''') should be NULL';
+  ASSERT extract_region(' 역삼동') IS NULL, 'extract_region('' 역삼동'') should be NULL';
+  RAISE NOTICE '✓ extract_region() 함수 수정 완료';
+END $$;